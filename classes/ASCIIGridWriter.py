@@ -1,11 +1,34 @@
 import sys
 from pathlib import Path
+from functools import lru_cache
 import numpy as np
 
 from .NumpyRadolanReader import NumpyRadolanReader
 
 default_nodata_value = -1.0
 
+CHUNK_ROWS = 128    # rows formatted and written at once
+
+cellsize = 1000    # meters
+
+d_projected_meters = {
+    # key: row, value: tuple of projected meters of the lower left corner: x0, y0
+    1500: (-673462, -5008645),    # central europe composite, 1500x1400
+    1200: (-543197, -4822589),    # WN, HG, 1200x1100 *)
+    1100: (-443462, -4758645),    # extended national composite / RADKLIM: 1100x900
+     900: (-523462, -4658645)     # national composite: 900x900
+}
+# *) taken y0 from HG format description and minus 1200 kilometers.
+# They specify the _upper_ left corner there.
+
+
+def lower_left_corner(nrows):
+    """ projected meters (x0, y0) of the lower left corner of a grid with 'nrows' rows """
+    try:
+        return d_projected_meters[nrows]
+    except KeyError:
+        raise NotImplementedError(f"no RADOLAN grid with {nrows} rows known")
+
 
 class ASCIIGridWriter:
     """ASCIIGridWriter
@@ -18,7 +41,7 @@ class ASCIIGridWriter:
 
     def __init__(self, np_2Ddata, precision, asc_filename_path, nodata_value=default_nodata_value):
         """
-        :param np_2Ddata:
+        :param np_2Ddata: float array (float32 or float64), written as it is
         :param precision:
         :param asc_filename_path:
         :param nodata_value: possibility to specify another missing value,
@@ -56,27 +79,14 @@ class ASCIIGridWriter:
         
         nrows, ncols = self._np_2Ddata.shape
         
-        d_projected_meters = {
-            # key: row, value: tuple of projected meters: x0, y0
-            1500: (-673462, -5008645),    # central europe composite, 1500x1400
-            1200: (-543197, -4822589),    # WN, HG, 1200x1100 *)
-            1100: (-443462, -4758645),    # extended national composite / RADKLIM: 1100x900
-             900: (-523462, -4658645)     # national composite: 900x900
-        }
-        # *) taken y0 from HG format description and minus 1200 kilometers.
-        # They specify the _upper_ left corner there.
-
-        try:
-            llcorner = d_projected_meters[nrows]
-        except KeyError:
-            raise NotImplementedError
+        llcorner = lower_left_corner(nrows)    # NotImplementedError
         
         l_gis_header_template = []
         l_gis_header_template.append(f"ncols     {ncols}")
         l_gis_header_template.append(f"nrows     {nrows}")
         l_gis_header_template.append(f"xllcorner {llcorner[0]}")
         l_gis_header_template.append(f"yllcorner {llcorner[1]}")
-        l_gis_header_template.append("cellsize  1000")
+        l_gis_header_template.append(f"cellsize  {cellsize}")
         l_gis_header_template.append(f"nodata_value {self._nodata_value}")
 
         gis_header = "\n".join(l_gis_header_template)
@@ -89,16 +99,17 @@ class ASCIIGridWriter:
         else:
             fmt = '%d'    # as integer
 
-        np_data = np.copy(self._np_2Ddata)    # otherwise values will be changed
-        
-        #mask = np.isnan(np_data)
-        #np_data[mask] = NODATA
-        # -> ok
-        np_data[np.isnan(np_data)] = self._nodata_value    # set np.nan to ASCII value
+        # np.flipud() as view, NaN are replaced chunk by chunk -> no copy of the whole field
+        np_data = self._np_2Ddata[::-1]
         
-        # np.flipud(): Flip array in the up/down direction.
-        np.savetxt(self._asc_filename_path, np.flipud(np_data), fmt=fmt,
-                   delimiter=' ', newline='\n', header=gis_header, comments='')  # footer=''
+        # same bytes as np.savetxt(..., fmt=fmt, delimiter=' ', newline='\n', header=gis_header, comments='')
+        with open(self._asc_filename_path, 'w', encoding='latin1') as f:
+            f.write(gis_header + '\n')
+            
+            for i in range(0, nrows, CHUNK_ROWS):
+                chunk = np_data[i:i + CHUNK_ROWS]
+                chunk = np.where(np.isnan(chunk), chunk.dtype.type(self._nodata_value), chunk)    # keeps dtype
+                f.write( _format_rows(chunk, fmt) )
         
         self.out(f"write(): -> {self._asc_filename_path}")
         
@@ -117,6 +128,95 @@ class ASCIIGridWriter:
         """
         
 
+def _format_rows(np_data, fmt):
+    """
+    Formats a 2D array like np.savetxt with delimiter ' ' and newline '\n'
+    would do, but vectorized: the values are converted to integers (sign,
+    integer and fractional digits) and the characters are assembled in a
+    byte matrix, so Python only formats the few values where the rounding
+    is ambiguous.
+    
+    :param fmt: '%d', '%.1f' or '%.2f'
+    :return: str
+    """
+    
+    decimals = 0 if fmt == '%d' else int(fmt[2:-1])
+    scale = 10 ** decimals
+    
+    values = np_data.astype(np.float64)
+    
+    if not np.all(np.isfinite(values)) or np.max(np.abs(values), initial=0) * scale >= 2**52:
+        return _format_rows_python(np_data, fmt)
+    
+    if decimals == 0:
+        n = np.trunc(values)    # '%d' % float -> int(): truncation, no '-0'
+        negative = n < 0
+        n = np.abs(n).astype(np.int64)
+    else:
+        """
+        float32 * 10**decimals is exact in float64, so np.rint (half to even)
+        rounds like printf on the exact binary value. Only for float64 input
+        a tie can be blurred by the multiplication: these few values are
+        formatted by Python itself.
+        """
+        y = np.abs(values) * scale
+        n = np.rint(y)
+        if np_data.dtype != np.float32:
+            ambiguous = np.abs(np.abs(y - np.trunc(y)) - 0.5) < 1e-6
+            for idx in zip(*np.nonzero(ambiguous)):
+                n[idx] = int( (fmt % np_data[idx]).lstrip('-').replace('.', '') )
+        negative = np.signbit(values)    # '%.1f' % -0.0 -> '-0.0'
+        n = n.astype(np.int64)
+    
+    int_part, frac_part = np.divmod(n, scale)
+    
+    n_int_digits = len(str(int(int_part.max(initial=0))))
+    
+    # columns: sign, integer digits, ['.', fractional digits], delimiter / newline
+    # 0 marks unused columns, which are removed at the end
+    width = 1 + n_int_digits + (1 + decimals if decimals else 0) + 1
+    chars = np.zeros(n.shape + (width,), dtype=np.uint8)
+    
+    chars[..., 0] = np.where(negative, ord('-'), 0)
+    
+    if n_int_digits <= 6:
+        chars[..., 1:1 + n_int_digits] = _digits_lut(n_int_digits)[int_part]
+    else:
+        for i, k in enumerate(range(n_int_digits - 1, -1, -1), start=1):
+            digit = (int_part // 10**k) % 10 + ord('0')
+            if k > 0:
+                digit[int_part < 10**k] = 0    # no leading zeros
+            chars[..., i] = digit
+    
+    if decimals:
+        chars[..., 1 + n_int_digits] = ord('.')
+        chars[..., 2 + n_int_digits:-1] = _digits_lut(decimals, leading_zeros=True)[frac_part]
+    
+    chars[..., -1] = ord(' ')
+    chars[:, -1, -1] = ord('\n')
+    
+    return chars[chars != 0].tobytes().decode('ascii')
+
+
+@lru_cache(maxsize=None)
+def _digits_lut(n_digits, leading_zeros=False):
+    """ ASCII digits of 0 ... 10**n_digits - 1, shape (10**n_digits, n_digits); 0 for leading zeros """
+    numbers = np.arange(10**n_digits)
+    lut = np.zeros((numbers.size, n_digits), dtype=np.uint8)
+    for i, k in enumerate(range(n_digits - 1, -1, -1)):
+        lut[:, i] = (numbers // 10**k) % 10 + ord('0')
+        if k > 0 and not leading_zeros:
+            lut[numbers < 10**k, i] = 0
+    lut.flags.writeable = False
+    return lut
+
+
+def _format_rows_python(np_data, fmt):
+    """ fallback, e.g. for inf values: format row by row like np.savetxt """
+    row_fmt = ' '.join([fmt] * np_data.shape[1]) + '\n'
+    return ''.join(row_fmt % tuple(row) for row in np_data.tolist())
+
+
 def test_hg():
     print("*** Test HG ***\n")
 
@@ -2,11 +2,13 @@ import sys
 from pathlib import Path
 import time
 
-from qgis.core           import QgsProject, QgsPrintLayout, QgsReadWriteContext
+from qgis.core           import QgsApplication, QgsProject, QgsPrintLayout, QgsReadWriteContext
 from qgis.PyQt.QtWidgets import QMessageBox
 # For the QGIS printing template:
 from qgis.PyQt.QtXml     import QDomDocument
 
+from .PipelineTask       import PipelineTask    # background execution
+
 
 class ActionTabBase:
     """ ActionTabBase
@@ -25,6 +27,8 @@ class ActionTabBase:
         self._iface = iface
         self._model = model
         self.dock   = dock
+        
+        self._task  = None    # running PipelineTask
 
     def __str__(self):
         return self.__class__.__name__
@@ -39,6 +43,16 @@ class ActionTabBase:
         self.out(msg, False)
         QMessageBox.critical(self._iface.mainWindow(), caption, msg)
 
+    def _run_task(self, description, work, on_finished):
+        """
+        Runs 'work' in the QGIS task manager and 'on_finished' afterwards
+        on the main thread (see PipelineTask)
+        """
+        self.out(f"start task: {description}")
+        # keep a reference, otherwise the task is garbage collected while running:
+        self._task = PipelineTask(description, work, on_finished)
+        QgsApplication.taskManager().addTask(self._task)
+
     def _enable_and_show_statistics_tab(self):  # TODO 11.03.2024: replace with method in 'gui.py'?
         self.dock.tabWidget.setTabEnabled(self.dock.TAB_STATISTICS, True)
         self.dock.tabWidget.setCurrentIndex(self.dock.TAB_STATISTICS)    # show statistics tab
@@ -11,6 +11,7 @@ from qgis.PyQt.QtCore    import QDateTime
 # own classes:
 from .ActionTabBase      import ActionTabBase         # base class
 from .NumpyRadolanAdder  import NumpyRadolanAdder
+from .PrefixSumIndex     import PrefixSumIndex
 from .GDALProcessing     import GDALProcessing
 from .LayerLoader        import LayerLoader
 
@@ -235,42 +236,74 @@ class ActionTabRADOLANAdder(ActionTabBase):
         # Try to catch every Exception and show it in a graphical window.
         
         df = '%Y%m%d%H%M'
-        fn = f"{self._prod_id}_{dt_beg.strftime(df)}-{dt_end.strftime(df)}.asc"
-        asc_filename_path = self._model.temp_dir / fn
+        sum_name = f"{self._prod_id}_{dt_beg.strftime(df)}-{dt_end.strftime(df)}"
 
-        # for performance reason disable output for many files:
-        saved_stdout = sys.stdout
-        saved_stderr = sys.stderr
-        self.out("disable output for performance reasons, add files...")
-        f_devnull = open(os.devnull, 'w')
-        sys.stdout = f_devnull
-        sys.stderr = sys.stdout  # redirect both
+        # everything from the GUI is taken here, because the adding runs in the background.
+        """ Finding the content of current item in combo box:
+        Laborious over index, because otherwise the value of combo box would
+        EPSG 3035: ETRS89 / LAEA Europe instead of
+        EPSG:3035 """
+        index = dock.cbbox_projections.currentIndex()
+        prj_dest = self._model.projections[index]
+        data_path = self.tf_path
+        prod_id = self._prod_id
+        # optional, not for class and dBZ products:
+        index_dir = self._model.prefix_index_dir(prod_id, data_path) if prod_id not in ('HG', 'WN', 'RD') else None
+
+        # computed here, the Model isn't changed from the worker thread:
+        tif_filename_path = self._model.data_root / "sum" / (sum_name + '.tif')
+
+        def work(task):
+            # runs in a worker thread: for performance reason no output for many files,
+            # but by 'quiet' - not by redirecting the global 'sys.stdout'
 
-        try:
             # no cleaning temp, so we can check the temp result after running:
             self._model.create_storage_folder_structure(use_temp_dir=True)
-            adder = NumpyRadolanAdder(dt_beg, dt_end, self.tf_path, self._prod_id, asc_filename_path)
+            # decode several files at once, but leave some cores for QGIS:
+            workers = min(4, os.cpu_count() or 1)
+            # no ASCII file - the sum goes to GDAL directly:
+            adder = NumpyRadolanAdder(dt_beg, dt_end, data_path, prod_id, None,
+                                      workers=workers)
+            adder.quiet = True
+
+            def progress(done, total):
+                task.setProgress(100.0 * done / total)
+                return not task.isCanceled()    # stop between files
+            adder.progress_callback = progress
+            if index_dir:
+                adder.prefix_index = PrefixSumIndex(index_dir, quiet=True)
+
             adder.run()
-        except Exception as e:
-            super()._show_critical_message_box(str(e))
-            return
-        finally:
-            f_devnull.close()
-            sys.stderr = saved_stderr
-            sys.stdout = saved_stdout
-            self.out("output channels restored")
-        
-        """
-        From here is related to GIS layer loading
-        """
-        
-        # at GDAL processing a lot of strange errors are possible - with projection parameters and GDAL versions...
-        try:
-            tif_file = self.__convert_asc_tif(asc_filename_path, mask_file)
-        except Exception as e:
-            super()._show_critical_message_box(str(e), 'GDAL processing error')
-            return
-        
+
+            if adder.canceled:
+                return None
+
+            # at GDAL processing a lot of strange errors are possible - with projection parameters and GDAL versions...
+            try:
+                tif_file = self.__convert_sum_tif(adder, tif_filename_path, prj_dest, mask_file)
+            except Exception as e:
+                raise RuntimeError(f"GDAL processing error: {e}") from e
+
+            return adder, tif_file
+
+        def on_finished(result, exception):
+            dock.btn_run_adder.setEnabled(True)    # re-activate
+            if exception:
+                self._show_critical_message_box(str(exception))
+                return
+            if result is None:
+                self.out("canceled", False)
+                return
+            self._model.set_data_dir("sum")    # main thread
+            self._load_sum(*result, sum_name)
+
+        super()._run_task(f"radolan2map: add {self._prod_id} files", work, on_finished)
+
+    def _load_sum(self, adder, tif_file, sum_name):
+        """ main thread: insert the layer, fill statistics """
+
+        dock = self.dock    # shorten
+
         """
         If no project file not loaded when running plugin
         """
@@ -301,8 +334,6 @@ class ActionTabRADOLANAdder(ActionTabBase):
 
         ll.load_raster(tif_file, qml_file, temporal=False)
 
-        dock.btn_run_adder.setEnabled(True)    # re-activate
-
         dim, _max, _min, mean, total, valid, nonvalid = adder.get_statistics()
         
         s_max = str(_max)
@@ -311,7 +342,7 @@ class ActionTabRADOLANAdder(ActionTabBase):
         if len(l_max[1]) > 2:
             s_max = f"{_max:.1f}"
         
-        dock.text_filename.setText(asc_filename_path.stem)
+        dock.text_filename.setText(sum_name)
         dock.text_shape.setText(dim)
         dock.text_max.setText(s_max)
         dock.text_min.setText(str(_min))
@@ -325,19 +356,16 @@ class ActionTabRADOLANAdder(ActionTabBase):
 
         super()._load_print_layout(ll.layer_name, prod_id='Sum')    # dt=None
     
-    def __convert_asc_tif(self, asc_filename_path, mask_file=None):
+    def __convert_sum_tif(self, adder, tif_filename_path, prj_dest, mask_file=None):
         """raise Exception
         At GDAL processing a lot of strange errors are possible - with projection parameters and GDAL versions...
+        Runs in the worker thread: only reads the Model.
         """
         model = self._model    # shorten
         
-        model.set_data_dir("sum")
-        model.create_storage_folder_structure()
-        
-        tif_bn = asc_filename_path.name.replace('.asc', '.tif')    # tif basename
-        tif_filename_path = model.data_dir / tif_bn
+        tif_filename_path.parent.mkdir(parents=True, exist_ok=True)
 
-        gdal_processing = GDALProcessing(model, asc_filename_path, tif_filename_path)
+        gdal_processing = GDALProcessing(model, None, tif_filename_path)
         #gdal_processing.produce_warped_tif_using_script()
 
         #l_elems = self.dock.cbbox_projections.currentText().split()    # EPSG:3035 ETRS89 / LAEA Europe
@@ -345,16 +373,10 @@ class ActionTabRADOLANAdder(ActionTabBase):
         #if epsg_code == '-':    # RADOLAN
         #    epsg_code = model.projection_radolan    # complete RADOLAN projection parameters
         prj_src = model.projection_radolan
-        """ Finding the content of current item in combo box:
-        Laborious over index, because otherwise the value of combo box would
-        EPSG 3035: ETRS89 / LAEA Europe instead of
-        EPSG:3035 """
-        index = self.dock.cbbox_projections.currentIndex()
-        prj_dest = model.projections[index]
-        #prj_dest_test = self.dock.cbbox_projections.currentText()
-        #self.out("projection (currentText): {}".format(prj_dest_test))
         
-        gdal_processing.produce_warped_tif_by_python_gdal(prj_src, prj_dest, shapefile=mask_file)    # Exception
+        gdal_processing.produce_warped_tif_from_array(adder.sum_field, adder.precision, prj_src, prj_dest,
+                                                      shapefile=mask_file,
+                                                      profile=model.output_profile('precipitation'))    # Exception
         
         return gdal_processing.tif_file
 
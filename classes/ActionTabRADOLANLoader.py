@@ -8,9 +8,8 @@ from qgis.PyQt.QtWidgets import QFileDialog, QMessageBox, QAction
 
 # own classes:
 from .ActionTabBase      import ActionTabBase         # base class
-from .NumpyRadolanReader import NumpyRadolanReader    # Input: read RADOLAN binary file
-from .ASCIIGridWriter    import ASCIIGridWriter       # Output 1: write ESRI ASCII Grid
-from .GDALProcessing     import GDALProcessing        # Output 2: write GeoTIFF
+from .NumpyRadolanReader import read_header_only      # only the metadata
+from .ParallelConverter  import ParallelConverter, ConvertJob    # read, warp, write GeoTIFF
 #from .Model import test_product_get_id    # import a function
 from .LayerLoader        import LayerLoader
 
@@ -287,13 +286,7 @@ class ActionTabRADOLANLoader(ActionTabBase):
         self._files_to_process = [file]
 
         # Test product, if it is a 'X'-product (RX, WX, EX) with values coded as RVP6-units:
-        try:
-            nrr = NumpyRadolanReader(file)  # FileNotFoundError
-        except (FileNotFoundError, IOError):
-            raise
-
-        nrr._read_radolan_composite(loaddata=False)    # only read the metadata
-        prod_id = nrr.prod_id
+        prod_id = read_header_only(file)['producttype']    # FileNotFoundError, IOError
         
         is_rx = True if prod_id[1] == 'X'  else False
         """ Further string tests on product id don't make sense,
@@ -381,7 +374,7 @@ class ActionTabRADOLANLoader(ActionTabBase):
                 return
             shape_file = self.mask_file
 
-        # define name of (clipped) TIFF file (based on .asc filename):
+        # define name of (clipped) TIFF file (based on RADOLAN file name):
         tif_extension = '_clipped.tif' if clip_to_mask else '.tif'
 
         """
@@ -422,42 +415,56 @@ class ActionTabRADOLANLoader(ActionTabBase):
             temp_dir.mkdir(parents=True)  # mode=0o777, exist_ok=True
             self.out(f"temp dir created: {temp_dir}")
 
-        # for performance reason disable convert action output in case of many files:
-        f_devnull = None
-        saved_stdout = sys.stdout
-        saved_stderr = sys.stderr
-        if self.multi_selected_files:
-            self.out("disable output for performance reasons due to many files")
-            f_devnull = open(os.devnull, 'w')
-            sys.stdout = f_devnull
-            sys.stderr = sys.stdout  # redirect both
+        # read -> decode -> warp -> GeoTIFF in the background (QGIS task manager),
+        # multiple files additionally in worker processes:
+        l_jobs = self._create_convert_jobs(tif_extension, shape_file)
+        workers = 1 if single_selection else model.workers
+
+        def work(task):
+            # runs in a worker thread: no redirection of the global 'sys.stdout' here,
+            # the jobs are 'quiet' for many files instead
+            l_results = []
+            results = ParallelConverter(workers).run(l_jobs)
+            try:
+                for result in results:
+                    l_results.append(result)
+                    task.setProgress(100.0 * len(l_results) / len(l_jobs))
+                    if task.isCanceled():  # stop between files
+                        return None
+            finally:
+                results.close()  # drops files not started yet
+
+            return l_results
+
+        def on_finished(l_results, exception):
+            if exception:
+                self._show_critical_message_box(str(exception), 'Problem converting RADOLAN files')
+                return
+            if l_results is None:
+                self.out("canceled", False)
+                return
+            self._load_converted_files(l_results, ll, qml_file_specified, single_selection)
+
+        super()._run_task(f"radolan2map: convert {len(l_jobs)} RADOLAN file(s)", work, on_finished)
+
+    def _load_converted_files(self, l_results, ll, qml_file_specified, single_selection):
+        """ main thread: insert the layers, fill statistics """
 
         list_of_files_and_qml = []
-        nrr = None
-        # process (every) file
-        for f in self._files_to_process:
-            tif_file, qml_file, _nrr = self._convert_file_get_tif_with_qml(
-                f, tif_extension, shape_file, qml_file_specified)
-            if single_selection:
-                ll.load_raster(tif_file, qml_file)
-                nrr = _nrr
-            else:
-                list_of_files_and_qml.append((tif_file, qml_file))  # tuple connected unit file+qml
-                # only the first reader is enough:
-                if not nrr:
-                    nrr = _nrr
-        # for, f
-
-        if f_devnull:  # restore channels
-            f_devnull.close()
-            sys.stderr = saved_stderr
-            sys.stdout = saved_stdout
-            self.out("output channels restored")
+        for result in l_results:
+            qml_file = qml_file_specified or self._determine_qml_file(
+                result.prod_id, result.interval, result.rx_in_mm, result.is_polara)
+            list_of_files_and_qml.append((result.tif_file, qml_file))  # tuple connected unit file+qml
+
+        first = l_results[0]  # only the first file is enough for names
 
         self.dock.set_statistics_tab_visible(single_selection)
 
         if single_selection:  # set info
-            filename, dim, _max, _min, mean, total, valid, nonvalid = nrr.get_statistics()
+            tif_file, qml_file = list_of_files_and_qml[0]
+            ll.load_raster(tif_file, qml_file)
+
+            filename, dim, _max, _min, mean, total, valid, nonvalid = first.statistics
             s_max = str(_max)
             if _max is not None:  # 'HG'-product
                 # if part after point is too long:
@@ -479,7 +486,7 @@ class ActionTabRADOLANLoader(ActionTabBase):
         # insert layers in layer group:
         else:
             # ascending order of file list, if files selected randomly
-            ll.create_and_load_layer_group(f"{nrr.datetime:%Y-%m-%d}",
+            ll.create_and_load_layer_group(f"{first.datetime:%Y-%m-%d}",
                                            sorted(list_of_files_and_qml))
 
         #self.dock.button_box.button(QDialogButtonBox.Apply).setEnabled(False)
@@ -494,109 +501,42 @@ class ActionTabRADOLANLoader(ActionTabBase):
         super()._finish()
 
         if single_selection:
-            super()._load_print_layout(ll.layer_name, nrr.prod_id, nrr.datetime)
+            super()._load_print_layout(ll.layer_name, first.prod_id, first.datetime)
         else:
             self._clean_combobox_from_multiselect_entry()  # remove tmp. hint string
 
-    def _convert_file_get_tif_with_qml(self, radolan_file, tif_extension, shape_file, qml_file=None):
-        model = self._model  # shorten
+    def _determine_qml_file(self, prod_id, interval, rx_in_mm, is_polara):
+        """ prepared QML file delivered with the plugin """
 
-        # possibly Exception (from NumpyRadolanReader)
-        try:
-            nrr, asc_filename_path = self.__read_radolan_create_ascii_file(radolan_file)
-        except Exception as e:  # catch everything
-            super()._show_critical_message_box(str(e), 'Problem reading RADOLAN bin file occured')
-            return
-
-        # bring some order in possible radar data types (finished .tif will be saved there):
-        if nrr.is_radklim:
-            subdir_name = 'radklim'
-        elif nrr.is_polara:
-            subdir_name = 'polara'
-        else:
-            subdir_name = 'radolan'
-
-        model.set_data_dir(subdir_name)
-        data_dir = model.data_dir
-        data_dir.mkdir(parents=True, exist_ok=True)  # mode=0o777
-
-        tif_bn = asc_filename_path.name.replace(".asc", tif_extension)  # tif basename
+        # check now, if special product - product in RVP6 units:
+        if prod_id[1] == 'X' and not rx_in_mm:  # if values still in RVP6 units
+            interval = -1
 
-        full_tif_filename = data_dir / tif_bn
+        prod_id = prod_id if is_polara else None  # use special QML for "HG"/"WN" composite
 
-        prj_src = self._model.projection_polara_wgs if nrr.is_polara else self._model.projection_radolan
-
-        # at GDAL processing a lot of strange errors are possible - with projection parameters and GDAL versions...
-        try:
-            self.__create_tif_file(asc_filename_path, full_tif_filename, prj_src, shape_file)
-        except Exception as e:
-            super()._show_critical_message_box(str(e), 'GDAL processing error')
-            return
-
-        # Determine prepared QML file delivered with the plugin:
-        if not qml_file:
-            # check now, if special product - product in RVP6 units:
-            if nrr.prod_id[1] == 'X' and not nrr.rx_in_mm:  # if values still in RVP6 units
-                interval = -1
-            else:
-                interval = nrr.interval  # default
-            # if else
+        return self._model.qml_file(interval, prod_id)
 
-            prod_id = nrr.prod_id if nrr.is_polara else None  # use special QML for "HG"/"WN" composite
-
-            qml_file = model.qml_file(interval, prod_id)
-        # if not qml
-
-        return full_tif_filename, qml_file, nrr
-
-    def __read_radolan_create_ascii_file(self, radolan_file):
-        """ raise Exception """
-        
-        self.out(f"__read_radolan_create_ascii_file('{radolan_file}')")
-        
-        #exclude_zeroes = self.dock.check_excl_zeroes.isChecked()
-        #self._ascii_converter = RadolanBin2AsciiConverter(input_file, model.temp_dir, exclude_zeroes)
-        # -> now better with layer renderer - conserves 0 values
-        
-        # init. reader:
-        nrr = NumpyRadolanReader(radolan_file)    # FileNotFoundError
-        #nrr.exclude_zeroes = exclude_zeroes
-        
-        # RX to mm?
-        if self.dock.check_rvp6tomm.isVisible()  and  self.dock.check_rvp6tomm.isChecked():
-            nrr.rx_in_mm = True
-        
+    def _create_convert_jobs(self, tif_extension, shape_file):
         """
-        Read bin file
+        ConvertJob for every file of '_files_to_process' (see ParallelConverter);
+        everything from the GUI is taken here, because the jobs run in the background
         """
-        nrr.read()    # Exception
 
-        """
-        create ASCII file
-        """
-        asc_file_bn = nrr.simple_name + ".asc"
-        asc_filename_path = self._model.temp_dir / asc_file_bn    # produced in temp. dir
-
-        # needed for adjusted NODATA value (-1 isn't suitable for negative dBZ):
-        nodata_value = -50.0 if nrr.is_dbz else None
+        model = self._model  # shorten
 
-        ascii_writer = ASCIIGridWriter(nrr.data, nrr.precision, asc_filename_path, nodata_value)
-        ascii_writer.write()
+        index = self.dock.cbbox_projections.currentIndex()
+        prj_dest = model.projections[index]
 
-        return nrr, asc_filename_path
+        # RX to mm?
+        rx_in_mm = self.dock.check_rvp6tomm.isVisible() and self.dock.check_rvp6tomm.isChecked()
 
-    def __create_tif_file(self, asc_file, tif_file, prj_src, shape_file=None):
-        """ Parameters for 'GDALProcessing'
-        raise Exception """
+        # for performance reason no reader output in case of many files:
+        quiet = self.multi_selected_files
 
-        index = self.dock.cbbox_projections.currentIndex()
-        prj_dest = self._model.projections[index]
-        
-        gdal_processing = GDALProcessing(self._model, asc_file, tif_file)
-        #gdal_processing.produce_warped_tif_using_script()
-        
-        # at GDAL processing a lot of strange errors are possible - with projection parameters and GDAL versions...
-        gdal_processing.produce_warped_tif_by_python_gdal(prj_src, prj_dest, shape_file)
+        return [ConvertJob(str(f), str(model.data_root), tif_extension,
+                           model.projection_radolan, model.projection_polara_wgs, prj_dest,
+                           shape_file, rx_in_mm, str(model.warp_cache_dir), model.output_profiles, quiet)
+                for f in self._files_to_process]
 
     def _clean_combobox_from_multiselect_entry(self):
         combo = self.dock.cbbox_radolan  # shorten
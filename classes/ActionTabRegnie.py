@@ -16,6 +16,11 @@ from .LayerLoader    import LayerLoader
 from .Regnie         import Regnie
 from . import regnie2raster as r2r
 
+
+class RasterConversionError(Exception):
+    """ error of the raster conversion (GDAL, I/O) - not of the REGNIE file format """
+
+
 class ActionTabRegnie(ActionTabBase):
     '''
     classdocs
@@ -82,16 +87,21 @@ class ActionTabRegnie(ActionTabBase):
         self._model.set_data_dir('regnie')
         data_dir = self._model.data_dir
         
-        try:  # include everything that can raise exceptions
+        def work(task):
+            """ background thread: read and convert """
             try:
                 self._model.create_storage_folder_structure()
                 self.out(f"create data dir for converted REGNIE: '{data_dir}'")
             except FileExistsError:
                 pass
-                
+            
             # instantiate a Regnie class instance
             rg = Regnie(regnie_file)
             self.out(f"Detected REGNIE datatype: {rg.datatype}")
+            task.setProgress(50)
+            
+            if task.isCanceled():
+                return None
             
             # convert to raster
             self.out("Starting REGNIE to raster conversion...")
@@ -99,30 +109,49 @@ class ActionTabRegnie(ActionTabBase):
             try:
                 #TODO: this currently reads the REGNIE file a second time
                 r2r.regnie2raster(regnie_file, regnie_raster_file)
-            except ModuleNotFoundError as e:
+            except ModuleNotFoundError:
+                raise
+            except Exception as e:
+                raise RasterConversionError(e) from e
+            task.setProgress(100)
+            
+            self.out(f"Successfully created REGNIE raster file {regnie_raster_file}!")
+            
+            return rg, regnie_raster_file
+        
+        def on_finished(result, exception):
+            if isinstance(exception, ModuleNotFoundError):
                 """ Under Linux a "ModuleNotFoundError: No module named '_gdal'"
                 error can occur. """
-                msg = f"Exception: {e}:\nPossibly a GDAL installation error on Linux(?)"
+                msg = f"Exception: {exception}:\nPossibly a GDAL installation error on Linux(?)"
                 self.out(f"{msg}")
-                super()._show_critical_message_box(msg, 'REGNIE raster conversion error')
+                self._show_critical_message_box(msg, 'REGNIE raster conversion error')
                 return
-            except Exception as e:
-                msg = f"Exception: {e}"
+            if isinstance(exception, RasterConversionError):
+                # the file is ok, so the button stays active:
+                msg = f"Exception: {exception}"
                 self.out(f"{msg}")
-                super()._show_critical_message_box(msg, 'REGNIE raster conversion error')
+                self._show_critical_message_box(msg, 'REGNIE raster conversion error')
                 return
-            
-            self.out(f"Successfully created REGNIE raster file {regnie_raster_file}!")
-            
-        except Exception as e:
-            msg = f"{e}, wrong format!"
-            super()._show_critical_message_box(msg, 'Layer loading error')  # disable here, because it was only set a folder
-            dock.btn_load_regnie.setEnabled(False)
-            # Reset - don't save the wrong data for the next run!:
-            #dock.text_regnie.clear()
-            #self.regnie_file = str(regnie_file.parent)    # nevertheless save last path for next suggestion
-            return
+            if exception:
+                msg = f"{exception}, wrong format!"
+                self._show_critical_message_box(msg, 'Layer loading error')  # disable here, because it was only set a folder
+                dock.btn_load_regnie.setEnabled(False)
+                # Reset - don't save the wrong data for the next run!:
+                #dock.text_regnie.clear()
+                #self.regnie_file = str(regnie_file.parent)    # nevertheless save last path for next suggestion
+                return
+            if result is None:
+                self.out("canceled", False)
+                return
+            self._load_regnie_raster(*result, regnie_file)
+        
+        super()._run_task(f"radolan2map: convert REGNIE file '{regnie_file.name}'", work, on_finished)
+    
+    def _load_regnie_raster(self, rg, regnie_raster_file, regnie_file):
+        """ main thread: insert the layer, fill statistics """
         
+        dock = self.dock    # shorten
         
         """
         Add the layers ...
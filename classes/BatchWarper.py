@@ -0,0 +1,338 @@
+import sys
+import os
+import hashlib
+from pathlib import Path
+from collections import OrderedDict
+
+import numpy as np
+from osgeo import gdal
+
+from .ASCIIGridWriter import default_nodata_value
+from .radolan2raster  import geotransform, prepare_array, srs_wkt, write_array
+
+gdal.UseExceptions()  # Enable exceptions
+
+
+NO_INDEX = -1    # output pixel without source pixel
+
+MAX_CACHED_GEOMETRIES = 8
+_geometry_cache = OrderedDict()    # (shape, prj_src, prj_dest) -> WarpGeometry
+_clip_mask_cache = OrderedDict()   # (shape, prj_src, prj_dest, mask file, mtime) -> ClipMask
+
+
+class WarpGeometry:
+    """
+    Result of warping the pixel indices of a RADOLAN grid once:
+    for every output pixel the flat index of the source pixel (or NO_INDEX)
+    """
+
+    def __init__(self, index, geotransform, projection):
+        self.index = index                  # 2D int32, GDAL order (first row north)
+        self.geotransform = geotransform    # of the output grid
+        self.projection = projection        # WKT of the output grid
+
+    @property
+    def shape(self):
+        return self.index.shape
+
+    def save(self, npz_file, prj_src, prj_dest):
+        """ stores the geometry with the projection strings it was computed for """
+
+        npz_file = Path(npz_file)
+        npz_file.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_file = npz_file.with_name(npz_file.name + f".{os.getpid()}.tmp")
+        with tmp_file.open('wb') as f:    # file object: np.savez doesn't append '.npz'
+            np.savez_compressed(f, index=self.index, geotransform=np.array(self.geotransform),
+                                projection=self.projection, prj_src=prj_src, prj_dest=prj_dest,
+                                gdal_version=gdal.__version__)
+        tmp_file.replace(npz_file)    # atomic, no half written cache file
+
+    @classmethod
+    def load(cls, npz_file, prj_src, prj_dest):
+        """
+        :return: WarpGeometry or None, if the file doesn't exist or is stale
+                 (computed for other projection strings or another GDAL version)
+        """
+
+        try:
+            with np.load(npz_file) as npz:
+                if (str(npz['prj_src']) != prj_src or str(npz['prj_dest']) != prj_dest
+                        or str(npz['gdal_version']) != gdal.__version__):
+                    return None
+                return cls(npz['index'], tuple(npz['geotransform'].tolist()), str(npz['projection']))
+        except (OSError, KeyError, ValueError):    # not existing or damaged
+            return None
+
+
+def compute_warp_geometry(shape, prj_src, prj_dest):
+    """
+    Warps an Int32 raster holding the flat pixel index of a RADOLAN grid with
+    nearest neighbour, the resampling gdal.Warp uses by default. So every output
+    pixel knows its source pixel and each file can be warped by fancy indexing.
+
+    :param shape: (nrows, ncols) of the RADOLAN grid
+    :return: WarpGeometry
+    """
+
+    nrows, ncols = shape
+
+    # index in the order of the flattened RADOLAN array (first row south):
+    index = np.arange(nrows * ncols, dtype=np.int32).reshape(shape)
+
+    ds_in = gdal.GetDriverByName('MEM').Create('', ncols, nrows, 1, gdal.GDT_Int32)
+    ds_in.SetGeoTransform(geotransform(shape))
+    ds_in.SetProjection(srs_wkt(prj_src))
+    band = ds_in.GetRasterBand(1)
+    band.SetNoDataValue(NO_INDEX)
+    band.WriteArray(np.flipud(index))    # GDAL: first row is the northern row
+
+    ds_out = gdal.Warp('', ds_in, format='MEM', srcSRS=prj_src, dstSRS=prj_dest, resampleAlg='near')
+
+    geometry = WarpGeometry(ds_out.GetRasterBand(1).ReadAsArray().astype(np.int32),
+                            ds_out.GetGeoTransform(), ds_out.GetProjection())
+    ds_in = ds_out = None
+    return geometry
+
+
+class ClipMask:
+    """
+    Mask file rasterized on the output grid of a WarpGeometry:
+    crop window (row0, row1, col0, col1) around the mask and the
+    boolean mask inside this window
+    """
+
+    def __init__(self, mask, window):
+        self.mask = mask        # 2D bool, shape of the window
+        self.window = window    # row0, row1, col0, col1 (slices: end exclusive)
+
+    def crop_geotransform(self, geotransform):
+        """ geotransform of the window """
+        row0, _, col0, _ = self.window
+        x0, dx, rx, y0, ry, dy = geotransform
+        return (x0 + col0 * dx + row0 * rx, dx, rx, y0 + col0 * ry + row0 * dy, ry, dy)
+
+    def save(self, npz_file, mask_file, mtime, geometry):
+        """ stores the mask with the mask file and the output grid (WarpGeometry) it was rasterized for """
+
+        npz_file = Path(npz_file)
+        npz_file.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_file = npz_file.with_name(npz_file.name + f".{os.getpid()}.tmp")
+        with tmp_file.open('wb') as f:
+            np.savez_compressed(f, mask=self.mask, window=np.array(self.window),
+                                mask_file=str(mask_file), mtime=mtime,
+                                shape=np.array(geometry.shape), geotransform=np.array(geometry.geotransform),
+                                gdal_version=gdal.__version__)
+        tmp_file.replace(npz_file)
+
+    @classmethod
+    def load(cls, npz_file, mask_file, mtime, geometry):
+        """
+        :return: ClipMask or None, if not existing or stale (the mask file has changed since,
+                 another output grid or another GDAL version)
+        """
+
+        try:
+            with np.load(npz_file) as npz:
+                if (str(npz['mask_file']) != str(mask_file) or int(npz['mtime']) != mtime
+                        or tuple(npz['shape'].tolist()) != tuple(geometry.shape)
+                        or tuple(npz['geotransform'].tolist()) != tuple(geometry.geotransform)
+                        or str(npz['gdal_version']) != gdal.__version__):
+                    return None
+                return cls(npz['mask'], tuple(npz['window'].tolist()))
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def compute_clip_mask(geometry, mask_file):
+    """
+    Rasterizes a mask (e.g. shape file) on the output grid of 'geometry',
+    like the cutline of gdal.Warp: pixels with their center inside
+
+    :return: ClipMask
+    """
+
+    # gdal.Rasterize doesn't reproject, so bring the mask into the output projection first:
+    ds_vec = gdal.VectorTranslate('', str(mask_file), format='Memory',
+                                  dstSRS=geometry.projection, reproject=True)
+
+    nrows, ncols = geometry.shape
+    ds = gdal.GetDriverByName('MEM').Create('', ncols, nrows, 1, gdal.GDT_Byte)
+    ds.SetGeoTransform(geometry.geotransform)
+    ds.SetProjection(geometry.projection)
+    gdal.Rasterize(ds, ds_vec, burnValues=[1])
+
+    mask = ds.GetRasterBand(1).ReadAsArray().astype(bool)
+    ds = ds_vec = None
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+
+    if not rows.size:
+        raise ValueError(f"mask '{mask_file}' doesn't overlap the RADOLAN grid")
+
+    window = (int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1)
+    row0, row1, col0, col1 = window
+
+    return ClipMask(mask[row0:row1, col0:col1].copy(), window)
+
+
+class BatchWarper:
+    """BatchWarper
+
+    Warps many RADOLAN arrays of the same grid into GeoTIFF files.
+    The warp geometry is computed once per (grid shape, source projection,
+    target projection) and kept in memory, every further file is only a
+    NumPy fancy indexing operation instead of a full gdal.Warp.
+    With 'cache_dir' the geometries are stored as lookup tables on disk
+    and survive the QGIS session.
+    A clip mask is rasterized once per (mask file and its modification time,
+    grid, projection) and applied as a boolean array with a crop window.
+    """
+
+    def __init__(self, prj_dest, profile=None, cache_dir=None, mask_file=None):
+        """
+        :param prj_dest: target projection, e.g. 'EPSG:3035'
+        :param profile: OutputProfile of the GeoTIFF files, default: COG with DEFLATE
+        :param cache_dir: directory for the lookup tables (.npz), optional
+        :param mask_file: clip the results to this mask (e.g. shape file), optional
+        """
+
+        self._prj_dest = prj_dest
+        self._mask_file = Path(mask_file) if mask_file else None
+        self._profile = profile
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    def geometry(self, shape, prj_src):
+        """ cached WarpGeometry for the grid 'shape' in projection 'prj_src' """
+
+        key = (tuple(shape), prj_src, self._prj_dest)
+
+        try:
+            _geometry_cache.move_to_end(key)
+            return _geometry_cache[key]
+        except KeyError:
+            pass
+
+        geometry = None
+        npz_file = self._cache_file(shape, prj_src)
+
+        if npz_file:
+            geometry = WarpGeometry.load(npz_file, prj_src, self._prj_dest)
+
+        if not geometry:
+            self.out(f"compute warp geometry for {shape[0]}x{shape[1]} -> '{self._prj_dest}'")
+            geometry = compute_warp_geometry(shape, prj_src, self._prj_dest)
+
+            if npz_file:
+                try:
+                    geometry.save(npz_file, prj_src, self._prj_dest)
+                except OSError as e:    # no cache is no error
+                    self.out(f"warp geometry not cached: {e}", False)
+
+        _geometry_cache[key] = geometry
+        if len(_geometry_cache) > MAX_CACHED_GEOMETRIES:
+            _geometry_cache.popitem(last=False)    # least recently used
+
+        return geometry
+
+    def clip_mask(self, shape, prj_src):
+        """ cached ClipMask of 'mask_file' for the grid 'shape' in projection 'prj_src' """
+
+        mtime = self._mask_file.stat().st_mtime_ns    # FileNotFoundError
+        key = (tuple(shape), prj_src, self._prj_dest, str(self._mask_file), mtime)
+
+        try:
+            _clip_mask_cache.move_to_end(key)
+            return _clip_mask_cache[key]
+        except KeyError:
+            pass
+
+        clip = None
+        geometry = self.geometry(shape, prj_src)
+        npz_file = self._cache_file(shape, prj_src, prefix='mask', extra=str(self._mask_file))
+
+        if npz_file:
+            clip = ClipMask.load(npz_file, self._mask_file, mtime, geometry)
+
+        if not clip:
+            self.out(f"rasterize mask '{self._mask_file}'")
+            clip = compute_clip_mask(geometry, self._mask_file)
+
+            if npz_file:
+                try:
+                    clip.save(npz_file, self._mask_file, mtime, geometry)
+                except OSError as e:
+                    self.out(f"clip mask not cached: {e}", False)
+
+        _clip_mask_cache[key] = clip
+        if len(_clip_mask_cache) > MAX_CACHED_GEOMETRIES:
+            _clip_mask_cache.popitem(last=False)
+
+        return clip
+
+    def _cache_file(self, shape, prj_src, prefix='warp', extra=''):
+        """ e.g. <cache_dir>/warp_900x900_<hash of projections>.npz """
+
+        if not self._cache_dir:
+            return None
+
+        prj_hash = hashlib.sha1(f"{prj_src}|{self._prj_dest}|{extra}".encode()).hexdigest()[:12]
+        return self._cache_dir / f"{prefix}_{shape[0]}x{shape[1]}_{prj_hash}.npz"
+
+    def warp_array(self, np_2Ddata, precision, prj_src, nodata_value=None):
+        """
+        :return: (warped Float32 array in GDAL order, its geotransform, its projection as WKT)
+        """
+
+        if nodata_value is None:
+            nodata_value = default_nodata_value
+
+        geometry = self.geometry(np_2Ddata.shape, prj_src)
+        index = geometry.index
+        geotransform = geometry.geotransform
+
+        if self._mask_file:
+            clip = self.clip_mask(np_2Ddata.shape, prj_src)
+            row0, row1, col0, col1 = clip.window
+            index = index[row0:row1, col0:col1]
+            valid = (index != NO_INDEX) & clip.mask
+            geotransform = clip.crop_geotransform(geotransform)
+        else:
+            valid = index != NO_INDEX
+
+        data = prepare_array(np_2Ddata, precision, nodata_value).ravel()
+
+        warped = np.full(index.shape, nodata_value, dtype=np.float32)
+        warped[valid] = data[index[valid]]
+
+        return warped, geotransform, geometry.projection
+
+    def warp(self, np_2Ddata, precision, tif_file, prj_src, nodata_value=None, family='precipitation'):
+        """
+        Warps a RADOLAN array into a GeoTIFF file
+
+        :param np_2Ddata: float array with NaN as nodata, first row south
+        :param precision: 1.0, 0.1, 0.01
+        :param tif_file: output file
+        :param prj_src: source projection
+        :param nodata_value: e.g. -50.0 for dBZ products, default: -1.0
+        :param family: product family ('precipitation', 'class', 'dbz') - for the integer storage
+        """
+
+        if nodata_value is None:
+            nodata_value = default_nodata_value
+
+        warped, geotransform, projection = self.warp_array(np_2Ddata, precision, prj_src, nodata_value)
+
+        write_array(tif_file, warped, geotransform, projection, nodata_value, self._profile, precision, family)
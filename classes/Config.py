@@ -0,0 +1,111 @@
+"""
+Config
+
+Access to 'config.ini' without QGIS - used by 'Model' and by the headless
+tools (DirectoryWatcher), which run without QGIS.
+
+Created on 18.10.2026
+"""
+
+import os
+import sys
+from pathlib import Path
+from configparser import ConfigParser
+
+from .OutputProfile import OutputProfile, PRODUCT_FAMILIES, default_profile
+
+
+CONFIG_NAME = "config.ini"
+
+
+class Config:
+    """Config
+
+    The settings of 'config.ini' which don't need QGIS
+    """
+
+    def __init__(self, config_file=None):
+        """
+        :param config_file: default: 'config.ini' in the plugin dir
+        """
+
+        self._plugin_dir = Path(__file__).resolve().parent.parent    # classes/Config.py -> classes -> ..
+
+        config_file = Path(config_file) if config_file else self._plugin_dir / CONFIG_NAME
+
+        if not config_file.exists():
+            raise FileNotFoundError(f"Config file '{config_file}'")
+
+        self._config_file = config_file
+        self._parser = ConfigParser()
+        self._parser.read(config_file)
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    def output_profile(self, family):
+        """ OutputProfile of a product family ('precipitation', 'class', 'dbz'), section [Output] """
+
+        s = self._parser.get('Output', family, fallback=None)
+        if not s:
+            return default_profile
+
+        try:
+            return OutputProfile.from_string(s)
+        except ValueError as e:
+            self.out(f"[Output] {family}: {e} - using default", False)
+            return default_profile
+
+    @property
+    def output_profiles(self):
+        """ dict: product family -> OutputProfile """
+        return {family: self.output_profile(family) for family in PRODUCT_FAMILIES}
+
+    @property
+    def parser(self):
+        return self._parser
+
+    @property
+    def config_file(self):
+        return self._config_file
+
+    @property
+    def plugin_dir(self):
+        return self._plugin_dir
+
+    @property
+    def workers(self):
+        """ number of worker processes for converting many files; 0 (default): number of CPUs """
+        workers = self._parser.getint('Processing', 'workers', fallback=0)
+        return workers if workers > 0 else (os.cpu_count() or 1)
+
+    @property
+    def prefix_index(self):
+        """ sums by a PrefixSumIndex? """
+        return self._parser.getboolean('Processing', 'prefix_index', fallback=False)
+
+    @property
+    def data_root(self):
+        """
+        Data root for running without QGIS ([Paths] 'data_root');
+        None, if not set - QGIS takes it from the 'data_path.conf' in the profile dir
+        """
+        data_root = self._parser.get('Paths', 'data_root', fallback=None)
+        return Path(data_root).expanduser() if data_root else None
+
+    @property
+    def default_border_shape(self):
+        """ [Paths] 'CUT_TO'; None, if not found """
+        border_shape = self._plugin_dir / self._parser.get('Paths', 'CUT_TO')
+
+        if not border_shape.exists():
+            self.out(f"default shape mask '{border_shape}' not found!", False)
+            return None
+
+        return str(border_shape)
@@ -0,0 +1,394 @@
+"""
+DirectoryWatcher
+
+Headless conversion of new RADOLAN files: watches a directory (inotify on
+Linux, otherwise polling) and converts every new 'raa01-*---bin*', 'WN*'
+or 'HG*' file into a GeoTIFF under the data root - with the same job as the
+loader (ParallelConverter.convert_file) in a bounded pool of worker processes.
+
+- partial writes: a file is taken only when size and modification time
+  haven't changed for 'settle' seconds; a file that can't be read yet is
+  tried again when it changes
+- duplicates: a journal in '<data_root>/watcher' remembers the converted
+  files; the same file again or its compressed / uncompressed twin
+  (same name without .gz/.bz2) is skipped, a rewritten file is converted again
+
+Usage:
+    python3 -m classes.DirectoryWatcher /data/dwd/incoming --data-root /data/radolan2map
+
+Created on 18.10.2026
+"""
+
+import sys
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from fnmatch import fnmatch
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .ParallelConverter import convert_file, mp_context
+
+
+JOURNAL_NAME = 'processed.tsv'
+
+# DWD: raa01-rw_10000-1708020250-dwd---bin.gz, WN2212242200_000.bz2, HG2212101900_000
+FILE_PATTERNS = ('raa01-*---bin*', 'WN*', 'HG*')
+_COMPRESSION_SUFFIXES = ('.gz', '.bz2')
+_INCOMPLETE_SUFFIXES = ('.tmp', '.part', '.partial', '.filepart', '~', '.tar.bz2')
+
+
+def is_radar_file(name):
+    """ file name of a product which can be converted; not temporary files of a transfer """
+    if name.startswith('.') or name.endswith(_INCOMPLETE_SUFFIXES):
+        return False
+    return any(fnmatch(name, pattern) for pattern in FILE_PATTERNS)
+
+
+def canonical_name(name):
+    """ name without compression suffix: 'x---bin.gz' and 'x---bin' give the same GeoTIFF """
+    for suffix in _COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+class _Inotify:
+    """ inotify over ctypes: names of files closed after writing or moved into the directory """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO    = 0x00000080
+    IN_Q_OVERFLOW  = 0x00004000
+    IN_NONBLOCK    = 0o4000
+    IN_CLOEXEC     = 0o2000000
+
+    _EVENT = struct.Struct('iIII')    # wd, mask, cookie, len
+
+    def __init__(self, path):
+        """ raises OSError, if inotify isn't available """
+
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify only on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("no inotify in libc")
+
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(path), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch '{path}'")
+
+        self.overflow = False    # events lost: the directory has to be scanned
+
+    def read(self, timeout):
+        """ :return: list of file names; empty after 'timeout' seconds without event """
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        l_names = []
+        pos = 0
+        while pos < len(buf):
+            _, mask, _, length = self._EVENT.unpack_from(buf, pos)
+            pos += self._EVENT.size
+            if mask & self.IN_Q_OVERFLOW:
+                self.overflow = True
+            elif length:
+                l_names.append(os.fsdecode(buf[pos:pos + length].rstrip(b'\0')))
+            pos += length
+
+        return l_names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class DirectoryWatcher:
+    """DirectoryWatcher
+
+    watcher = DirectoryWatcher(incoming_dir, job)    # job: ConvertJob with radolan_file=None
+    watcher.run()         # until stop() or Ctrl+C
+
+    'job' determines data root, projections, clip mask, output profiles - like for the loader.
+    """
+
+    def __init__(self, watch_dir, job, workers=1, settle=2.0, poll_interval=5.0, use_inotify=True,
+                 convert=convert_file, callback=None):
+        """
+        :param watch_dir: directory of the incoming files (not recursive)
+        :param job: ConvertJob as template, 'radolan_file' is replaced
+        :param workers: worker processes; 1: one thread beside the watcher
+        :param settle: seconds without change of size and modification time, until a file is taken
+        :param poll_interval: seconds between the scans without inotify
+        :param use_inotify: False: always polling (e.g. network file systems)
+        :param convert: function job -> result, run in the pool; must be picklable for processes
+        :param callback: callable(file path, result) in the watcher after every conversion
+        """
+
+        self._watch_dir = Path(watch_dir)
+        self._job = job
+        self._workers = max(1, workers)
+        self._settle = settle
+        self._poll_interval = poll_interval
+        self._convert = convert
+        self._callback = callback
+
+        if not self._watch_dir.is_dir():
+            raise FileNotFoundError(f"watch dir '{self._watch_dir}'")
+
+        self._journal_file = Path(job.data_root) / 'watcher' / JOURNAL_NAME
+        self._done = self._load_journal()    # canonical name -> (name, size, mtime_ns)
+
+        self._candidates = {}    # name -> (size, mtime_ns, time of the last change)
+        self._failed = {}        # name -> (size, mtime_ns): not again until changed
+        self._running = {}       # future -> (name, size, mtime_ns)
+
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(self._watch_dir)
+            except OSError as e:
+                self.out(f"no inotify ({e}) - polling every {poll_interval} s")
+
+        self._executor = None
+        self._stop = False
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    # ........................................................
+
+    def run(self):
+        """ watches until stop(); files already in the directory are converted first """
+
+        self.out(f"watching '{self._watch_dir}' ({'inotify' if self._inotify else 'polling'}), "
+                 f"{self._workers} worker(s)")
+        self.scan()
+
+        try:
+            while not self._stop:
+                self.step(self._next_timeout())
+        except KeyboardInterrupt:
+            self.out("interrupted")
+        finally:
+            self.close()
+
+    def stop(self):
+        """ e.g. from a signal handler: run() ends after the current step """
+        self._stop = True
+
+    def step(self, timeout=0.0):
+        """ one cycle: wait up to 'timeout' for new files, submit settled files, collect results """
+
+        if self._inotify:
+            l_names = self._inotify.read(timeout)
+            if self._inotify.overflow:
+                self._inotify.overflow = False
+                self.scan()
+            for name in l_names:
+                self._notice(name)
+        else:
+            time.sleep(timeout)
+            self.scan()
+
+        self._recheck_candidates()
+        self._submit_settled()
+        self._collect(block=False)
+
+    def drain(self, timeout=60.0):
+        """ steps until nothing is waiting or running any more, e.g. for a single run by cron """
+
+        end = time.monotonic() + timeout
+        self.scan()
+
+        while self._candidates or self._running:
+            if time.monotonic() > end:
+                raise TimeoutError(f"{len(self._candidates) + len(self._running)} files not done")
+            self.step(min(self._settle / 4, 0.5))
+
+        self._collect(block=True)
+
+    def scan(self):
+        """ all files of the directory as candidates (start, polling, lost inotify events) """
+        with os.scandir(self._watch_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    self._notice(entry.name)
+
+    def close(self):
+        self._collect(block=True)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    # ........................................................
+
+    def _notice(self, name):
+        if not is_radar_file(name) or name in self._candidates:
+            return
+
+        stat = self._stat(name)
+        if not stat or self._is_done(name, *stat) or self._failed.get(name) == stat:
+            return
+
+        self._candidates[name] = (*stat, time.monotonic())
+
+    def _recheck_candidates(self):
+        """ a changed file starts waiting again; a removed one is forgotten """
+
+        now = time.monotonic()
+
+        for name, (size, mtime_ns, changed) in list(self._candidates.items()):
+            stat = self._stat(name)
+            if not stat:
+                del self._candidates[name]
+            elif stat != (size, mtime_ns):
+                self._candidates[name] = (*stat, now)
+
+    def _submit_settled(self):
+        now = time.monotonic()
+        in_flight = {canonical_name(name) for name, _, _ in self._running.values()}
+        max_running = 2 * self._workers    # bounded: the rest waits as candidate
+
+        for name, (size, mtime_ns, changed) in sorted(self._candidates.items()):
+            if len(self._running) >= max_running:
+                break
+            if now - changed < self._settle:
+                continue
+
+            canonical = canonical_name(name)
+            if canonical in in_flight:    # twin in conversion: decide after it
+                continue
+
+            del self._candidates[name]
+            if self._is_done(name, size, mtime_ns):
+                continue
+
+            job = self._job._replace(radolan_file=str(self._watch_dir / name))
+            future = self._pool().submit(self._convert, job)
+            self._running[future] = (name, size, mtime_ns)
+            in_flight.add(canonical)
+
+    def _collect(self, block):
+        for future in list(self._running):
+            if not block and not future.done():
+                continue
+
+            name, size, mtime_ns = self._running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # e.g. not complete yet: again, when the file changes
+                self.out(f"'{name}': {e}", False)
+                self._failed[name] = (size, mtime_ns)
+                continue
+
+            self._failed.pop(name, None)
+            self._mark_done(name, size, mtime_ns)
+            self.out(f"'{name}' converted")
+
+            if self._callback:
+                self._callback(self._watch_dir / name, result)
+
+    def _pool(self):
+        if not self._executor:
+            context = mp_context() if self._workers > 1 else None
+            if context:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, mp_context=context)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def _next_timeout(self):
+        """ wait for events, but not longer than a candidate needs to settle """
+        timeout = self._poll_interval
+        if self._candidates:
+            timeout = min(timeout, self._settle / 2)
+        if self._running:
+            timeout = min(timeout, 0.2)
+        return timeout
+
+    def _stat(self, name):
+        try:
+            st = (self._watch_dir / name).stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    # ........................................................
+
+    def _is_done(self, name, size, mtime_ns):
+        entry = self._done.get(canonical_name(name))
+        if not entry:
+            return False
+        done_name, done_size, done_mtime_ns = entry
+        # compressed / uncompressed twin or the same file once more:
+        return done_name != name or (done_size, done_mtime_ns) == (size, mtime_ns)
+
+    def _mark_done(self, name, size, mtime_ns):
+        self._done[canonical_name(name)] = (name, size, mtime_ns)
+
+        self._journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._journal_file.open('a') as f:
+            f.write(f"{name}\t{size}\t{mtime_ns}\n")
+
+    def _load_journal(self):
+        d_done = {}
+
+        if not self._journal_file.exists():
+            return d_done
+
+        with self._journal_file.open() as f:
+            for line in f:
+                try:
+                    name, size, mtime_ns = line.rstrip('\n').split('\t')
+                    d_done[canonical_name(name)] = (name, int(size), int(mtime_ns))
+                except ValueError:    # incomplete last line after a crash
+                    continue
+
+        return d_done
+
+    # ........................................................
+
+    @property
+    def watch_dir(self):
+        return self._watch_dir
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    @property
+    def journal_file(self):
+        return self._journal_file
+
+
+
+if __name__ == '__main__':
+    # the 'watch' command of the command line interface:
+    from .cli import main
+    sys.exit(main(['watch'] + sys.argv[1:]))
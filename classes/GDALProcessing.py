@@ -12,6 +12,9 @@ from qgis.PyQt.QtCore import QSettings
 
 from osgeo import gdal    #, osr    # install Paket: 'python3-gdal'
 
+from .BatchWarper    import BatchWarper       # array -> warped TIF with cached warp geometry
+from .radolan2raster import warp_dataset      # gdal.Warp with output profile, overviews
+
 gdal.UseExceptions()  # Enable exceptions
 
 #convert_script = 'radolanasc_to_laeatif.py'    # <- .asc file
@@ -22,6 +25,9 @@ class GDALProcessing:
     @author: Weatherman"""
     
     def __init__(self, model, full_asc_filename, full_tif_filename):
+        """
+        :param full_asc_filename: may be None, if 'produce_warped_tif_from_array()' is used
+        """
         
         self.out(f"<- model, '{full_asc_filename}', '{full_tif_filename}'")
 
@@ -33,7 +39,7 @@ class GDALProcessing:
             raise OSError("'model' is None!")
         
         self._model = model
-        self._full_asc_filename = Path(full_asc_filename)
+        self._full_asc_filename = Path(full_asc_filename) if full_asc_filename else None
         self._full_tif_filename = Path(full_tif_filename)
 
         #
@@ -62,8 +68,9 @@ class GDALProcessing:
         else:
             print(f"{self}: {s}", file=sys.stderr)
     
-    def produce_warped_tif_by_python_gdal(self, prj_src, prj_dest_epsg, shapefile=None):
-        """Convert by OSGEO python gdal module"""
+    def produce_warped_tif_by_python_gdal(self, prj_src, prj_dest_epsg, shapefile=None, profile=None):
+        """Convert by OSGEO python gdal module
+        :param profile: OutputProfile (format, compression), default: COG with DEFLATE"""
 
         self.out(f"produce_warped_tif_by_python_gdal('{prj_dest_epsg}', shapefile='{shapefile}')")
         
@@ -132,25 +139,26 @@ PROJCS["DWD (RADOLAN)",
         #gdal.Warp(tif_file, ds_in, srcSRS=proj4_params, dstSRS='EPSG:3035')
         
         self.out(f"gdal.Warp from '{prj_src}' -> '{prj_dest_epsg}'")
-        #compress_method = 'LZW'
-        compress_method = 'DEFLATE'    # lossless
-        
-        # from Config
-        
-        # with clipping:
-        if shapefile:
-            gdal.Warp(str(self._full_tif_filename), ds_in,
-                      cutlineDSName=f'{shapefile}', cropToCutline=True,
-                      srcSRS=prj_src, dstSRS=prj_dest_epsg,
-                      creationOptions=[f'COMPRESS={compress_method}'])
-        # without clipping:
-        else:
-            gdal.Warp(str(self._full_tif_filename), ds_in,
-                      srcSRS=prj_src, dstSRS=prj_dest_epsg,
-                      creationOptions=[f'COMPRESS={compress_method}'])
+        # format and compression from config, section [Output]:
+        warp_dataset(ds_in, self._full_tif_filename, prj_src, prj_dest_epsg, shapefile, profile)
 
         ds_in = None  # should one do that?
 
+    def produce_warped_tif_from_array(self, np_2Ddata, precision, prj_src, prj_dest_epsg, shapefile=None,
+                                      nodata_value=None, profile=None):
+        """
+        Convert by OSGEO python gdal module, directly from the data array
+        over a GDAL in-memory dataset, without ASCII grid intermediate.
+        The warp geometry and the rasterized mask are computed only once for a
+        grid and projection (BatchWarper) - important for loading many files.
+        :param profile: OutputProfile (format, compression), default: COG with DEFLATE
+        """
+
+        self.out(f"produce_warped_tif_from_array('{prj_dest_epsg}', shapefile='{shapefile}')")
+
+        warper = BatchWarper(prj_dest_epsg, profile, cache_dir=self._model.warp_cache_dir, mask_file=shapefile)
+        warper.warp(np_2Ddata, precision, self._full_tif_filename, prj_src, nodata_value)
+
     """
     following: old warp methods / scripts:
     """
@@ -4,6 +4,7 @@ import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 from PyQt5.QtCore import Qt
+from qgis.PyQt.QtXml import QDomDocument
 
 from qgis.core import (
     Qgis,
@@ -86,6 +87,12 @@ class LayerLoader:
         sys.stdout = f_devnull
         sys.stderr = sys.stdout  # redirect both
 
+        # Bulk mode: prepare all layers first, with one parsed QML document per
+        # style file for the whole group, then add them in one step. So the
+        # layer tree and the canvas are not updated after every single layer.
+        d_styles = {}    # QML file -> QDomDocument
+        l_layers = []
+
         for tif_file, qml_file in list_of_files_and_qml:
             bn = Path(tif_file).name
             raster_layer = QgsRasterLayer(str(tif_file), bn)
@@ -95,9 +102,11 @@ class LayerLoader:
                 continue
 
             raster_layer.setName(Path(tif_file).stem)
-            self._insert_layer(raster_layer, qml_file, 0, layer_group)
+            l_layers.append(self._prepare_layer(raster_layer, qml_file, d_styles))
         # for
 
+        self._insert_layers(l_layers, layer_group)
+
         f_devnull.close()
         sys.stderr = saved_stderr
         sys.stdout = saved_stdout
@@ -209,7 +218,14 @@ class LayerLoader:
             self.out(f'Layer with existing name "{layer.name()}" found - removing.')
             QgsProject.instance().removeMapLayer(layer.id())
     
-    def _insert_layer(self, layer, qml_file, duration, layer_group=None):
+    def _prepare_layer(self, layer, qml_file, d_styles=None):
+        """
+        Pyramids, style, opacity, transparency, temporal settings
+
+        @param d_styles: dict for sharing parsed QML documents (bulk mode);
+                         None: load and refresh the style for this layer only
+        @return: prepared layer (new instance, because of the pyramids)
+        """
 
         # Build pyramids
         self.out("Building pyramids ...")
@@ -217,7 +233,10 @@ class LayerLoader:
 
         # Style layer with qml file
         if qml_file:
-            self._set_qml(layer, qml_file)
+            if d_styles is None:
+                self._set_qml(layer, qml_file)
+            else:
+                self._set_qml_document(layer, qml_file, d_styles)
 
         # Set opacity - also for black white (without QML):
         # Sets the opacity for the layer, where opacity is a value
@@ -239,6 +258,35 @@ class LayerLoader:
             self.out("Setting temporal settings ...")
             self._set_time_range(layer)
 
+        return layer
+
+    def _insert_layers(self, l_layers, layer_group=None):
+        """
+        Adds all layers at once, one repaint. Same positions as '_insert_layer()'
+        one after another: appended to the end of 'layer_group' in list order;
+        without group as a block at the second position of the root (under the vector layer group).
+        """
+
+        if layer_group:
+            root, index = layer_group, -1
+        else:
+            root, index = self._iface.layerTreeCanvasBridge().rootGroup(), 1
+
+        canvas = self._iface.mapCanvas()
+        canvas.freeze(True)    # no rendering while adding
+
+        try:
+            QgsProject.instance().addMapLayers(l_layers, False)    # without showing them
+            root.insertChildNodes(index, [QgsLayerTreeLayer(layer) for layer in l_layers])
+        finally:
+            canvas.freeze(False)
+
+        canvas.refresh()
+
+    def _insert_layer(self, layer, qml_file, duration, layer_group=None):
+
+        layer = self._prepare_layer(layer, qml_file)
+
         # Insert layer at a certain position
 
         # Add the layer to the QGIS Map Layer Registry (the second argument must be set to False
@@ -298,6 +346,28 @@ class LayerLoader:
         # self._iface.legendInterface().refreshLayerSymbology(active_raster_layer)    # QGIS 2
         self._iface.layerTreeView().refreshLayerSymbology(layer.id())
 
+    def _set_qml_document(self, layer, qml_file, d_styles):
+        """
+        Bulk mode: the QML file is parsed only once for all layers;
+        no repaint and no legend refresh per layer
+
+        @param d_styles: QML file -> QDomDocument, shared
+        """
+
+        doc = d_styles.get(str(qml_file))
+
+        if doc is None:
+            self.out(f"using QML file '{qml_file}'")
+            doc = QDomDocument()
+            # binary: QDomDocument decodes by the XML declaration (UTF-8 labels)
+            with open(qml_file, 'rb') as f:
+                doc.setContent(f.read())
+            d_styles[str(qml_file)] = doc
+
+        ok, msg = layer.importNamedStyle(doc)
+        if not ok:
+            self.out(f"style of '{qml_file}' not applied: {msg}", False)
+
     def _set_time_range(self, layer: QgsRasterLayer) -> None:
         """
         Sets temporal settings for layer, especially start time and end time (since QGIS 3.14).
@@ -379,6 +449,11 @@ class LayerLoader:
             QgsRasterLayer: Raster layer with pyramids
         """
 
+        # GeoTIFFs of this plugin get internal overviews while they are written:
+        if isinstance(layer, QgsRasterLayer) and layer.dataProvider().hasPyramids():
+            self.out("  pyramids already exist")
+            return layer
+
         parameters = {
             "INPUT": layer,
             "LEVELS": "2 4 8 16",
@@ -2,8 +2,9 @@
 import os
 from pathlib import Path
 import sys
+import hashlib
 
-from configparser import ConfigParser, NoOptionError
+from configparser import NoOptionError
 #import platform    # to determine wether Windows or not
 
 from qgis.core import QgsApplication, QgsProject, QgsVectorLayer
@@ -11,6 +12,7 @@ from qgis.core import QgsCoordinateReferenceSystem, QgsLayerTreeGroup
 
 
 from .NumpyRadolanReader import NumpyRadolanReader
+from .Config             import Config
 
 from . import def_products       # File 'def_products.py'
 from . import def_projections    # File 'def_projections.py'
@@ -57,8 +59,8 @@ class Model:
         
         # Objekt, auf das wir im Folgenden immer zugreifen.
         # Statisch ging es leider aus welchen Gründen auch immer (war in anderen Methoden 'None').
-        self._config = ConfigParser()
-        self._config.read(config_file)
+        self._settings = Config(config_file)    # the part without QGIS
+        self._config = self._settings.parser
         
         self._product_defs = def_products.dict_titles
         self.out(f"{def_products.__name__}: {len(self._product_defs)} product titles loaded.")
@@ -299,6 +301,10 @@ class Model:
     def temp_dir(self):
         # important NOT to use '_data_root' here!
         return self._linux_tmp if self._linux_tmp else self.data_root / 'tmp'
+    @property
+    def warp_cache_dir(self):
+        """ precomputed reprojection lookup tables (BatchWarper) """
+        return self.data_root / 'warp_cache'
     '''
     @property
     def layout_dir(self):
@@ -402,6 +408,32 @@ class Model:
     @property
     def history_file(self):
         return Path(self.profile_dir) / self._config.get('Paths', 'last_products_basename')
+    
+    @property
+    def workers(self):
+        """ number of worker processes for converting many files; 0 (default): number of CPUs """
+        return self._settings.workers
+
+    def prefix_index_dir(self, prod_id, data_path):
+        """
+        Directory of the PrefixSumIndex of a product in a data directory;
+        None, if switched off in the config (section [Processing], 'prefix_index')
+        """
+
+        if not self._settings.prefix_index:
+            return None
+
+        path_hash = hashlib.sha1(str(Path(data_path).resolve()).encode()).hexdigest()[:12]
+        return self.data_root / 'prefix_index' / f"{prod_id.upper()}_{path_hash}"
+
+    def output_profile(self, family):
+        """ OutputProfile of a product family ('precipitation', 'class', 'dbz'), section [Output] """
+        return self._settings.output_profile(family)
+
+    @property
+    def output_profiles(self):
+        """ dict: product family -> OutputProfile """
+        return self._settings.output_profiles
 
     
     # Projections
@@ -9,6 +9,8 @@ from pathlib import Path
 from glob import glob
 from copy import copy
 from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import warnings
 import re
@@ -18,6 +20,77 @@ from .ASCIIGridWriter    import ASCIIGridWriter       # Output
 
 
 
+# RADOLAN: raa01-rw_10000-1708020250-dwd---bin
+# RADKLIM: raa01-yw2017.002_10000-1006010650-dwd---bin.gz
+_RADOLAN_FILE_TIMESTAMP = re.compile(r'_10000-(\d{10})-dwd---bin(\.gz|\.bz2)?$')
+
+
+def index_radolan_files(l_files):
+    """
+    Index of RADOLAN / RADKLIM files by the timestamp in their file name.
+    If a timestamp exists more than once (e.g. compressed and uncompressed),
+    the first file in sorted order is taken.
+    
+    :param l_files: file paths, e.g. a glob result
+    :return: dict {datetime: file path}
+    """
+    
+    d_files = {}
+    
+    for fn_path in sorted(l_files):
+        m = _RADOLAN_FILE_TIMESTAMP.search(fn_path)
+        if not m:
+            continue
+        dt = datetime.strptime(m.group(1), "%y%m%d%H%M")
+        d_files.setdefault(dt, fn_path)
+    
+    return d_files
+
+
+def glob_radolan_files(data_path, prod_id):
+    """
+    All RADOLAN / RADKLIM files of a product in a directory, compressed or not
+    
+    :param prod_id: e.g. 'RW' or 'rw'
+    :return: list of file paths (str)
+    """
+    
+    # RADOLAN: raa01-rw_10000-1708020250-dwd---bin
+    # RADKLIM: raa01-yw2017.002_10000-1006010650-dwd---bin
+    # ...bin, ...bin.gz ?
+    pattern = "raa01-{}*_10000-*-dwd---bin*".format(prod_id.lower())
+    return glob(str(Path(data_path) / pattern))
+
+
+def summarize_timestamps(l_dt, td, max_ranges=10):
+    """
+    Compact description of sorted timestamps with step 'td' as ranges,
+    e.g. '1708020250-1708020450, 1708030050'.
+    
+    :param l_dt: sorted list of datetimes
+    :param td: timedelta between consecutive timestamps
+    :param max_ranges: more ranges are abbreviated with '...'
+    """
+    
+    l_ranges = []
+    
+    for dt in l_dt:
+        if l_ranges and dt - l_ranges[-1][1] == td:
+            l_ranges[-1][1] = dt
+        else:
+            l_ranges.append([dt, dt])
+    
+    fmt = "%y%m%d%H%M"
+    l_s = [beg.strftime(fmt) if beg == end else "{}-{}".format(beg.strftime(fmt), end.strftime(fmt))
+           for beg, end in l_ranges[:max_ranges]]
+    
+    if len(l_ranges) > max_ranges:
+        l_s.append("... ({} more)".format(len(l_ranges) - max_ranges))
+    
+    return ", ".join(l_s)
+
+
+
 def test_sum2D_with_nan():
     print("### test_sum2D_with_nan() ###\n")
     
@@ -86,11 +159,17 @@ class NumpyRadolanAdder:
     classdocs
     '''
     
-    def __init__(self, dt_beg, dt_end, data_path, prod_id, asc_filename_path):
+    def __init__(self, dt_beg, dt_end, data_path, prod_id, asc_filename_path, dtype=np.float32, workers=1):
         '''
         Constructor
+        
+        asc_filename_path: ESRI ASCII grid of the sum; None: no file, use 'sum_field'
+        dtype: float type of the read grids and the sum (np.float32 or np.float64);
+               accumulated in float64 in any case
         '''
         
+        self._quiet = False    # no progress output, e.g. in a background task
+        
         self.out("dt_beg={}, dt_end={}, prod_id='{}'".format(dt_beg, dt_end, prod_id))
         
         # In:
@@ -99,15 +178,25 @@ class NumpyRadolanAdder:
         self._data_path = data_path
         self._prod_id   = prod_id.lower()    # 'SF' -> 'sf'
         self._asc_filename_path = asc_filename_path
-        
-        self._first_run = True
+        self._dtype     = dtype
+        """
+        workers > 1: read and decode that many files at once in threads
+        (decompression and np.frombuffer release the GIL). Summation stays
+        in timestamp order, so the result is the same as with workers=1.
+        """
+        self._workers   = max(1, workers)
+        self._progress_callback = None    # callable(files_done, files_total) -> False: cancel
+        self._cube      = None    # RadolanCube of the product: sum from the cube instead of the files
+        self._prefix_index = None # PrefixSumIndex of the product: sum from checkpoints and edge files
         
         # determined:
         self._interval_minutes = 0    # of sum
+        self._precision = None
+        self._canceled  = False
         
-        # Out:
-        self._sum_field    = None
-        self._nodata_field = None
+        # Out, preallocated with the first file and updated in place:
+        self._sum_field   = None    # sum of all valid values
+        self._valid_count = None    # number of files in which the pixel was valid
         
     
     def __str__(self):
@@ -117,7 +206,8 @@ class NumpyRadolanAdder:
         ''' Ausgabemethode '''
         
         if ok:
-            print("{}: {}".format(self, s))
+            if not self._quiet:
+                print("{}: {}".format(self, s))
         else:
             print("{}: {}".format(self, s), file=sys.stderr)
     
@@ -126,78 +216,167 @@ class NumpyRadolanAdder:
     def run(self):
         self.out("run()")
         
-        # RADOLAN: raa01-rw_10000-1708020250-dwd---bin
-        # RADKLIM: raa01-yw2017.002_10000-1006010650-dwd---bin
-        # ...bin, ...bin.gz ?
-        general_radolan_file_pattern = "raa01-{}*_10000-{{}}-dwd---bin*".format(self._prod_id)
+        if self._cube:
+            self._run_cube()
+            return
         
-        pattern_all_files_same_type = general_radolan_file_pattern.format('*')
-        concrete_radolan_file_pattern = str( Path(self._data_path) / pattern_all_files_same_type )
-        print("  determine files...", end=" ")
-        l_files_all_same_type = glob(concrete_radolan_file_pattern)
-        print("{} files of '{}' type found".format(len(l_files_all_same_type), self._prod_id.upper()))
+        l_files_all_same_type = glob_radolan_files(self._data_path, self._prod_id)
+        self.out("{} files of '{}' type found".format(len(l_files_all_same_type), self._prod_id.upper()))
         
         if not l_files_all_same_type:
             raise FileNotFoundError("no RADOLAN files for adding found!")
         
+        if self._prefix_index:
+            self._run_prefix_index(l_files_all_same_type)
+            return
+        
         # simply take first file to determine properties one time:
         radolan_file = l_files_all_same_type[0]
         time_res_min, prec = self._read_first_file_init(radolan_file)
         
         
         """
-        Following complicated way because we don't know, if user adds standard
-        RADOLAN data or RADKLIM data or wether the files are gzip compressed.
-        The file patterns are slightly different.
-        So we create a concrete and surely existing file pattern here.
+        We don't know, if user adds standard RADOLAN data or RADKLIM data or
+        wether the files are gzip compressed. The file names are slightly different,
+        so they are indexed once by their timestamp instead of constructing names.
         """
-        # raa01-xx_10000-{}-dwd---bin[.gz]    # insert '{}' for datetime
-        general_radolan_file_pattern = re.sub(r'(\d){10}', '{}', radolan_file)
-        general_radolan_file_pattern_with_path = str( Path(self._data_path) / general_radolan_file_pattern )
-        # -> so now, we need only to substitute the placeholder {} for datetime.
+        d_files = index_radolan_files(l_files_all_same_type)
         
         # datetime.timedelta([days[, seconds[, microseconds[, milliseconds[, minutes[, hours[, weeks]]]]]]])
         td_min = timedelta(minutes=time_res_min)
         
         dt = self._dt_beg
-        number_of_added_files = 0
+        
+        # begin between the time steps of the files (e.g. 00:00 for RW at hh:50):
+        # snapped to the next time step, like the sum of a cube or prefix index
+        l_phases = sorted({(dt_file - dt) % td_min for dt_file in d_files})
+        if l_phases and l_phases[0]:
+            dt += l_phases[0]
+        
+        l_files_to_add = []    # in timestamp order
+        l_missing = []
         
         while dt <= self._dt_end:
-            fn_path = general_radolan_file_pattern_with_path.format( dt.strftime("%y%m%d%H%M") )
+            fn_path = d_files.get(dt)
             
-            if fn_path in l_files_all_same_type:
-                self._add(fn_path)
-                number_of_added_files += 1
+            if fn_path:
+                l_files_to_add.append(fn_path)
             else:
-                self.out("expected file '{}' doesn't exist".format(concrete_radolan_file_pattern), False)
+                l_missing.append(dt)
             
             dt += td_min
         # while
         
-        #print(self._sum_field[0])
-        #print(self._nodata_field[0])
+        if l_missing:
+            self.out("{} expected files don't exist: {}".format(len(l_missing),
+                summarize_timestamps(l_missing, td_min)), False)
         
-        self.out("{} files added".format(number_of_added_files))
+        n_files = len(l_files_to_add)
         
-        # Imprint NaN values that were NaN during the entire run:
-        nan_positions = np.where(np.isnan(self._nodata_field))    # find the remaining NaNs
-        self._sum_field[nan_positions] = np.nan
+        for i, (cur_data, interval) in enumerate(self._read_files(l_files_to_add), start=1):
+            self._accumulate(cur_data, interval)
+            
+            # stop between files, no result:
+            if self._progress_callback and self._progress_callback(i, n_files) is False:
+                self.out("canceled after {} of {} files".format(i, n_files), False)
+                self._canceled = True
+                return
         
-        ascii_writer = ASCIIGridWriter(self._sum_field, prec, self._asc_filename_path)
-        ascii_writer.write()
+        self.out("{} files added".format(n_files))
+        
+        self._imprint_nodata()
+        self._precision = prec
+        
+        # no ASCII file, if the caller uses 'sum_field' directly (e.g. for an in-memory GeoTIFF):
+        if self._asc_filename_path:
+            ascii_writer = ASCIIGridWriter(self._sum_field, prec, self._asc_filename_path)
+            ascii_writer.write()
+    
+    
+    def _run_cube(self):
+        """ the same result as run() by a chunked reduction of a RadolanCube """
+        
+        cube = self._cube
+        
+        if cube.prod_id.lower() != self._prod_id:
+            raise ValueError("cube of '{}', not of '{}'".format(cube.prod_id, self._prod_id.upper()))
+        
+        self.out("sum from cube '{}'".format(cube.store_dir))
+        
+        result = cube.sum(self._dt_beg, self._dt_end, self._dtype, self._progress_callback)
+        
+        if result is None:
+            self._canceled = True
+            return
+        
+        self._take_result(result, cube.interval, cube.precision)
+    
+    def _run_prefix_index(self, l_files):
+        """
+        The same result as run() from a PrefixSumIndex: the index is updated with
+        the new files first, then only the files at the edges of the period are read.
+        """
+        
+        index = self._prefix_index
+        
+        self.out("sum from prefix index '{}'".format(index.index_dir))
+        
+        canceled = []
+        def progress(done, total):
+            if self._progress_callback and self._progress_callback(done, total) is False:
+                canceled.append(True)
+                return False
+        
+        index.update(l_files, progress)
+        if canceled:
+            self._canceled = True
+            return
+        
+        if index.prod_id.lower() != self._prod_id:
+            raise ValueError("index of '{}', not of '{}'".format(index.prod_id, self._prod_id.upper()))
+        
+        result = index.sum(self._dt_beg, self._dt_end, index_radolan_files(l_files), self._dtype)
+        
+        self._take_result(result, index.interval, index.precision)
+    
+    def _take_result(self, result, interval, precision):
+        """ result (CubeSum) of a cube or prefix index -> fields, ASCII grid """
+        
+        if result.missing:
+            self.out("{} expected time steps not available: {}".format(len(result.missing),
+                summarize_timestamps(result.missing, timedelta(minutes=interval))), False)
+        
+        self._sum_field   = result.sum_field
+        self._valid_count = result.valid_count
+        self._interval_minutes = result.interval_minutes
+        self._precision   = precision
+        
+        if self._asc_filename_path:
+            ascii_writer = ASCIIGridWriter(self._sum_field, self._precision, self._asc_filename_path)
+            ascii_writer.write()
     
     
     def _read_first_file_init(self, radolan_file):
         self.out("init with first file")
         
-        nrr = NumpyRadolanReader(radolan_file)    # FileNotFoundError
+        nrr = NumpyRadolanReader(radolan_file, self._quiet)    # FileNotFoundError
         nrr._read_radolan_composite(loaddata=False)    # optimize, no reading of data part neccessary
         
-        # Return a new array of given shape and type, filled with fill_value.
-        self._nodata_field = np.full(nrr.shape, np.nan)    # all with NaN
-        
         time_res_min = nrr.interval
-        print("  'time_res' determined: {} minutes".format(time_res_min))
+        self.out("'time_res' determined: {} minutes".format(time_res_min))
+        
+        # uint16 is enough for the number of valid files per pixel unless
+        # the period has more time steps (e.g. a year of 5 minute products):
+        count_dtype = np.uint16
+        if self._dt_beg and self._dt_end:
+            steps = (self._dt_end - self._dt_beg) // timedelta(minutes=time_res_min) + 1
+            if steps > np.iinfo(np.uint16).max:
+                count_dtype = np.uint32
+        
+        # accumulator, updated in place for every file; float64 against the drift of
+        # adding many float32 grids, 'dtype' is only the type of the result:
+        self._sum_field   = np.zeros(nrr.shape, dtype=np.float64)
+        self._valid_count = np.zeros(nrr.shape, dtype=count_dtype)
         
         return time_res_min, nrr.precision
         
@@ -205,33 +384,59 @@ class NumpyRadolanAdder:
     
     def _add(self, radolan_file):
         #self.out("_add('{}')".format(radolan_file))
+        self._accumulate(*self._read(radolan_file))
+    
+    def _read(self, radolan_file):
+        """ Reads and decodes one file -> (data, interval); also called from worker threads """
         
-        nrr = NumpyRadolanReader(radolan_file)    # FileNotFoundError
+        nrr = NumpyRadolanReader(radolan_file, self._quiet)    # FileNotFoundError
+        nrr.use_mmap = True    # uncompressed files: map instead of read
+        nrr.dtype = self._dtype
         nrr.read()
-        cur_data = nrr.data
+        return nrr.data, nrr.interval
+    
+    def _read_files(self, l_files):
+        """
+        Generator: yields (data, interval) of the files in the given order.
+        With more than one worker, the files are decoded in a thread pool;
+        at most 2 * workers decoded fields are held in memory at a time.
+        """
         
-        self._interval_minutes += nrr.interval
+        if self._workers == 1:
+            for radolan_file in l_files:
+                yield self._read(radolan_file)
+            return
         
-        # every occurence of a pixel (for every looped file) switches a 'nan' to a 'True':
-        # np.where return indices where the conditions are true
-        indices_non_nan = np.where(~np.isnan(cur_data))
-        # switch non nan positions to True. For every loop.
-        self._nodata_field[indices_non_nan] = True
+        max_in_flight = 2 * self._workers
         
-        if self._first_run:
-            self._sum_field = cur_data    # Init
-            self._first_run = False
-            return
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            in_flight = deque()
+            
+            for radolan_file in l_files:
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()    # oldest first: keep order
+                in_flight.append( executor.submit(self._read, radolan_file) )
+            
+            while in_flight:
+                yield in_flight.popleft().result()
+    
+    def _accumulate(self, cur_data, interval):
+        self._interval_minutes += interval
+        
+        valid = ~np.isnan(cur_data)
         
         """
-        Since the inputs are 2D arrays, you can stack them along the third axis with
-        np.dstack and then use np.nansum which would ensure NaNs are ignored, unless
-        there are NaNs in both input arrays, in which case output would also have NaN.
-        -> The behavior that NaN is returned when both inputs are NaN
-        changed for NumPy version >1.9.0. In the newer versions, zero is returned!
+        Add in place, only the valid values. NaN values don't change the sum,
+        like np.nansum(np.dstack((sum, cur_data)), 2) before, but without
+        allocating new arrays for every file.
         """
-        self._sum_field = np.nansum(np.dstack((self._sum_field, cur_data)), 2)
-        
+        np.add(self._sum_field, cur_data, out=self._sum_field, where=valid)
+        self._valid_count += valid
+    
+    def _imprint_nodata(self):
+        """ Result in 'dtype'; imprint NaN values that were NaN during the entire run """
+        self._sum_field = self._sum_field.astype(self._dtype, copy=False)
+        self._sum_field[self._valid_count == 0] = np.nan
     
     
     def get_statistics(self):
@@ -269,6 +474,63 @@ class NumpyRadolanAdder:
     def interval_minutes(self):
         return self._interval_minutes
     
+    @property
+    def sum_field(self):
+        """ result of 'run()', NaN where no file had a valid value """
+        return self._sum_field
+    
+    @property
+    def precision(self):
+        return self._precision
+    
+    @property
+    def workers(self):
+        return self._workers
+    @workers.setter
+    def workers(self, workers):
+        self._workers = max(1, workers)
+    
+    @property
+    def quiet(self):
+        return self._quiet
+    @quiet.setter
+    def quiet(self, b):
+        """ no progress output of the adder and its readers, errors are still printed """
+        self._quiet = b
+    
+    @property
+    def progress_callback(self):
+        return self._progress_callback
+    @progress_callback.setter
+    def progress_callback(self, callback):
+        """ callable(files_done, files_total), called after each file; returning False cancels 'run()' """
+        self._progress_callback = callback
+    
+    @property
+    def cube(self):
+        return self._cube
+    @cube.setter
+    def cube(self, cube):
+        """ RadolanCube containing the product; 'run()' reads the cube instead of the single files """
+        self._cube = cube
+    
+    @property
+    def prefix_index(self):
+        return self._prefix_index
+    @prefix_index.setter
+    def prefix_index(self, index):
+        """ PrefixSumIndex of the product; 'run()' updates it and sums from its checkpoints """
+        self._prefix_index = index
+    
+    @property
+    def canceled(self):
+        return self._canceled
+    
+    @property
+    def valid_count(self):
+        """ number of added files in which each pixel was valid """
+        return self._valid_count
+    
     
 #################################################################
 
@@ -293,11 +555,9 @@ def test_nan():
     adder._add(f1)
     adder._add(f2)
     
-    sum_field = adder._sum_field    # fetch reference
-    
     # Imprint NaN values that were NaN during the entire run:
-    nan_positions = np.where(np.isnan(adder._nodata_field))    # find the remaining NaNs
-    sum_field[nan_positions] = np.nan
+    adder._imprint_nodata()
+    sum_field = adder._sum_field    # fetch reference
     
     ascii_writer = ASCIIGridWriter(sum_field, 0.1, asc_filename_path)
     ascii_writer.write()
@@ -6,6 +6,66 @@ import numpy as np
 import warnings
 import gzip
 import bz2
+from functools import lru_cache
+
+
+# Flags of the 2 byte products (bits 13-16 of every value),
+# shifted to the lower 4 bits of the compact flag field:
+FLAG_SECONDARY = 0x1    # Bit 13: interpolated station data
+FLAG_NODATA    = 0x2    # Bit 14
+FLAG_NEGATIVE  = 0x4    # Bit 15: negative value (only RD)
+FLAG_CLUTTER   = 0x8    # Bit 16 (X products: value 249)
+
+# the header is read in blocks of this size (most headers fit in one block):
+HEADER_BLOCK_SIZE = 1024
+
+
+def read_header_only(fn, quiet=True):
+    """ Reads only the ASCII header of a RADOLAN file, fast path for scanning many files
+
+    :param fn: RADOLAN file (str or Path, possibly compressed)
+    :param quiet: no output per file (a scan may read thousands of headers)
+    :return: dictionary of metadata retrieved from file header (see NumpyRadolanReader.meta)
+    """
+    nrr = NumpyRadolanReader(fn, quiet)    # FileNotFoundError
+    try:
+        _, attrs = nrr._read_radolan_composite(loaddata=False)
+    finally:
+        nrr._fobj.close()
+    return attrs
+
+
+def rvp6_to_dbz(rvp6):
+    """ RVP6 units -> dBZ, works on scalars and whole arrays:
+    (RVP-6-Unit/2) - 32.5 = dBZ-Wert """
+    return (rvp6 / 2) - 32.5
+
+
+def dbz_to_mm5min(dbz, a=256, b=1.42):
+    """ dBZ -> mm/5min by Z-R relationship Z = a * R^b, works on scalars and whole arrays
+
+    Umstellen der Formel nach R:
+    Z = aR^b <==> R = (Z/a)^1/b = (10^dBZ/10 /a)^1/b
+    """
+    Z = 10.0 ** (dbz / 10.0)    # ** = Exponent
+    mm = (Z / a) ** (1 / b)     # mm/h
+    return mm / 12.0            # mm/h -> mm/5 min
+
+
+@lru_cache(maxsize=8)
+def _rvp6_to_mm5min_lut(a, b):
+    """ Lookup table for all 256 possible RVP6 units (1 byte) -> mm/5min """
+    lut = dbz_to_mm5min(rvp6_to_dbz(np.arange(256, dtype=np.float64)), a, b)
+    lut.flags.writeable = False    # shared by all readers
+    return lut
+
+
+@lru_cache(maxsize=8)
+def _wn_dbz_lut(precision, dtype):
+    """ Lookup table for all 4096 possible raw values (12 bit) of the WN product -> dBZ """
+    lut = rvp6_to_dbz(np.arange(0x1000, dtype=np.uint16) * precision).astype(dtype)
+    lut.flags.writeable = False    # shared by all readers
+    return lut
 
 
 class NumpyRadolanReader:
@@ -24,19 +84,25 @@ class NumpyRadolanReader:
     """
 
 
-    def __init__(self, fn):
+    def __init__(self, fn, quiet=False):
         """
         Constructor
+        
+        quiet: no progress output (errors still), e.g. for many files in a background task
         """
         
+        self._quiet = quiet
         self.out(f"<- '{fn}'")
         
         self._data   = None    # Werte aus dem RADOLAN-Binärteil
         self._meta   = None    # Metadaten aus dem RADOLAN-Header in Form eines Dictionaries
         self._header = None    # der RADOLAN-Header als Ganzes (String)
+        self._header_size = None    # Länge des Headers inkl. ETX = Beginn des Binärteils
+        self._buffer = b''     # beim Header-Lesen bereits gelesener Anfang des Binärteils
 
-        self._field_station_flag = None    # interpolierte Stationsdaten
-        self._field_clutter      = None    # Clutter-Array
+        self._flags              = None    # Flag-Bits (FLAG_*) je Pixel, kompakt als uint8
+        self._field_station_flag = None    # interpolierte Stationsdaten, erst bei Zugriff erzeugt
+        self._field_clutter      = None    # Clutter-Array, erst bei Zugriff erzeugt
         
         #self._missing = -1
         self._missing = np.nan
@@ -48,6 +114,14 @@ class NumpyRadolanReader:
         
         self._rx_in_mm = False    # RVP6 -> mm/5min
         
+        self._use_mmap = False    # memory map uncompressed files instead of reading them
+        
+        self._dtype = np.float32    # float type of 'data'; RADOLAN precision is at most 0.01
+        # Z-R relationship Z = a * R^b, used for RVP6 -> mm/5min.
+        # Konstanten: vor allem abhängig von der Art des Niederschlags (Tropfenspektrum):
+        self._zr_a = 256
+        self._zr_b = 1.42
+        
         self._fobj = self._get_radolan_filehandle(str(fn))    # str() if Path
         # FileNotFoundError, IOError
 
@@ -62,7 +136,8 @@ class NumpyRadolanReader:
         """ Ausgabemethode """
         
         if ok:
-            print(f"{self}: {s}")
+            if not self._quiet:
+                print(f"{self}: {s}")
         else:
             print(f"{self}: {s}", file=sys.stderr)
     
@@ -111,6 +186,43 @@ class NumpyRadolanReader:
         
         
     
+    def read_raw(self):
+        """
+        Reads the raw values without precision factor and without conversion to float,
+        e.g. for storing them compactly (RadolanCube).
+        Not for 'HG' (4 byte) and 'RD' (negative flag).
+
+        :return: (uint16 array of shape (nrow, ncol), bool array nodata of the same shape)
+        """
+        self.out("read_raw()")
+
+        self._header = self._read_radolan_header()
+        attrs = self._parse_dwd_composite_header()
+        self._meta = attrs
+
+        prod_id = attrs['producttype']
+        if prod_id in ('HG', 'RD'):
+            self._fobj.close()
+            raise ValueError(f"raw values of '{prod_id}' not supported")
+
+        indat = self._read_radolan_binary_array(attrs['datasize'])
+
+        if prod_id in ('RX', 'EX', 'WX'):
+            arr8 = np.frombuffer(indat, np.uint8)
+            nodata = arr8 == 250
+            raw = arr8.astype(np.uint16)
+        else:
+            raw = np.frombuffer(indat, np.uint16)
+            nodata = ((raw >> 12) & FLAG_NODATA).astype(bool)    # Bit 14
+            raw = raw & 0xFFF
+
+        if prod_id == 'WN':
+            self._dbz_product = True
+
+        shape = (attrs['nrow'], attrs['ncol'])
+        return raw.reshape(shape), nodata.reshape(shape)
+
+
     def _read_radolan_composite(self, loaddata=True):
         """Read quantitative radar composite format of the German Weather Service
     
@@ -181,20 +293,15 @@ class NumpyRadolanReader:
 
         prod_id = attrs['producttype']
         
-        all_pixels = attrs['nrow'] * attrs['ncol']
-        
         # read the actual data
         indat = self._read_radolan_binary_array(attrs['datasize'])
-        clu_mask = None
+        flags = None    # compact flag field (1 byte per pixel), see FLAG_* constants
 
         if prod_id in ('RX', 'EX', 'WX'):
-            # convert to 8bit integer
-            arr = np.frombuffer(indat, np.uint8).astype(np.uint8)
-            # numpy.where(condition[, x, y])
-            # Return elements, either from x or y, depending on condition.
-            #nodata = np.where(arr == 250, self._missing, arr)
-            nodata   = np.where(arr == 250)[0]
-            clu_mask = np.where(arr == 249)[0]
+            # 8bit integer, read-only view on the binary data
+            arr = np.frombuffer(indat, np.uint8)
+            nodata = arr == 250
+            flags = np.where(arr == 249, FLAG_CLUTTER, 0).astype(np.uint8)
 
         # 4 byte product - convert to 32-bit integers
         elif prod_id == 'HG':
@@ -212,42 +319,39 @@ class NumpyRadolanReader:
             Bit 25: Kein Niederschlag:   0000 0001 | 0000 0000 | 0000 0000 | 0000 0000    =   16777216 (2^25-1)
             Bit 32: No-Data:             1000 0000 | 0000 0000 | 0000 0000 | 0000 0000    = 2147483648 (2^32-1)
             """
-            nodata = np.where(arr == 2147483648)[0]    # Bit 32: No-Data -> wird später zu NaN, kein Int-Wert mehr
+            nodata = arr == 2147483648    # Bit 32: No-Data -> wird später zu NaN, kein Int-Wert mehr
 
-        # 2 byte product (RADOLAN) - convert to 16-bit integers
+        # 2 byte product (RADOLAN) - 16-bit integers
         else:
-            arr = np.frombuffer(indat, np.uint16).astype(np.uint16)  # uint16: Unsigned integer (0 to 65535)
-            # evaluate bits 13, 14, 15 and 16
-            # where: The numpy.where function takes a condition as an argument and
-            # returns >>the indices<< where that condition is true.
-            if prod_id != 'WN':
-                secondary = np.where(arr & 0x1000)[0]    # Bit 13
-                attrs['secondary'] = secondary
-                clu_mask = np.where(arr & 0x8000)[0]  # Bit 16
-                # Gleiches Vorgehen für Stationsflag- und Clutter-Feld:
-                station_flag_field = np.zeros(all_pixels, int)    # empty station flag field
-                station_flag_field[secondary] = 1
-                self._field_station_flag = station_flag_field.reshape((attrs['nrow'], attrs['ncol']))
-            # WN
-
-            nodata = np.where(arr & 0x2000)[0]    # Bit 14, for WN too
-
+            raw = np.frombuffer(indat, np.uint16)  # uint16: Unsigned integer (0 to 65535), read-only view
+            # evaluate bits 13, 14, 15 and 16 in one pass:
+            # the upper 4 bits are kept as compact 1 byte flag field
+            flags = (raw >> 12).astype(np.uint8)
+            nodata = (flags & FLAG_NODATA).astype(bool)    # Bit 14, for WN too
             # mask out the last 4 bits
-            arr &= mask
-            # consider negative flag if product is RD (differences from adjustment)
-            if prod_id == 'RD':
-                # NOT TESTED, YET
-                negative = np.where(arr & 0x4000)[0]  # Bit 15
-                arr[negative] = -arr[negative]
+            arr = raw & mask
+            if prod_id == 'WN':
+                flags = None    # only nodata is evaluated
         # else
         # End of product type check
 
         # apply precision factor
-        # this promotes arr to float if precision is float
-        arr = arr * attrs['precision']
+        if prod_id == 'WN':
+            # raw RVP6 units -> dBZ, precision factor is included:
+            self._dbz_product = True
+            arr = self._wn_rvp6units_to_dbz(arr, attrs['precision'])
+        else:
+            # in place in the float type of the output ('dtype'),
+            # float32 is sufficient for the 12 bit values of the RADOLAN products
+            arr = arr.astype(self._dtype)
+            arr *= attrs['precision']
+            # consider negative flag if product is RD (differences from adjustment)
+            if prod_id == 'RD':
+                # NOT TESTED, YET
+                np.negative(arr, out=arr, where=(flags & FLAG_NEGATIVE).astype(bool))    # Bit 15
 
         # set nodata value
-        if nodata is not None:
+        if nodata.any():
             #arr[nodata] = self._missing
             arr[nodata] = np.nan    # better for mean calculation
 
@@ -267,18 +371,8 @@ class NumpyRadolanReader:
             # !! Attention: don't overwrite the replaced value '1' above! :-)
             arr[arr == 16777216] = 1    # Kein Niederschlag
 
-        elif prod_id == 'WN':
-            self._dbz_product = True
-            self._wn_rvp6units_to_dbz(arr)
-
-        if clu_mask is not None:
-            attrs['cluttermask'] = clu_mask
-            #print(clu_mask)    # Struktur (Beispiel, Indizes): [  5877   5878   6778 ... 809824 809825 809828]
-            #clutter = np.zeros(all_pixels, bool)    # erstmal 'flattened array'; bool: zeros = False
-            clutter = np.zeros(all_pixels, int)    # empty clutter field
-            #print(clutter)
-            clutter[clu_mask] = 1    # True
-            self._field_clutter = clutter.reshape((attrs['nrow'], attrs['ncol']))
+        # station flag and clutter fields are only built on demand from it:
+        self._flags = flags
         
         # Exclude zeros. Only possible if values are of float type:
         if self._zeroes_to_nan:
@@ -293,6 +387,10 @@ class NumpyRadolanReader:
     def _read_radolan_header(self):
         """ Reads RADOLAN ASCII header and returns it as string
 
+        The header is read block by block (not char by char), compressed files
+        are only decompressed as far as needed. The part of the binary data which
+        was already read with the last block is kept for '_read_radolan_binary_array()'.
+
         Returns
         -------
         header : string
@@ -303,16 +401,21 @@ class NumpyRadolanReader:
         
         ETX = b'\x03'    # Header-Ende: End Of Text
         
-        header = ''
+        block = b''
         while True:
-            mychar = self._fobj.read(1)
-            if not mychar:
+            chunk = self._fobj.read(HEADER_BLOCK_SIZE)
+            if not chunk:
                 raise EOFError('Unexpected EOF detected while reading RADOLAN header')
-            if mychar == ETX:
+            start = len(block)
+            block += chunk
+            etx_pos = block.find(ETX, start)
+            if etx_pos > -1:
                 break
-            #header += str(mychar.decode())
-            header += mychar.decode()    # 15.03.2019, byte -> string
-        return header
+        
+        self._header_size = etx_pos + 1    # incl. ETX = offset of the binary data
+        self._buffer = block[etx_pos + 1:]
+        
+        return block[:etx_pos].decode()    # byte -> string
 
     
     def _parse_dwd_composite_header(self):
@@ -468,11 +571,20 @@ class NumpyRadolanReader:
     
         Returns
         -------
-        binarr : string
-            array of binary data
+        binarr : bytes or numpy.memmap (uint8)
+            array of binary data;
+            memory mapped (read-only) for uncompressed files if 'use_mmap' is set
         """
+        if self._use_mmap and not isinstance(self._fobj, (gzip.GzipFile, bz2.BZ2File)):
+            return self._map_radolan_binary_array(size)
+        
         # _fobj: object file handle
-        binarr = self._fobj.read(size)
+        # first part possibly already read with the header:
+        if size <= len(self._buffer):
+            binarr = self._buffer[:size]
+        else:
+            binarr = self._buffer + self._fobj.read(size - len(self._buffer))
+        self._buffer = b''
         self._fobj.close()
         
         if len(binarr) != size:
@@ -481,18 +593,27 @@ class NumpyRadolanReader:
         return binarr
     
     
+    def _map_radolan_binary_array(self, size):
+        """ Maps the binary data of an uncompressed file into memory (read-only)
+        instead of reading it. The decoding then works on views of the mapped file. """
+        
+        self._buffer = b''
+        self._fobj.close()    # the mapping doesn't need the file handle
+        
+        try:
+            return np.memmap(self._fobj.name, dtype=np.uint8, mode='r',
+                             offset=self._header_size, shape=(size,))
+        except ValueError:    # file is shorter than the header specifies
+            raise IOError(f'{__name__}: File corruption while reading\n'
+                          f'"{self._fobj.name}"!\nCould not read enough data.')
+    
+    
     def _rvp6_to_mm(self):
-        """ Calculate RVP6 units in dBZ """
+        """ Calculate RVP6 units in mm/5min """
         
         self._rx_in_mm = False    # not again
-        self._meta['precision'] = 0.01    # overwrite precision - analog RY
         
         """
-        1/2: to dBZ
-        """
-        
-        """
-        2/2: dBZ -> mm
         Einheit im DX: RVP-6-Unit bzw. 0.01 mm/fünf Minuten
         -> Umrechnung nach dBZ: (RVP-6-Unit/2) - 32.5 = dBZ-Wert
         -> dBZ-Wert = 10 * log (Z)
@@ -500,88 +621,59 @@ class NumpyRadolanReader:
         R in mm/h über:
         Z = 256 * R 1.42
         
-        Umstellen der Formel nach R:
-        Z = aR^b <==> R = (Z/a)^1/b = (10^dBZ/10 /a)^1/b
-        
         s. http://radar-info.fzk.de/abc.html -> Reflektivität
+        
+        The whole array is converted at once. NaN (nodata) pixels are left untouched,
+        clutter pixels (249) are converted like all other values.
         """
         
-        """ By default, the nditer treats the input operand as a read-only object.
-        To be able to modify the array elements, you must specify either read-write
-        or write-only mode using the ‘readwrite’ or ‘writeonly’ per-operand flags. """
-        ''' -> Fehler mit älteren NumPy-Versionen?
-        with np.nditer(self._data, op_flags=['readwrite']) as it:
-            for x in it:
-                x[...] = (x / 2) - 32.5
-        '''
+        valid = ~np.isnan(self._data)
+        rvp6 = self._data[valid]
         
-        # Konstanten: vor allem abhängig von der Art des Niederschlags (Tropfenspektrum):
-        a = 256
-        b = 1.42
+        # X products are 1 byte products: with precision 1 there are only 256 possible
+        # values, so simply look them up in a precomputed table:
+        if self._meta['precision'] == 1.0:
+            self._data[valid] = _rvp6_to_mm5min_lut(self._zr_a, self._zr_b)[rvp6.astype(np.uint8)]
+        else:
+            self._data[valid] = dbz_to_mm5min(rvp6_to_dbz(rvp6), self._zr_a, self._zr_b)
         
-        for x in np.nditer(self._data, op_flags=['readwrite']):
-            if x == self._missing:
-                continue
-            
-            # dBZ:
-            #x[...] = (x / 2) - 32.5
-            dBZ = (x / 2) - 32.5
-            
-            # mm:
-            Z = 10.0 ** (dBZ/10.0)    # ** = Exponent
-            Za = Z / a
-            
-            mm = Za ** (1/b)
-            
-            mm5min = mm/12.0    # mm/h -> mm/5 min
-            
-            x[...] = mm5min
-
-    def _wn_rvp6units_to_dbz(self, arr):
+        self._meta['precision'] = 0.01    # overwrite precision - analog RY
+
+    def _wn_rvp6units_to_dbz(self, arr, precision):
         """
         Calculate the RVP6 units in WN product (in tenths) to dBZ values.
-        !Assumption: Values are already multiplied with 'precision'!
+        !Assumption: 'arr' contains the raw 12 bit values (flags masked out),
+        NOT multiplied with 'precision' yet!
+        Returns a new float array; nodata is set afterwards.
         """
 
         self.out("_wn_rvp6units_to_dbz: calculate dBZ from RVP6 units...")
 
-        """
-        - Create a function that you want to apply on each element of NumPy Array.
-          For example function with name add().
-        - Pass this add() function to the vectorize class. It returns a vectorized function.
-        - Pass the NumPy Array to the vectorized function.
-        - The vectorized function will apply the the earlier assigned function ( add() )
-          to each element of the array and returns a NumPy Array containing the result.
-        """
-        #def to_dbz(val):
-        #    if val in (self._missing, 0):
-        #        return val
-        #    return (val / 2) - 32.5
-
+        """ dBZ: x = pixel value
+        x = x * precision (0.1)
+        x = (x / 2) - 32.5
+        There are only 4096 possible raw values, so the dBZ values are taken
+        from a precomputed table instead of calculating them for every pixel.
+        
         # 02 4E hex (or reverse)
         # = 590 decimal
         # * precision=0.1
         # -> 59
-        #print(to_dbz(59))    # -3.0 dBZ -> OK
-
-        # Apply add() function to array.
-        #rvp6_to_dbz = np.vectorize(to_dbz)
-        #return rvp6_to_dbz(arr)
-        """
-        => This doesn't seem to give correct results
+        # -> -3.0 dBZ
         """
+        return _wn_dbz_lut(precision, np.dtype(self._dtype))[arr]
 
-        #for x in np.nditer(arr, op_flags=["readwrite"]):  # OK
-        with np.nditer(arr, op_flags=['readwrite']) as it:
-            for x in it:
-                if x == self._missing:  # or x == 0:
-                    continue
+    def _flag_field(self, flag):
+        """ Expands one bit of the compact flag field to a full-size field (0/1) """
+        if self._flags is None:
+            return None
+        return ((self._flags & flag) != 0).astype(int).reshape(self.shape)
 
-                """ dBZ: x = pixel value
-                x = x * precision (0.1)
-                x[...] = (x / 2) - 32.5
-                """
-                x[...] = (x / 2) - 32.5
+    def _has_flag(self, flag):
+        """ Check, ob irgendein Pixel das Flag gesetzt hat """
+        if self._flags is None:
+            return False
+        return bool(np.any(self._flags & flag))
 
     def print_meta(self):
         """ print the available attributes """
@@ -643,6 +735,39 @@ class NumpyRadolanReader:
         if b:
             self.out("RVP6 units -> mm/5min")
     
+    @property
+    def dtype(self):
+        return self._dtype
+    @dtype.setter
+    def dtype(self, dtype):
+        """ np.float32 (default) or np.float64, has to be set before 'read()' """
+        self._dtype = dtype
+    
+    @property
+    def use_mmap(self):
+        return self._use_mmap
+    @use_mmap.setter
+    def use_mmap(self, b):
+        self._use_mmap = b
+    
+    @property
+    def quiet(self):
+        return self._quiet
+    
+    @property
+    def zr_a(self):
+        return self._zr_a
+    @zr_a.setter
+    def zr_a(self, a):
+        self._zr_a = a
+    
+    @property
+    def zr_b(self):
+        return self._zr_b
+    @zr_b.setter
+    def zr_b(self, b):
+        self._zr_b = b
+    
     @property
     def prod_id(self):
         """ RW, SF, HG, ... """
@@ -668,10 +793,14 @@ class NumpyRadolanReader:
     
     @property
     def station_flags(self):
+        if self._field_station_flag is None:
+            self._field_station_flag = self._flag_field(FLAG_SECONDARY)
         return self._field_station_flag
     
     @property
     def clutter(self):
+        if self._field_clutter is None:
+            self._field_clutter = self._flag_field(FLAG_CLUTTER)
         return self._field_clutter
     
     @property
@@ -781,10 +910,10 @@ class NumpyRadolanReader:
 
     @property
     def has_interpolated_station_data(self):
-        return np.any(self._field_station_flag == 1)    # Check, ob irgendeine Stelle im Array 1 ist
+        return self._has_flag(FLAG_SECONDARY)
     @property
     def has_clutter(self):
-        return np.any(self._field_clutter == 1)    # Check, ob irgendeine Stelle im Array 1 ist
+        return self._has_flag(FLAG_CLUTTER)
     
     @property
     def is_radklim(self):
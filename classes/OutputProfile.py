@@ -0,0 +1,219 @@
+"""
+Output profiles of the GeoTIFF files, chosen per product family
+
+A profile determines the format (Cloud Optimized GeoTIFF or tiled GeoTIFF
+with internal overviews), the compression with its level, whether a
+predictor is used and the storage of the values: float or integer with
+scale (the precision of the product). It only produces GDAL creation options
+and the integer array, the writing itself is done in 'radolan2raster'.
+
+Configured in 'config.ini', section [Output]:
+    <family> = <format>, <compress>[, <level>[, <predictor yes|no>[, <storage float|integer>]]]
+
+Created on 18.10.2026
+"""
+
+import numpy as np
+
+
+FORMATS = ('cog', 'gtiff')
+STORAGES = ('float', 'integer')
+COMPRESS_METHODS = ('DEFLATE', 'ZSTD', 'LZW', 'LERC', 'LERC_DEFLATE', 'LERC_ZSTD', 'NONE')
+
+# precipitation (float), HG (class codes), WN (dBZ):
+PRODUCT_FAMILIES = ('precipitation', 'class', 'dbz')
+
+BLOCKSIZE = 256    # tile size
+
+# integer storage per product family: (dtype, nodata value, scale factor of the precision, offset)
+#   precipitation: mm with the precision, up to 6553.4
+#   class:         HG class codes
+#   dbz:           WN, dBZ = raw value * precision / 2 - 32.5 -> the raw 12 bit value is stored
+INTEGER_STORAGE = {
+    'precipitation': (np.uint16, 65535, 1.0, 0.0),
+    'class':         (np.uint8,  255,   1.0, 0.0),
+    'dbz':           (np.uint16, 65535, 0.5, -32.5),
+}
+
+
+def product_family(prod_id, is_dbz=False):
+    """ 'precipitation', 'class' or 'dbz' """
+    if prod_id == 'HG':
+        return 'class'
+    if is_dbz:
+        return 'dbz'
+    return 'precipitation'
+
+
+def encode_integers(data, precision, nodata_value, family='precipitation'):
+    """
+    Values as integers in the type of the product family (see INTEGER_STORAGE),
+    e.g. 12.3 mm -> 123 with scale 0.1, -3.0 dBZ -> 590 with scale 0.05 and offset -32.5
+
+    :param data: float array with 'nodata_value' for missing values, not changed
+    :param precision: 1.0, 0.1, 0.01 (NumpyRadolanReader.precision)
+    :param nodata_value: nodata value of 'data'
+    :param family: 'precipitation', 'class' or 'dbz' (product_family())
+    :return: (integer array, scale, offset, nodata value of the integer array) or None,
+             if the values aren't multiples of the scale (e.g. RVP6 in mm)
+             or don't fit into the type
+    """
+
+    dtype, int_nodata, scale_factor, offset = INTEGER_STORAGE[family]
+    scale = precision * scale_factor
+
+    valid = data != nodata_value
+    values = np.rint((data[valid] - offset) / scale)
+
+    # only lossless:
+    if not np.allclose(values * scale + offset, data[valid], rtol=1e-5, atol=0.01 * scale):
+        return None
+
+    # nodata value at the border of the type must not be used by a value:
+    info = np.iinfo(dtype)
+    if values.size and not (info.min <= values.min() and values.max() <= info.max and
+                            not (values == int_nodata).any()):
+        return None
+
+    encoded = np.full(data.shape, int_nodata, dtype=dtype)
+    encoded[valid] = values.astype(dtype)
+    return encoded, scale, offset, int_nodata
+
+
+class OutputProfile:
+    """OutputProfile
+
+    GDAL creation options for one product family
+    """
+
+    def __init__(self, fmt='cog', compress='DEFLATE', level=None, predictor=True, storage='float'):
+        """
+        :param fmt: 'cog' or 'gtiff'
+        :param compress: one of COMPRESS_METHODS; LERC is used lossless (MAX_Z_ERROR=0)
+        :param level: compression level for DEFLATE (1-12) and ZSTD (1-22); None: GDAL default
+        :param predictor: horizontal differencing (2) for integer data, floating point (3) for float data;
+                          not used with LERC and NONE
+        :param storage: 'float' or 'integer' - values as integers with scale, see encode_integers()
+        """
+
+        fmt = fmt.lower()
+        compress = compress.upper()
+        storage = storage.lower()
+
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format '{fmt}', possible: {', '.join(FORMATS)}")
+        if compress not in COMPRESS_METHODS:
+            raise ValueError(f"unknown compression '{compress}', possible: {', '.join(COMPRESS_METHODS)}")
+        if storage not in STORAGES:
+            raise ValueError(f"unknown storage '{storage}', possible: {', '.join(STORAGES)}")
+
+        self._fmt = fmt
+        self._compress = compress
+        self._level = int(level) if level is not None else None
+        self._predictor = predictor
+        self._storage = storage
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def __repr__(self):
+        return f"{self}('{self._fmt}', '{self._compress}', {self._level}, {self._predictor}, '{self._storage}')"
+
+    def __eq__(self, other):
+        return isinstance(other, OutputProfile) and repr(self) == repr(other)
+
+    @classmethod
+    def from_string(cls, s):
+        """
+        'cog, ZSTD, 9' -> OutputProfile; raises ValueError
+        """
+
+        l_items = [item.strip() for item in s.split(',')]
+
+        if not 2 <= len(l_items) <= 5:
+            raise ValueError(f"'{s}': expected '<format>, <compress>[, <level>[, <predictor yes|no>"
+                             "[, <storage float|integer>]]]'")
+
+        fmt, compress = l_items[:2]
+        level = int(l_items[2]) if len(l_items) > 2 and l_items[2] else None    # ValueError
+
+        predictor = True
+        if len(l_items) > 3 and l_items[3]:
+            if l_items[3].lower() not in ('yes', 'no'):
+                raise ValueError(f"'{s}': predictor must be 'yes' or 'no'")
+            predictor = l_items[3].lower() == 'yes'
+
+        storage = l_items[4] if len(l_items) > 4 else 'float'
+
+        return cls(fmt, compress, level, predictor, storage)
+
+    def creation_options(self, is_float=True, driver=None):
+        """
+        :param is_float: data type of the raster - for the predictor
+        :param driver: 'COG' or 'GTiff'; default: the driver of the profile
+                       (GTiff is taken instead of COG, if GDAL has no COG driver)
+        :return: list of GDAL creation options
+        """
+
+        driver = driver or self.driver
+        compress = self._compress
+
+        l_options = [f'COMPRESS={compress}']
+
+        if compress.startswith('LERC'):
+            l_options.append('MAX_Z_ERROR=0')    # lossless
+
+        use_predictor = self._predictor and compress in ('DEFLATE', 'ZSTD', 'LZW')
+
+        if driver == 'COG':
+            l_options += [f'BLOCKSIZE={BLOCKSIZE}', 'RESAMPLING=NEAREST']    # overviews like LayerLoader
+            if self._level is not None and compress not in ('LZW', 'LERC', 'NONE'):
+                l_options.append(f'LEVEL={self._level}')
+            if use_predictor:
+                l_options.append('PREDICTOR=' + ('FLOATING_POINT' if is_float else 'STANDARD'))
+        else:
+            l_options += ['TILED=YES', f'BLOCKXSIZE={BLOCKSIZE}', f'BLOCKYSIZE={BLOCKSIZE}']
+            if self._level is not None:
+                if compress.endswith('DEFLATE'):
+                    l_options.append(f'ZLEVEL={self._level}')
+                elif compress.endswith('ZSTD'):
+                    l_options.append(f'ZSTD_LEVEL={self._level}')
+            if use_predictor:
+                l_options.append('PREDICTOR=' + ('3' if is_float else '2'))
+
+        return l_options
+
+    @property
+    def driver(self):
+        return 'COG' if self._fmt == 'cog' else 'GTiff'
+
+    @property
+    def is_cog(self):
+        return self._fmt == 'cog'
+
+    @property
+    def compress(self):
+        return self._compress
+
+    @property
+    def level(self):
+        return self._level
+
+    @property
+    def predictor(self):
+        return self._predictor
+
+    @property
+    def integer_storage(self):
+        return self._storage == 'integer'
+
+
+# used if nothing is configured:
+default_profile = OutputProfile('cog', 'DEFLATE', 6)
+
+
+
+if __name__ == '__main__':
+    for s in ('cog, DEFLATE, 6', 'gtiff, ZSTD, 9', 'cog, LERC_ZSTD', 'gtiff, LZW, , no', 'cog, ZSTD, 9, , integer'):
+        profile = OutputProfile.from_string(s)
+        print(f"{s:20} -> {profile.creation_options()}")
@@ -0,0 +1,175 @@
+import sys
+import os
+from pathlib import Path
+from collections import namedtuple, deque
+from itertools import islice
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .NumpyRadolanReader import NumpyRadolanReader
+from .BatchWarper        import BatchWarper
+from .OutputProfile      import product_family
+
+
+"""
+Job for one RADOLAN file. The output name is only determined by the file
+itself: <data_root>/<radolan|radklim|polara>/<simple_name><tif_extension>
+'profiles': dict product family -> OutputProfile (Model.output_profiles), optional
+'quiet': no progress output of the reader, e.g. for many files
+"""
+ConvertJob = namedtuple('ConvertJob', ['radolan_file', 'data_root', 'tif_extension',
+                                       'prj_radolan', 'prj_polara', 'prj_dest',
+                                       'shapefile', 'rx_in_mm', 'cache_dir', 'profiles', 'quiet'],
+                        defaults=[None, False])
+
+# all the GUI needs afterwards, without the data array:
+ConvertResult = namedtuple('ConvertResult', ['tif_file', 'prod_id', 'datetime', 'interval',
+                                             'rx_in_mm', 'is_polara', 'statistics'])
+
+
+def convert_file(job):
+    """
+    read -> decode -> warp -> GeoTIFF for one file; runs in a worker process
+
+    :param job: ConvertJob
+    :return: ConvertResult
+    """
+
+    nrr = NumpyRadolanReader(job.radolan_file, job.quiet)    # FileNotFoundError
+    if job.rx_in_mm:
+        nrr.rx_in_mm = True
+    nrr.read()    # Exception
+
+    # bring some order in possible radar data types (same as in ActionTabRADOLANLoader):
+    if nrr.is_radklim:
+        subdir_name = 'radklim'
+    elif nrr.is_polara:
+        subdir_name = 'polara'
+    else:
+        subdir_name = 'radolan'
+
+    data_dir = Path(job.data_root) / subdir_name
+    data_dir.mkdir(parents=True, exist_ok=True)
+    tif_file = data_dir / (nrr.simple_name + job.tif_extension)
+
+    prj_src = job.prj_polara if nrr.is_polara else job.prj_radolan
+
+    # needed for adjusted NODATA value (-1 isn't suitable for negative dBZ):
+    nodata_value = -50.0 if nrr.is_dbz else None
+
+    family = product_family(nrr.prod_id, nrr.is_dbz)
+    profile = (job.profiles or {}).get(family)
+
+    warper = BatchWarper(job.prj_dest, profile, cache_dir=job.cache_dir, mask_file=job.shapefile)
+    warper.warp(nrr.data, nrr.precision, tif_file, prj_src, nodata_value, family)
+
+    return ConvertResult(tif_file, nrr.prod_id, nrr.datetime, nrr.interval,
+                         nrr.rx_in_mm, nrr.is_polara, nrr.get_statistics())
+
+
+def try_convert_file(job):
+    """ convert_file(), but the exception is returned instead of raised """
+    try:
+        return convert_file(job)
+    except Exception as e:
+        return e
+
+
+def mp_context():
+    """
+    'spawn' context with a Python interpreter as executable.
+    Inside QGIS 'sys.executable' may be the QGIS binary, then the
+    interpreter beside it is taken. None, if there is no interpreter.
+    """
+
+    context = multiprocessing.get_context('spawn')
+
+    if Path(sys.executable).name.lower().startswith('python'):
+        return context
+
+    if sys.platform == 'win32':
+        candidates = [Path(sys.exec_prefix) / 'pythonw.exe', Path(sys.exec_prefix) / 'python.exe']
+    else:
+        candidates = [Path(sys.exec_prefix) / 'bin' / f'python{sys.version_info.major}.{sys.version_info.minor}',
+                      Path(sys.exec_prefix) / 'bin' / 'python3']
+
+    for python in candidates:
+        if python.exists():
+            context.set_executable(str(python))
+            return context
+
+    return None
+
+
+class ParallelConverter:
+    """ParallelConverter
+
+    Converts many RADOLAN files into GeoTIFF files in worker processes.
+    Only the output paths and statistics go back to the caller, the data
+    arrays stay in the workers. With one worker (or if no Python
+    interpreter for the worker processes is found) the files are
+    converted in the calling process.
+    """
+
+    def __init__(self, workers=None):
+        """
+        :param workers: number of processes; None or 0: number of CPUs
+        """
+
+        self._workers = workers or os.cpu_count() or 1
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    def run(self, l_jobs, skip_errors=False):
+        """
+        Generator: yields a ConvertResult for every job, in the order of the jobs.
+        Exceptions of a job are raised, when its result is fetched.
+        Closing the generator (e.g. on cancel) drops the files not started yet.
+
+        :param skip_errors: True: the exception of a job is yielded instead of its result,
+                            the other jobs go on (e.g. for cron jobs)
+        """
+
+        func = try_convert_file if skip_errors else convert_file
+
+        workers = min(self._workers, len(l_jobs))
+        context = mp_context() if workers > 1 else None
+
+        if not context:
+            for job in l_jobs:
+                yield func(job)
+            return
+
+        self.out(f"convert {len(l_jobs)} files with {workers} processes")
+
+        # bounded: only a few jobs per process are submitted ahead, so on cancel
+        # the pending ones are simply not submitted (no 'cancel_futures', Python 3.9)
+        max_pending = 2 * workers
+        it_jobs = iter(l_jobs)
+        futures = deque()
+
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        try:
+            for job in islice(it_jobs, max_pending):
+                futures.append(executor.submit(func, job))
+
+            while futures:
+                result = futures.popleft().result()    # Exception of the job
+                for job in islice(it_jobs, 1):
+                    futures.append(executor.submit(func, job))
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @property
+    def workers(self):
+        return self._workers
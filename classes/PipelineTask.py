@@ -0,0 +1,49 @@
+from qgis.core import QgsTask
+
+
+class PipelineTask(QgsTask):
+    """PipelineTask
+
+    Runs the heavy part of a tab action (reading, adding, warping) in the
+    QGIS task manager, so the canvas stays responsive. Everything with
+    QGIS layers and the GUI is done afterwards in 'on_finished', which QGIS
+    calls on the main thread.
+
+    Created on 18.10.2026
+    """
+
+    def __init__(self, description, work, on_finished):
+        """
+        :param work: callable(task) -> result, runs in a background thread.
+                     Reports progress with task.setProgress() and stops
+                     between files if task.isCanceled() - then returns None.
+                     No access to the GUI or QGIS layers here!
+        :param on_finished: callable(result, exception) on the main thread;
+                     result is None, if the task failed or was canceled
+        """
+
+        super().__init__(description, QgsTask.CanCancel)
+
+        self._work = work
+        self._on_finished = on_finished
+
+        self._result = None
+        self._exception = None
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def run(self):
+        """ background thread; an exception mustn't leave this method """
+
+        try:
+            self._result = self._work(self)
+        except Exception as e:
+            self._exception = e
+            return False
+
+        return self._result is not None and not self.isCanceled()
+
+    def finished(self, ok):
+        """ main thread """
+        self._on_finished(self._result if ok else None, self._exception)
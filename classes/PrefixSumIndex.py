@@ -0,0 +1,382 @@
+"""
+PrefixSumIndex
+
+Cumulative sums (prefix sums) of a RADOLAN product for sums over arbitrary
+periods: sum[beg, end] = C(D2) - C(D1) + the few files between 'beg' and
+the next day boundary D1 and between the last day boundary D2 and 'end'.
+
+The raw 12 bit values are summed as integers, so the subtraction is exact.
+Checkpoints C(D) at day boundaries are kept in two levels:
+    month_YYYYMM.npz   sum and valid count of all time steps before the month (uint32)
+    day_YYYYMMDD.npz   sum and valid count from the beginning of the month to the day
+                       (uint16, if possible)
+    running.npz        sum and valid count of the current month up to the last time step
+    indexed.npy        indexed time steps (for a repeated update with the same files)
+    index.json         product, grid, precision, time axis, last time step
+
+The index is built incrementally: update() appends new files and writes a
+checkpoint whenever a day boundary is passed. Late files (older than the
+last indexed one, but not before its first month) are added to the
+following checkpoints of their month and all later monthly checkpoints.
+
+Created on 18.10.2026
+"""
+
+import sys
+import os
+import json
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .NumpyRadolanReader import NumpyRadolanReader
+from .NumpyRadolanAdder  import index_radolan_files, summarize_timestamps
+from .RadolanCube        import CubeSum
+
+
+INDEX_FILE = 'index.json'
+
+
+def _day(dt):
+    return datetime(dt.year, dt.month, dt.day)
+
+
+def _month(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def _next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+class PrefixSumIndex:
+    """PrefixSumIndex
+
+    index = PrefixSumIndex(index_dir)
+    index.update(glob_radolan_files(data_path, 'RW'))            # only new files are read
+    result = index.sum(dt_beg, dt_end, index_radolan_files(...))  # CubeSum, like NumpyRadolanAdder
+
+    The time steps are the intervals of the product (e.g. hourly for RW, daily for SF).
+    Not for WN (dBZ isn't summed linearly), HG and RD.
+    """
+
+    def __init__(self, index_dir, quiet=False):
+        """
+        :param quiet: no progress output of the file readers, e.g. in a background task
+        """
+
+        self._index_dir = Path(index_dir)
+        self._quiet = quiet
+
+        self._meta = None
+        self._indexed = set()    # indexed time steps as index on the time axis
+        self._running = None     # (sum, count) of the current month
+
+        meta_file = self._index_dir / INDEX_FILE
+        if meta_file.exists():
+            self._meta = json.loads(meta_file.read_text())
+            self._indexed = set(np.load(self._index_dir / 'indexed.npy').tolist())
+            self._running = self._load('running')
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    # ........................................................
+    # Build
+
+    def update(self, l_files, progress_callback=None):
+        """
+        Indexes the files not indexed yet, in timestamp order
+
+        :param l_files: file paths, e.g. from glob_radolan_files()
+        :param progress_callback: callable(files_done, files_total) -> False: cancel
+        :return: number of newly indexed files
+        """
+
+        d_files = index_radolan_files([str(f) for f in l_files])
+        n_files = len(d_files)
+        n_new = 0
+        l_off_axis = []    # e.g. hourly SF files, the index has daily time steps
+
+        try:
+            for n_done, dt in enumerate(sorted(d_files), start=1):
+                if not self._meta:
+                    self._create(d_files[dt], dt)
+
+                t = self._time_index(dt)
+                if t is None:
+                    l_off_axis.append(dt)
+                elif t not in self._indexed:
+                    if dt < _month(self.dt0):
+                        raise ValueError(f"'{d_files[dt]}' before the first month of the index,"
+                                         " build a new index")
+                    nrr = NumpyRadolanReader(d_files[dt], self._quiet)    # FileNotFoundError
+                    raw, nodata = nrr.read_raw()
+                    if (nrr.prod_id, nrr.shape, nrr.precision) != (self.prod_id, self.shape, self.precision):
+                        raise ValueError(f"'{d_files[dt]}' doesn't fit into the index of {self.prod_id}")
+
+                    if dt > self.last:
+                        self._append(dt, raw, nodata)
+                    else:
+                        self._patch(dt, raw, nodata)
+                        self._save_state()    # checkpoints changed in place
+                    self._indexed.add(t)
+                    n_new += 1
+
+                if progress_callback and progress_callback(n_done, n_files) is False:
+                    self.out(f"canceled after {n_done} of {n_files} files", False)
+                    break
+        finally:
+            if n_new:
+                self._save_state()
+
+        if l_off_axis:
+            td = min((b - a for a, b in zip(l_off_axis, l_off_axis[1:])), default=timedelta(minutes=self.interval))
+            self.out("{} files not on the time axis of the index (from {} every {} min) - skipped: {}".format(
+                len(l_off_axis), self.dt0, self.interval, summarize_timestamps(l_off_axis, td)), False)
+
+        self.out(f"{n_new} files indexed")
+        return n_new
+
+    def _create(self, radolan_file, dt):
+        nrr = NumpyRadolanReader(radolan_file, self._quiet)
+        nrr.read_raw()    # ValueError: HG, RD
+
+        if nrr.prod_id == 'WN':
+            raise ValueError("dBZ values of 'WN' can't be summed by a prefix index")
+
+        self._meta = {
+            'prod_id':   nrr.prod_id,
+            'nrow':      nrr.shape[0],
+            'ncol':      nrr.shape[1],
+            'precision': nrr.precision,
+            'interval':  int(nrr.interval),
+            'dt0':       dt.isoformat(),    # first time step; earlier ones are late files
+            'last':      (dt - timedelta(minutes=int(nrr.interval))).isoformat(),
+        }
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+
+        zeros = np.zeros(self.shape, dtype=np.uint32)
+        self._running = (zeros, zeros.copy())
+        self._save(f"month_{dt:%Y%m}", zeros, zeros)    # nothing before the first month
+
+        self.out(f"new index '{self._index_dir}': {nrr.prod_id}, from {dt}")
+
+    def _append(self, dt, raw, nodata):
+        """ new time step after the last one; checkpoints of the day boundaries in between """
+
+        # boundaries up to the first day are zero (nothing indexed before):
+        day = max(_day(self.last), _day(self.dt0)) + timedelta(days=1)
+
+        while day <= dt:
+            run_sum, run_count = self._running
+
+            if day.day == 1:    # new month: running sums go into the monthly checkpoint
+                m_sum, m_count = self._load(f"month_{self.last:%Y%m}")
+                self._save(f"month_{day:%Y%m}", m_sum + run_sum, m_count + run_count)
+                self._running = (np.zeros_like(run_sum), np.zeros_like(run_count))
+            else:
+                self._save(f"day_{day:%Y%m%d}", run_sum, run_count)
+
+            self._meta['last'] = (day - timedelta(minutes=self.interval)).isoformat()
+            day += timedelta(days=1)
+
+        valid = ~nodata
+        run_sum, run_count = self._running
+        np.add(run_sum, raw, out=run_sum, where=valid)
+        run_count += valid
+
+        self._meta['last'] = dt.isoformat()
+
+    def _patch(self, dt, raw, nodata):
+        """ late file: added to every checkpoint after 'dt' """
+
+        valid = ~nodata
+        add_sum = np.where(valid, raw, 0).astype(np.uint32)
+        add_count = valid.astype(np.uint32)
+
+        last = self.last
+
+        # daily checkpoints of its month after it:
+        day = _day(dt) + timedelta(days=1)
+        while day <= last and day < _next_month(dt):
+            if day.day != 1:
+                cp = self._load(f"day_{day:%Y%m%d}")
+                d_sum, d_count = cp if cp else (np.zeros(self.shape, np.uint32), np.zeros(self.shape, np.uint32))
+                self._save(f"day_{day:%Y%m%d}", d_sum + add_sum, d_count + add_count)
+            day += timedelta(days=1)
+
+        # monthly checkpoints after its month:
+        month = _next_month(dt)
+        while month <= last:
+            m_sum, m_count = self._load(f"month_{month:%Y%m}")
+            self._save(f"month_{month:%Y%m}", m_sum + add_sum, m_count + add_count)
+            month = _next_month(month)
+
+        # in the current month:
+        if _month(dt) == _month(last):
+            run_sum, run_count = self._running
+            run_sum += add_sum
+            run_count += add_count
+
+    def _save_state(self):
+        run_sum, run_count = self._running
+        self._save('running', run_sum, run_count, compact=False)
+        np.save(self._index_dir / 'indexed.npy', np.array(sorted(self._indexed), dtype=np.int64))
+
+        meta_file = self._index_dir / INDEX_FILE
+        tmp_file = meta_file.with_name(meta_file.name + f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(self._meta, indent=2))
+        tmp_file.replace(meta_file)
+
+    # ........................................................
+    # Query
+
+    def sum(self, dt_beg, dt_end, source, dtype=np.float32):
+        """
+        Sum of the time steps dt_beg, dt_beg + interval, ... <= dt_end with the semantics
+        of NumpyRadolanAdder: nodata values don't count, pixels without any valid value are NaN.
+        'dt_beg' and 'dt_end' are snapped into the period on the time axis of the index
+        (e.g. 00:00 -> 00:50 for RW); time steps on it without indexed file are missing.
+
+        :param source: the files of the edge time steps: {datetime: file} (index_radolan_files())
+                       or a RadolanCube of the product
+        :return: CubeSum
+        """
+
+        td = timedelta(minutes=self.interval)
+        t_beg, t_end = -((self.dt0 - dt_beg) // td), (dt_end - self.dt0) // td    # up, down
+        dt_beg, dt_end = self._dt(t_beg), self._dt(t_end)
+
+        l_dt = [self._dt(t) for t in range(t_beg, t_end + 1)]
+        l_missing = [dt for dt in l_dt if self._time_index(dt) not in self._indexed]
+
+        # day boundaries: all time steps in [d1, d2) are covered by the checkpoints
+        d1 = _day(dt_beg) if dt_beg == _day(dt_beg) else _day(dt_beg) + timedelta(days=1)
+        d2 = _day(dt_end + timedelta(minutes=self.interval))
+
+        acc = np.zeros(self.shape, dtype=np.int64)
+        count = np.zeros(self.shape, dtype=np.int64)
+
+        if d1 < d2:
+            s2, c2 = self._cumulative(d2)
+            s1, c1 = self._cumulative(d1)
+            acc += s2
+            acc -= s1
+            count += c2
+            count -= c1
+            l_edges = [dt for dt in l_dt if dt < d1 or dt >= d2]
+        else:
+            l_edges = l_dt
+
+        for dt in l_edges:
+            if self._time_index(dt) not in self._indexed:
+                continue
+            if isinstance(source, dict):
+                raw, nodata = NumpyRadolanReader(source[dt], self._quiet).read_raw()    # KeyError: file missing
+            else:
+                raw, nodata = source.read_raw(dt)
+            valid = ~nodata
+            np.add(acc, raw, out=acc, where=valid)
+            count += valid
+
+        count_dtype = np.uint16 if len(l_dt) <= np.iinfo(np.uint16).max else np.uint32
+
+        sum_field = (acc * self.precision).astype(dtype)
+        sum_field[count == 0] = np.nan
+
+        n_present = len(l_dt) - len(l_missing)
+        return CubeSum(sum_field, count.astype(count_dtype), n_present * self.interval, l_missing)
+
+    def _cumulative(self, day):
+        """ (sum, count) of all indexed time steps before the day boundary 'day' """
+
+        if day <= _month(self.dt0):
+            zeros = np.zeros(self.shape, dtype=np.int64)
+            return zeros, zeros
+
+        # all indexed time steps are before 'day':
+        if day > self.last:
+            m_sum, m_count = self._load(f"month_{self.last:%Y%m}")
+            run_sum, run_count = self._running
+            return m_sum.astype(np.int64) + run_sum, m_count.astype(np.int64) + run_count
+
+        m_sum, m_count = self._load(f"month_{day:%Y%m}")
+        m_sum, m_count = m_sum.astype(np.int64), m_count.astype(np.int64)
+
+        cp = self._load(f"day_{day:%Y%m%d}") if day.day != 1 else None
+        if cp:    # not there for the days before the first file
+            m_sum += cp[0]
+            m_count += cp[1]
+
+        return m_sum, m_count
+
+    # ........................................................
+
+    def _time_index(self, dt):
+        """ index of 'dt' on the time axis; None if not on it """
+        t, rest = divmod(dt - self.dt0, timedelta(minutes=self.interval))
+        return None if rest else t
+
+    def _dt(self, t):
+        return self.dt0 + t * timedelta(minutes=self.interval)
+
+    def _load(self, name):
+        try:
+            with np.load(self._index_dir / f"{name}.npz") as npz:
+                return npz['sum'].astype(np.uint32), npz['count'].astype(np.uint32)
+        except FileNotFoundError:
+            return None
+
+    def _save(self, name, a_sum, a_count, compact=True):
+        """ atomic; uint16, if the values fit (daily checkpoints) """
+
+        if compact:
+            a_sum, a_count = [a.astype(np.uint16) if a.max(initial=0) <= np.iinfo(np.uint16).max else a
+                              for a in (a_sum, a_count)]
+
+        npz_file = self._index_dir / f"{name}.npz"
+        tmp_file = npz_file.with_name(npz_file.name + f".{os.getpid()}.tmp")
+        with tmp_file.open('wb') as f:
+            np.savez_compressed(f, sum=a_sum, count=a_count)
+        tmp_file.replace(npz_file)
+
+    @property
+    def index_dir(self):
+        return self._index_dir
+
+    @property
+    def exists(self):
+        return self._meta is not None
+
+    @property
+    def prod_id(self):
+        return self._meta['prod_id']
+
+    @property
+    def shape(self):
+        return self._meta['nrow'], self._meta['ncol']
+
+    @property
+    def precision(self):
+        return self._meta['precision']
+
+    @property
+    def interval(self):
+        return self._meta['interval']
+
+    @property
+    def dt0(self):
+        return datetime.fromisoformat(self._meta['dt0'])
+
+    @property
+    def last(self):
+        """ last indexed time step (of the in-order files) """
+        return datetime.fromisoformat(self._meta['last'])
@@ -0,0 +1,515 @@
+"""
+RadolanCube
+
+Chunked on-disk store of one RADOLAN product as time x row x col cube.
+The raw 12 bit values are kept as uint16 with a separate nodata bitmask,
+so a sum, statistic or time series reads a few chunk files instead of
+opening and decompressing thousands of single files.
+
+Layout of a store directory:
+    cube.json                   product, grid, precision, time axis, chunking
+    t<k>/present.npy            bool (time_chunk,): time steps already ingested
+    t<k>/r<i>_c<j>.npy          uint16 (time_chunk, tile rows, tile cols): raw values
+    t<k>/r<i>_c<j>.mask.npy     uint8: nodata bitmask, bits packed along the columns
+With 'compress' the two arrays of a tile are stored together compressed in
+'t<k>/r<i>_c<j>.npz' instead - smaller, but not memory-mappable.
+
+Time chunk k holds the time steps [k * time_chunk, (k+1) * time_chunk) after
+the first time step of the store - negative for files older than the first
+ingest ('t-00001'); the spatial tiles are 'tile' x 'tile' pixels.
+A map of one time step reads one slice of every tile of a chunk, a pixel
+series reads only the tile of the pixel.
+
+Created on 18.10.2026
+"""
+
+import sys
+import os
+import json
+import argparse
+from math import gcd
+from pathlib import Path
+from datetime import datetime, timedelta
+from collections import namedtuple
+
+import numpy as np
+
+from .NumpyRadolanReader import NumpyRadolanReader, _wn_dbz_lut
+from .NumpyRadolanAdder  import glob_radolan_files, index_radolan_files, summarize_timestamps
+
+
+CUBE_FILE = 'cube.json'
+DEFAULT_TILE = 300    # 900 x 900 grid: 3 x 3 tiles
+SUM_BLOCK = 24        # time steps reduced at once (memory)
+
+# result of RadolanCube.sum(); sum_field is NaN where no time step had a valid value
+CubeSum = namedtuple('CubeSum', ['sum_field', 'valid_count', 'interval_minutes', 'missing'])
+
+
+class RadolanCube:
+    """RadolanCube
+
+    Ingest (idempotent, time steps already stored are skipped):
+        cube = RadolanCube(store_dir)
+        cube.ingest(glob_radolan_files(data_path, 'RW'))
+    Query:
+        cube.read(dt)                       -> 2D float array like NumpyRadolanReader.data
+        cube.series(row, col, beg, end)     -> (datetimes, values)
+        cube.sum(beg, end)                  -> CubeSum, like NumpyRadolanAdder
+    """
+
+    def __init__(self, store_dir, tile=DEFAULT_TILE, compress=False):
+        """
+        :param store_dir: directory of the store; created with the first ingest
+        :param tile: edge length of the spatial tiles - only for a new store
+        :param compress: compressed tiles (not memory-mappable) - only for a new store
+        """
+
+        self._store_dir = Path(store_dir)
+        self._tile = tile
+        self._compress = compress
+
+        self._meta = None
+        meta_file = self._store_dir / CUBE_FILE
+        if meta_file.exists():
+            self._meta = json.loads(meta_file.read_text())
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    # ........................................................
+    # Ingest
+
+    def ingest(self, l_files, progress_callback=None):
+        """
+        Stores the files in the cube. The timestamps are taken from the file
+        names like in NumpyRadolanAdder; time steps already stored are skipped,
+        so an ingest can be repeated with a growing file list - also with older
+        files. Files off the time axis of the store are skipped.
+
+        :param l_files: file paths, e.g. from glob_radolan_files()
+        :param progress_callback: callable(files_done, files_total) -> False: cancel
+        :return: number of ingested files
+        """
+
+        d_files = index_radolan_files([str(f) for f in l_files])
+        if not d_files:
+            return 0
+
+        if not self._meta:
+            self._create(d_files)
+
+        # group by time chunk:
+        d_chunks = {}
+        l_off_axis = []
+        for dt in sorted(d_files):
+            try:
+                t = self._time_index(dt)
+            except ValueError:
+                l_off_axis.append(dt)
+                continue
+            k, t_local = divmod(t, self.time_chunk)
+            d_chunks.setdefault(k, []).append((t_local, d_files[dt]))
+
+        if l_off_axis:
+            self.out("{} files not on the time axis (from {} every {} min) - skipped: {}".format(
+                len(l_off_axis), self.dt0, self.step,
+                summarize_timestamps(l_off_axis, timedelta(minutes=self.step))), False)
+
+        n_files = len(d_files) - len(l_off_axis)
+        n_done = n_ingested = 0
+
+        for k, l_entries in sorted(d_chunks.items()):
+            present = self._load_present(k)
+            l_new = [(t_local, f) for t_local, f in l_entries if not present[t_local]]
+
+            if l_new:
+                self._ingest_chunk(k, l_new, present)
+                n_ingested += len(l_new)
+
+            n_done += len(l_entries)
+            if progress_callback and progress_callback(n_done, n_files) is False:
+                self.out(f"canceled after {n_done} of {n_files} files", False)
+                break
+
+        self.out(f"{n_ingested} files ingested, {n_files - n_ingested} already stored")
+        return n_ingested
+
+    def _create(self, d_files):
+        """ properties of the store from the first file; the time step from the timestamps """
+
+        l_dt = sorted(d_files)
+
+        nrr = NumpyRadolanReader(d_files[l_dt[0]])
+        nrr.read_raw()    # ValueError: not supported product
+
+        interval = int(nrr.interval)
+
+        # step of the time axis: e.g. 60 minutes for hourly SF files (interval 1440)
+        step = interval
+        for dt_a, dt_b in zip(l_dt, l_dt[1:]):
+            step = gcd(step, int((dt_b - dt_a).total_seconds() // 60))
+
+        # first step of the day, so that every chunk starts at the same time of day:
+        midnight = datetime(l_dt[0].year, l_dt[0].month, l_dt[0].day)
+        dt0 = midnight + (l_dt[0] - midnight) % timedelta(minutes=step)
+
+        nrow, ncol = nrr.shape
+
+        self._meta = {
+            'prod_id':    nrr.prod_id,
+            'nrow':       nrow,
+            'ncol':       ncol,
+            'interval':   interval,
+            'precision':  nrr.precision,
+            'step':       step,
+            'dt0':        dt0.isoformat(),
+            'time_chunk': min(96, max(24, 1440 // step)),
+            'tile':       self._tile,
+            'compress':   self._compress,
+        }
+
+        self._store_dir.mkdir(parents=True, exist_ok=True)
+        meta_file = self._store_dir / CUBE_FILE
+        tmp_file = meta_file.with_name(meta_file.name + f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(self._meta, indent=2))
+        tmp_file.replace(meta_file)
+
+        self.out(f"new store '{self._store_dir}': {nrr.prod_id} {nrow}x{ncol}, step {step} min")
+
+    def _ingest_chunk(self, k, l_new, present):
+        """ writes the new time steps of chunk k; 'present' is updated after the data """
+
+        chunk_dir = self._chunk_dir(k)
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+
+        d_tiles = {(i, j): self._open_tile(k, i, j, writable=True) for i, j in self._tiles()}
+
+        for t_local, radolan_file in l_new:
+            nrr = NumpyRadolanReader(radolan_file)    # FileNotFoundError
+            raw, nodata = nrr.read_raw()
+            self._check_file(nrr, radolan_file)
+
+            for (i, j), (values, mask) in d_tiles.items():
+                rows, cols = self._tile_slices(i, j)
+                values[t_local] = raw[rows, cols]
+                mask[t_local] = np.packbits(nodata[rows, cols], axis=-1)
+
+        for (i, j), (values, mask) in d_tiles.items():
+            self._save_tile(k, i, j, values, mask)
+
+        # at last: a chunk interrupted before is ingested again
+        present[[t_local for t_local, _ in l_new]] = True
+        np.save(chunk_dir / 'present.npy', present)
+
+    def _check_file(self, nrr, radolan_file):
+        if (nrr.prod_id, nrr.shape, nrr.precision) != (self.prod_id, self.shape, self.precision):
+            raise ValueError(f"'{radolan_file}': {nrr.prod_id} {nrr.shape} precision {nrr.precision}"
+                             f" doesn't fit into the store ({self.prod_id} {self.shape} {self.precision})")
+
+    # ........................................................
+    # Query
+
+    def read(self, dt, dtype=np.float32):
+        """
+        One time step, decoded like NumpyRadolanReader.read() (without 'rx_in_mm')
+
+        :return: 2D float array, NaN for nodata; KeyError if the time step isn't stored
+        """
+        return self._decode(*self.read_raw(dt), dtype)
+
+    def read_raw(self, dt):
+        """
+        One time step like NumpyRadolanReader.read_raw()
+
+        :return: (uint16 raw values, bool nodata); KeyError if the time step isn't stored
+        """
+
+        k, t_local = divmod(self._time_index(dt), self.time_chunk)
+        if not self._load_present(k)[t_local]:
+            raise KeyError(dt)
+
+        raw = np.empty(self.shape, dtype=np.uint16)
+        nodata = np.empty(self.shape, dtype=bool)
+
+        for i, j in self._tiles():
+            values, mask = self._open_tile(k, i, j)
+            rows, cols = self._tile_slices(i, j)
+            raw[rows, cols] = values[t_local]
+            nodata[rows, cols] = self._unpack(mask[t_local], cols)
+
+        return raw, nodata
+
+    def series(self, row, col, dt_beg, dt_end, dtype=np.float32):
+        """
+        Values of one pixel (row, col in RADOLAN order, first row south) for every
+        time step of the store in [dt_beg, dt_end]; only the tile of the pixel is read.
+
+        :return: (list of datetimes, 1D float array with NaN for nodata and missing time steps)
+        """
+
+        t_beg, t_end = self._time_index(dt_beg), self._time_index(dt_end)
+        i, j = row // self.tile, col // self.tile
+        r, c = row % self.tile, col % self.tile
+
+        values_out = np.full(max(t_end - t_beg + 1, 0), np.nan, dtype=dtype)
+
+        for k in range(t_beg // self.time_chunk, t_end // self.time_chunk + 1):
+            present = self._load_present(k)
+            if not present.any():
+                continue
+
+            lo = max(t_beg, k * self.time_chunk)
+            hi = min(t_end, (k + 1) * self.time_chunk - 1)
+            local = np.arange(lo, hi + 1) - k * self.time_chunk
+
+            values, mask = self._open_tile(k, i, j)
+            raw = np.asarray(values[local, r, c])
+            nodata = ((mask[local, r, c // 8] >> (7 - c % 8)) & 1).astype(bool) | ~present[local]
+            values_out[lo - t_beg:hi - t_beg + 1] = self._decode(raw, nodata, dtype)
+
+        l_dt = [self.dt0 + (t_beg + t) * timedelta(minutes=self.step) for t in range(t_end - t_beg + 1)]
+        return l_dt, values_out
+
+    def sum(self, dt_beg, dt_end, dtype=np.float32, progress_callback=None):
+        """
+        Sum of the time steps dt_beg, dt_beg + interval, ... <= dt_end with the
+        semantics of NumpyRadolanAdder: nodata values don't count, pixels without any
+        valid value are NaN. The chunks are reduced one after another.
+
+        :param progress_callback: callable(chunks_done, chunks_total) -> False: cancel
+        :return: CubeSum; None if canceled
+        """
+
+        stride = self.interval // self.step if self.interval % self.step == 0 else 1
+        t_beg, t_end = self._time_index(dt_beg), self._time_index(dt_end)
+        l_t = list(range(t_beg, t_end + 1, stride))
+
+        steps = len(l_t)
+        count_dtype = np.uint16 if steps <= np.iinfo(np.uint16).max else np.uint32
+
+        is_dbz = self.prod_id == 'WN'
+        acc = np.zeros(self.shape, dtype=np.float64 if is_dbz else np.int64)
+        count = np.zeros(self.shape, dtype=count_dtype)
+        lut = _wn_dbz_lut(self.precision, np.dtype(np.float64)) if is_dbz else None
+
+        d_chunks = {}
+        for t in l_t:
+            d_chunks.setdefault(t // self.time_chunk, []).append(t % self.time_chunk)
+
+        l_missing = []
+        n_present = 0
+
+        for n_chunk, (k, l_local) in enumerate(sorted(d_chunks.items()), start=1):
+            present = self._load_present(k)
+            local = np.array([t for t in l_local if present[t]], dtype=np.intp)
+            l_missing += [self._dt(k * self.time_chunk + t) for t in l_local if not present[t]]
+            n_present += local.size
+
+            if local.size:
+                for i, j in self._tiles():
+                    values, mask = self._open_tile(k, i, j)
+                    rows, cols = self._tile_slices(i, j)
+
+                    for b in range(0, local.size, SUM_BLOCK):
+                        idx = local[b:b + SUM_BLOCK]
+                        raw = np.asarray(values[idx])
+                        valid = ~self._unpack(np.asarray(mask[idx]), cols)
+
+                        if is_dbz:
+                            acc[rows, cols] += np.where(valid, lut[raw], 0.0).sum(axis=0)
+                        else:
+                            acc[rows, cols] += np.where(valid, raw, 0).sum(axis=0, dtype=np.int64)
+                        count[rows, cols] += valid.sum(axis=0, dtype=count_dtype)
+
+            if progress_callback and progress_callback(n_chunk, len(d_chunks)) is False:
+                self.out(f"sum canceled after {n_chunk} of {len(d_chunks)} chunks", False)
+                return None
+
+        sum_field = (acc if is_dbz else acc * self.precision).astype(dtype)
+        sum_field[count == 0] = np.nan
+
+        return CubeSum(sum_field, count, n_present * self.interval, l_missing)
+
+    def timestamps(self):
+        """ datetimes of all stored time steps """
+
+        l_dt = []
+        for k in sorted(int(chunk_dir.name[1:]) for chunk_dir in self._store_dir.glob('t*')):
+            present = self._load_present(k)
+            l_dt += [self._dt(k * self.time_chunk + t) for t in np.flatnonzero(present)]
+        return l_dt
+
+    # ........................................................
+    # Chunks and tiles
+
+    def _time_index(self, dt):
+        """
+        global index of the time step 'dt', negative before the first one of the store;
+        ValueError, if not on the time axis of the store
+        """
+
+        if not self._meta:
+            raise ValueError(f"store '{self._store_dir}' is empty")
+
+        minutes, rest = divmod((dt - self.dt0).total_seconds(), 60)
+        t, off = divmod(int(minutes), self.step)
+        if rest or off:
+            raise ValueError(f"{dt} isn't a time step of the store (from {self.dt0} every {self.step} min)")
+        return t
+
+    def _dt(self, t):
+        return self.dt0 + t * timedelta(minutes=self.step)
+
+    def _chunk_dir(self, k):
+        return self._store_dir / f"t{k:06d}"
+
+    def _tiles(self):
+        return [(i, j) for i in range(-(-self.shape[0] // self.tile))
+                       for j in range(-(-self.shape[1] // self.tile))]
+
+    def _tile_slices(self, i, j):
+        return (slice(i * self.tile, min((i + 1) * self.tile, self.shape[0])),
+                slice(j * self.tile, min((j + 1) * self.tile, self.shape[1])))
+
+    def _tile_shape(self, i, j):
+        rows, cols = self._tile_slices(i, j)
+        return rows.stop - rows.start, cols.stop - cols.start
+
+    def _load_present(self, k):
+        try:
+            return np.load(self._chunk_dir(k) / 'present.npy')
+        except FileNotFoundError:
+            return np.zeros(self.time_chunk, dtype=bool)
+
+    def _open_tile(self, k, i, j, writable=False):
+        """
+        (values, mask) of a tile; memory-mapped if not compressed.
+        Not existing tiles: all nodata (new arrays, writable=True: files created).
+        """
+
+        nr, nc = self._tile_shape(i, j)
+        shape_values = (self.time_chunk, nr, nc)
+        shape_mask = (self.time_chunk, nr, -(-nc // 8))
+        base = self._chunk_dir(k) / f"r{i}_c{j}"
+
+        if self.compress:
+            try:
+                with np.load(base.with_suffix('.npz')) as npz:
+                    return npz['values'], npz['mask']
+            except FileNotFoundError:
+                return np.zeros(shape_values, np.uint16), np.full(shape_mask, 0xFF, np.uint8)
+
+        values_file, mask_file = base.with_suffix('.npy'), base.with_suffix('.mask.npy')
+
+        if values_file.exists():
+            mode = 'r+' if writable else 'r'
+            return np.load(values_file, mmap_mode=mode), np.load(mask_file, mmap_mode=mode)
+
+        if not writable:
+            return np.zeros(shape_values, np.uint16), np.full(shape_mask, 0xFF, np.uint8)
+
+        values = np.lib.format.open_memmap(values_file, mode='w+', dtype=np.uint16, shape=shape_values)
+        mask = np.lib.format.open_memmap(mask_file, mode='w+', dtype=np.uint8, shape=shape_mask)
+        mask[:] = 0xFF    # nodata
+        return values, mask
+
+    def _save_tile(self, k, i, j, values, mask):
+        base = self._chunk_dir(k) / f"r{i}_c{j}"
+
+        if self.compress:
+            npz_file = base.with_suffix('.npz')
+            tmp_file = npz_file.with_name(npz_file.name + f".{os.getpid()}.tmp")
+            with tmp_file.open('wb') as f:
+                np.savez_compressed(f, values=values, mask=mask)
+            tmp_file.replace(npz_file)
+        else:
+            values.flush()
+            mask.flush()
+
+    @staticmethod
+    def _unpack(packed, cols):
+        """ packed bitmask (..., bytes) -> bool (..., columns of the tile) """
+        return np.unpackbits(packed, axis=-1, count=cols.stop - cols.start).astype(bool)
+
+    def _decode(self, raw, nodata, dtype):
+        """ raw values -> float values with NaN, the same operations as NumpyRadolanReader """
+
+        if self.prod_id == 'WN':
+            data = _wn_dbz_lut(self.precision, np.dtype(dtype))[raw]
+        else:
+            data = raw.astype(dtype)
+            data *= self.precision
+        data[nodata] = np.nan
+        return data
+
+    # ........................................................
+
+    @property
+    def store_dir(self):
+        return self._store_dir
+
+    @property
+    def exists(self):
+        return self._meta is not None
+
+    @property
+    def prod_id(self):
+        return self._meta['prod_id']
+
+    @property
+    def shape(self):
+        return self._meta['nrow'], self._meta['ncol']
+
+    @property
+    def interval(self):
+        """ interval of the product in minutes, e.g. 1440 for SF """
+        return self._meta['interval']
+
+    @property
+    def step(self):
+        """ minutes between the time steps of the store, e.g. 60 for hourly SF files """
+        return self._meta['step']
+
+    @property
+    def precision(self):
+        return self._meta['precision']
+
+    @property
+    def dt0(self):
+        return datetime.fromisoformat(self._meta['dt0'])
+
+    @property
+    def time_chunk(self):
+        return self._meta['time_chunk']
+
+    @property
+    def tile(self):
+        return self._meta['tile']
+
+    @property
+    def compress(self):
+        return self._meta['compress']
+
+
+
+if __name__ == '__main__':
+
+    # ingest command, e.g.: python3 -m classes.RadolanCube /data/rw RW /data/cube_rw
+
+    parser = argparse.ArgumentParser(description="Ingests RADOLAN files into a chunked cube store")
+    parser.add_argument("data_path", help="directory with the RADOLAN files")
+    parser.add_argument("prod_id", help="product, e.g. RW")
+    parser.add_argument("store_dir", help="directory of the cube store")
+    parser.add_argument("--tile", type=int, default=DEFAULT_TILE, help="edge length of the spatial tiles")
+    parser.add_argument("--compress", action="store_true", help="compressed tiles (not memory-mappable)")
+    args = parser.parse_args()
+
+    cube = RadolanCube(args.store_dir, tile=args.tile, compress=args.compress)
+    cube.ingest(glob_radolan_files(args.data_path, args.prod_id))
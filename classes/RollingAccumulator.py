@@ -0,0 +1,359 @@
+"""
+RollingAccumulator
+
+Rolling sums over the last 1, 6, 24, 72 hours (like SF, D2, D3) for files
+arriving one after another, e.g. RW every 60 or YW every 5 minutes.
+Every update reads only the new file: its raw values are added to the
+window sums and the grid leaving a window is subtracted. The grids of the
+longest window are kept as raw uint16 values with a packed nodata mask in
+a ring buffer on disk, the window sums as integers - so the sums are exact
+and a restart continues with the persisted state.
+
+State directory:
+    state.json          product, grid, precision, interval, windows (written once)
+    sums.npz            sum and valid count of every window, time step in every slot
+                        (-1: empty) and last time step - replaced atomically per update
+    ring_values.npy     uint16 (slots, rows, cols), memory-mapped
+    ring_mask.npy       uint8 (slots, rows, bytes): nodata bitmask
+    pending.npz         grid of an update, until it is copied into the ring
+
+An update is committed by replacing 'sums.npz'. The new grid is written to
+'pending.npz' before and copied into the ring after that - so an interrupted
+update is either lost completely (the file can simply be added again) or
+completed on the next start.
+
+Created on 18.10.2026
+"""
+
+import sys
+import os
+import json
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .NumpyRadolanReader import NumpyRadolanReader
+from .NumpyRadolanAdder  import NumpyRadolanAdder, index_radolan_files
+from .RadolanCube        import CubeSum
+
+
+STATE_FILE = 'state.json'
+SUMS_FILE = 'sums.npz'
+PENDING_FILE = 'pending.npz'
+DEFAULT_WINDOWS = (1, 6, 24, 72)    # hours
+
+
+class RollingAccumulator:
+    """RollingAccumulator
+
+    acc = RollingAccumulator(state_dir)
+    acc.update(new_file)          # one file read
+    acc.window_sum(24)            # CubeSum of the last 24 hours
+    acc.adder(72)                 # the same as NumpyRadolanAdder, e.g. for writing the GeoTIFF
+
+    Files older than the last one are added, as long as they are in the
+    longest window; time steps already added are skipped.
+    Not for WN (dBZ), HG and RD.
+    """
+
+    def __init__(self, state_dir, windows=DEFAULT_WINDOWS):
+        """
+        :param state_dir: directory of the persisted state
+        :param windows: window lengths in hours - only for a new state
+        """
+
+        self._state_dir = Path(state_dir)
+        self._windows = tuple(sorted(windows))
+
+        self._meta = None
+        self._sums = None      # {hours: (sum uint32, count uint16)}
+        self._ring_values = self._ring_mask = None
+        self._ring_time = None    # time step in every slot, saved with the sums
+
+        # without sums the state was never committed:
+        if (self._state_dir / SUMS_FILE).exists():
+            self._load_state()
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def out(self, s, ok=True):
+        if ok:
+            print(f"{self}: {s}")
+        else:
+            print(f"{self}: {s}", file=sys.stderr)
+
+    # ........................................................
+
+    def update_files(self, l_files):
+        """ update() for several files in timestamp order; :return: number of added files """
+        d_files = index_radolan_files([str(f) for f in l_files])
+        return sum(self.update(d_files[dt], dt) for dt in sorted(d_files))
+
+    def update(self, radolan_file, dt=None):
+        """
+        Adds one file to the windows
+
+        :param dt: timestamp; None: from the file name
+        :return: True if added, False if already there or too old
+        """
+
+        if dt is None:
+            dt = next(iter(index_radolan_files([str(radolan_file)])), None)
+            if dt is None:
+                raise ValueError(f"no timestamp in file name '{radolan_file}'")
+
+        nrr = NumpyRadolanReader(radolan_file)    # FileNotFoundError
+        raw, nodata = nrr.read_raw()    # ValueError: HG, RD
+
+        if not self._meta:
+            self._create(nrr, dt)
+        elif (nrr.prod_id, nrr.shape, nrr.precision) != (self.prod_id, self.shape, self.precision):
+            raise ValueError(f"'{radolan_file}' doesn't fit into the accumulator of {self.prod_id}")
+
+        if dt < self.dt0:
+            self.out(f"'{radolan_file}' older than the state - skipped", False)
+            return False
+
+        t = self._time_index(dt)
+        last = self._meta['last']
+        slot = t % self.slots
+
+        if t <= last:
+            if self._ring_time[slot] == t:
+                return False    # duplicate
+            if t <= last - self._steps(self._windows[-1]):
+                self.out(f"'{radolan_file}' older than the longest window - skipped", False)
+                return False
+        else:
+            self._advance(t)
+
+        valid = ~nodata
+
+        for hours, (w_sum, w_count) in self._sums.items():
+            if t > self._meta['last'] - self._steps(hours):    # in the window
+                np.add(w_sum, raw, out=w_sum, where=valid)
+                w_count += valid
+        self._ring_time[slot] = t
+
+        self._commit(slot, t, raw, np.packbits(nodata, axis=-1))
+        return True
+
+    def _advance(self, t):
+        """ moves the windows to time step t: grids leaving a window are subtracted """
+
+        last = self._meta['last']
+        longest = self._steps(self._windows[-1])
+
+        if t - last >= longest:    # nothing stays in any window
+            for w_sum, w_count in self._sums.values():
+                w_sum[:] = 0
+                w_count[:] = 0
+            self._ring_time[:] = -1
+        else:
+            for new in range(last + 1, t + 1):
+                for hours, (w_sum, w_count) in self._sums.items():
+                    leaving = new - self._steps(hours)
+                    slot = leaving % self.slots
+                    if leaving >= 0 and self._ring_time[slot] == leaving:
+                        valid = ~self._unpack(self._ring_mask[slot])
+                        np.subtract(w_sum, self._ring_values[slot], out=w_sum, where=valid)
+                        w_count -= valid
+                if new < t:    # gap: no file for this time step
+                    self._ring_time[new % self.slots] = -1
+
+        self._meta['last'] = t
+
+    # ........................................................
+
+    def window_sum(self, hours, dtype=np.float32):
+        """
+        Sum of the last 'hours' up to the last time step, with the semantics of
+        NumpyRadolanAdder: pixels without any valid value are NaN
+
+        :return: CubeSum
+        """
+
+        w_sum, w_count = self._sums[hours]
+
+        last = self._meta['last']
+        l_steps = range(last - self._steps(hours) + 1, last + 1)
+        l_missing = [self._dt(t) for t in l_steps if t < 0 or self._ring_time[t % self.slots] != t]
+
+        sum_field = (w_sum * self.precision).astype(dtype)
+        sum_field[w_count == 0] = np.nan
+
+        n_present = len(l_steps) - len(l_missing)
+        return CubeSum(sum_field, w_count.copy(), n_present * self.interval, l_missing)
+
+    def adder(self, hours):
+        """ window sum as NumpyRadolanAdder with result, like after 'run()' """
+
+        dt_end = self.last
+        dt_beg = dt_end - timedelta(minutes=(self._steps(hours) - 1) * self.interval)
+
+        adder = NumpyRadolanAdder(dt_beg, dt_end, None, self.prod_id, None)
+        adder._take_result(self.window_sum(hours), self.interval, self.precision)
+        return adder
+
+    # ........................................................
+
+    def _create(self, nrr, dt):
+        if nrr.prod_id == 'WN':
+            raise ValueError("dBZ values of 'WN' can't be summed")
+
+        interval = int(nrr.interval)
+        for hours in self._windows:
+            if (hours * 60) % interval:
+                raise ValueError(f"window of {hours} h isn't a multiple of the interval ({interval} min)")
+
+        self._meta = {
+            'prod_id':   nrr.prod_id,
+            'nrow':      nrr.shape[0],
+            'ncol':      nrr.shape[1],
+            'precision': nrr.precision,
+            'interval':  interval,
+            'windows':   list(self._windows),
+            'dt0':       dt.isoformat(),
+            'last':      -1,    # time step index
+        }
+
+        self._state_dir.mkdir(parents=True, exist_ok=True)
+
+        nrow, ncol = self.shape
+        self._sums = {hours: (np.zeros(self.shape, np.uint32), np.zeros(self.shape, np.uint16))
+                      for hours in self._windows}
+
+        # one slot more than the longest window: the grid leaving it is still there,
+        # when the new one arrives
+        slots = self.slots
+        self._ring_values = np.lib.format.open_memmap(self._state_dir / 'ring_values.npy', mode='w+',
+                                                      dtype=np.uint16, shape=(slots, nrow, ncol))
+        self._ring_mask = np.lib.format.open_memmap(self._state_dir / 'ring_mask.npy', mode='w+',
+                                                    dtype=np.uint8, shape=(slots, nrow, -(-ncol // 8)))
+        self._ring_time = np.full(slots, -1, dtype=np.int64)
+
+        pending_file = self._state_dir / PENDING_FILE
+        if pending_file.exists():    # left over from an uncommitted state
+            pending_file.unlink()
+        (self._state_dir / STATE_FILE).write_text(json.dumps(self._static_meta(), indent=2))
+
+        self.out(f"new state '{self._state_dir}': {nrr.prod_id}, windows {self._windows} h")
+
+    def _static_meta(self):
+        return {key: value for key, value in self._meta.items() if key != 'last'}
+
+    def _load_state(self):
+        self._meta = json.loads((self._state_dir / STATE_FILE).read_text())
+        self._windows = tuple(self._meta['windows'])
+
+        with np.load(self._state_dir / SUMS_FILE) as npz:
+            self._sums = {hours: (npz[f'sum_{hours}'], npz[f'count_{hours}']) for hours in self._windows}
+            self._ring_time = npz['ring_time']
+            self._meta['last'] = int(npz['last'])
+
+        self._ring_values = np.load(self._state_dir / 'ring_values.npy', mmap_mode='r+')
+        self._ring_mask = np.load(self._state_dir / 'ring_mask.npy', mmap_mode='r+')
+
+        pending_file = self._state_dir / PENDING_FILE
+        if pending_file.exists():
+            try:
+                with np.load(pending_file) as npz:
+                    slot, t = int(npz['slot']), int(npz['t'])
+                    if self._ring_time[slot] == t:    # committed, but not yet in the ring
+                        self.out(f"completing the interrupted update of {self._dt(t)}")
+                        self._write_slot(slot, npz['values'], npz['mask'])
+            except (OSError, ValueError, KeyError):    # incomplete: the update wasn't committed
+                pass
+            pending_file.unlink()
+
+    def _commit(self, slot, t, values, mask):
+        """
+        1. grid -> 'pending.npz'
+        2. sums, slot times, last time step -> 'sums.npz' (atomic replace: committed)
+        3. grid -> ring, 'pending.npz' removed
+        The ring slot is overwritten only after the commit - before that the
+        saved state may still need its old grid.
+        """
+
+        pending_file = self._state_dir / PENDING_FILE
+        self._atomic_savez(pending_file, slot=slot, t=t, values=values, mask=mask)
+
+        d_arrays = {'ring_time': self._ring_time, 'last': self._meta['last']}
+        for hours, (w_sum, w_count) in self._sums.items():
+            d_arrays[f'sum_{hours}'] = w_sum
+            d_arrays[f'count_{hours}'] = w_count
+        self._atomic_savez(self._state_dir / SUMS_FILE, **d_arrays)
+
+        self._write_slot(slot, values, mask)
+        pending_file.unlink()
+
+    def _write_slot(self, slot, values, mask):
+        self._ring_values[slot] = values
+        self._ring_mask[slot] = mask
+        self._ring_values.flush()
+        self._ring_mask.flush()
+
+    @staticmethod
+    def _atomic_savez(npz_file, **d_arrays):
+        tmp_file = npz_file.with_name(npz_file.name + f".{os.getpid()}.tmp")
+        with tmp_file.open('wb') as f:
+            np.savez(f, **d_arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_file.replace(npz_file)
+
+    def _time_index(self, dt):
+        t, rest = divmod(dt - self.dt0, timedelta(minutes=self.interval))
+        if rest or t < 0:
+            raise ValueError(f"{dt} isn't a time step after {self.dt0} (every {self.interval} min)")
+        return t
+
+    def _dt(self, t):
+        return self.dt0 + t * timedelta(minutes=self.interval)
+
+    def _steps(self, hours):
+        return hours * 60 // self.interval
+
+    def _unpack(self, packed):
+        return np.unpackbits(packed, axis=-1, count=self.shape[1]).astype(bool)
+
+    # ........................................................
+
+    @property
+    def state_dir(self):
+        return self._state_dir
+
+    @property
+    def windows(self):
+        return self._windows
+
+    @property
+    def slots(self):
+        return self._steps(self._windows[-1]) + 1
+
+    @property
+    def prod_id(self):
+        return self._meta['prod_id']
+
+    @property
+    def shape(self):
+        return self._meta['nrow'], self._meta['ncol']
+
+    @property
+    def precision(self):
+        return self._meta['precision']
+
+    @property
+    def interval(self):
+        return self._meta['interval']
+
+    @property
+    def dt0(self):
+        return datetime.fromisoformat(self._meta['dt0'])
+
+    @property
+    def last(self):
+        """ datetime of the last time step """
+        return self._dt(self._meta['last'])
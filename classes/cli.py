@@ -0,0 +1,351 @@
+"""
+radolan2map without QGIS: command line and Python API
+
+Reads, sums, reprojects, clips and writes GeoTIFF / COG files with NumPy and
+GDAL only - for cron jobs on machines without display. The settings come
+from 'config.ini' ([Output] profiles, [Processing] workers, [Paths] data_root
+and CUT_TO), the options override them.
+
+Usage (in the plugin dir):
+    python3 -m classes.cli convert "/data/dwd/rw/raa01-rw_*---bin*" --begin 2023-07-01 --end 2023-07-31T23:50
+    python3 -m classes.cli sum /data/dwd/rw RW 2023-07-01T00:50 2023-07-31T23:50 --split day --clip
+    python3 -m classes.cli watch /data/dwd/incoming --data-root /data/radolan2map
+
+Exit status: 0 ok, 1 if a file or a period failed.
+
+Python:
+    from classes import cli
+    l_files = cli.find_files(["/data/dwd/rw/*---bin*"], dt_beg, dt_end)
+    l_results = cli.convert_files(l_files, "/data/radolan2map")
+    tif_file = cli.sum_period("/data/dwd/rw", "RW", dt_beg, dt_end, "/data/radolan2map")
+
+Created on 18.10.2026
+"""
+
+import sys
+import re
+import signal
+import argparse
+from glob import glob
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from .Config             import Config
+from .NumpyRadolanReader import read_header_only
+from .NumpyRadolanAdder  import NumpyRadolanAdder, index_radolan_files, glob_radolan_files
+from .PrefixSumIndex     import PrefixSumIndex
+from .BatchWarper        import BatchWarper
+from .ParallelConverter  import ParallelConverter, ConvertJob, mp_context
+from .DirectoryWatcher   import DirectoryWatcher, is_radar_file
+from .OutputProfile      import OutputProfile
+from . import def_projections
+
+
+PRJ_RADOLAN = def_projections.projs[0][1]
+PRJ_POLARA  = def_projections.projs[1][1]
+DEFAULT_PRJ = 'EPSG:3035'
+
+SPLITS = ('none', 'day', 'month')
+
+# WN2212242200_000.bz2, HG2212101900_000
+_COMPOSITE_FILE_TIMESTAMP = re.compile(r'^(?:WN|HG)(\d{10})')
+
+
+def out(s, ok=True):
+    if ok:
+        print(f"radolan2map: {s}")
+    else:
+        print(f"radolan2map: {s}", file=sys.stderr)
+
+
+def file_timestamp(fn):
+    """ timestamp in the file name; None if there is none """
+
+    name = Path(fn).name
+
+    dt = next(iter(index_radolan_files([name])), None)
+    if dt:
+        return dt
+
+    m = _COMPOSITE_FILE_TIMESTAMP.match(name)
+    return datetime.strptime(m.group(1), "%y%m%d%H%M") if m else None
+
+
+def find_files(l_patterns, dt_beg=None, dt_end=None):
+    """
+    RADOLAN files of glob patterns ('**' for subdirectories), optionally in a period
+
+    :param l_patterns: glob patterns or file paths
+    :param dt_beg, dt_end: including; None: open
+    :return: sorted list of file paths (str), each only once
+    """
+
+    l_files = set()
+
+    for pattern in l_patterns:
+        for fn in glob(str(pattern), recursive=True):
+            if not is_radar_file(Path(fn).name) or not Path(fn).is_file():
+                continue
+            if dt_beg or dt_end:
+                dt = file_timestamp(fn)
+                if not dt or (dt_beg and dt < dt_beg) or (dt_end and dt > dt_end):
+                    continue
+            l_files.add(fn)
+
+    return sorted(l_files)
+
+
+def convert_files(l_files, data_root, prj_dest=DEFAULT_PRJ, shapefile=None, rx_in_mm=False,
+                  profiles=None, workers=None):
+    """
+    Every file into a GeoTIFF <data_root>/<radolan|radklim|polara>/<name>.tif in worker processes,
+    the same as the loader of the plugin
+
+    :param shapefile: clip to this mask, the files get the extension '_clipped.tif'
+    :param profiles: dict product family -> OutputProfile; None: default profile
+    :param workers: processes; None: number of CPUs
+    :return: list of ConvertResult or the exception, in the order of the files
+    """
+
+    data_root = Path(data_root)
+    tif_extension = '_clipped.tif' if shapefile else '.tif'
+
+    l_jobs = [ConvertJob(str(f), str(data_root), tif_extension, PRJ_RADOLAN, PRJ_POLARA, prj_dest,
+                         shapefile, rx_in_mm, str(data_root / 'warp_cache'), profiles)
+              for f in l_files]
+
+    return list(ParallelConverter(workers).run(l_jobs, skip_errors=True))
+
+
+def sum_period(data_path, prod_id, dt_beg, dt_end, data_root, prj_dest=DEFAULT_PRJ, shapefile=None,
+               profile=None, threads=1, index_dir=None):
+    """
+    Sum of a product over a period into <data_root>/sum/<PROD>_<beg>-<end>.tif, like the adder of the plugin
+
+    :param data_path: directory of the RADOLAN files
+    :param threads: threads for reading the files (NumpyRadolanAdder 'workers')
+    :param index_dir: directory of a PrefixSumIndex of the product; None: the files are added
+    :return: GeoTIFF file (Path)
+    """
+
+    adder = NumpyRadolanAdder(dt_beg, dt_end, str(data_path), prod_id, None, workers=threads)
+    if index_dir:
+        adder.prefix_index = PrefixSumIndex(index_dir)
+    adder.run()    # FileNotFoundError
+
+    df = '%Y%m%d%H%M'
+    tif_file = Path(data_root) / 'sum' / f"{prod_id.upper()}_{dt_beg.strftime(df)}-{dt_end.strftime(df)}.tif"
+    tif_file.parent.mkdir(parents=True, exist_ok=True)
+
+    warper = BatchWarper(prj_dest, profile, cache_dir=Path(data_root) / 'warp_cache', mask_file=shapefile)
+    warper.warp(adder.sum_field, adder.precision, tif_file, PRJ_RADOLAN)
+
+    return tif_file
+
+
+def _sum_period_job(kwargs):
+    """ sum_period() in a worker process; the exception is returned """
+    try:
+        return sum_period(**kwargs)
+    except Exception as e:
+        return e
+
+
+def product_interval(data_path, prod_id):
+    """ interval of a product in minutes, from the header of its first file """
+
+    l_files = sorted(glob_radolan_files(data_path, prod_id))
+    if not l_files:
+        raise FileNotFoundError(f"no files of '{prod_id}' in '{data_path}'")
+
+    attrs = read_header_only(l_files[0])
+    interval = attrs['intervalseconds'] / 60
+    if attrs.get('interval_unit', 0) == 1:    # days
+        interval *= 1440
+
+    return int(interval)
+
+
+def split_period(dt_beg, dt_end, split, interval):
+    """
+    Consecutive periods of a day or a month (from the time of 'dt_beg' on), the last one up to 'dt_end'
+
+    :param split: 'none', 'day' or 'month'
+    :param interval: of the product in minutes - a period ends one interval before the next one begins
+    :return: list of (beg, end)
+    """
+
+    if split == 'none':
+        return [(dt_beg, dt_end)]
+
+    if split == 'month' and dt_beg.day > 28:
+        raise ValueError("monthly periods must begin on day 1-28")
+
+    l_periods = []
+    beg = dt_beg
+    while beg <= dt_end:
+        if split == 'day':
+            nxt = beg + timedelta(days=1)
+        else:
+            nxt = beg.replace(year=beg.year + beg.month // 12, month=beg.month % 12 + 1)
+        l_periods.append((beg, min(nxt - timedelta(minutes=interval), dt_end)))
+        beg = nxt
+
+    return l_periods
+
+
+def sum_periods(data_path, prod_id, l_periods, data_root, prj_dest=DEFAULT_PRJ, shapefile=None,
+                profile=None, workers=None, index_dir=None):
+    """
+    sum_period() for several periods, one process per period.
+    With a PrefixSumIndex the periods are summed one after the other (the index is updated once).
+
+    :return: list of GeoTIFF files or the exception, in the order of the periods
+    """
+
+    l_kwargs = [dict(data_path=str(data_path), prod_id=prod_id, dt_beg=beg, dt_end=end,
+                     data_root=str(data_root), prj_dest=prj_dest, shapefile=shapefile, profile=profile,
+                     index_dir=index_dir)
+                for beg, end in l_periods]
+
+    workers = workers or Config().workers
+    processes = min(workers, len(l_kwargs))
+    context = mp_context() if processes > 1 and not index_dir else None
+
+    if not context:    # one period after the other, the files read in threads
+        for kwargs in l_kwargs:
+            kwargs['threads'] = workers
+        return [_sum_period_job(kwargs) for kwargs in l_kwargs]
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        return list(executor.map(_sum_period_job, l_kwargs))
+
+
+# ............................................................
+
+def _datetime(s):
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{s}': expected e.g. 2023-07-01T00:50")
+
+
+def _profile(s):
+    try:
+        return OutputProfile.from_string(s)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _create_parser():
+    # options of all commands:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', help="config file; default: config.ini of the plugin")
+    common.add_argument('--data-root', help="output root; default: [Paths] data_root in config.ini")
+    common.add_argument('--epsg', type=int, help=f"target projection (default: {DEFAULT_PRJ})")
+    common.add_argument('--clip', action='store_true', help="clip to [Paths] CUT_TO of config.ini")
+    common.add_argument('--shapefile', help="clip to this shape file")
+    common.add_argument('--workers', type=int, help="processes; default: [Processing] workers")
+
+    parser = argparse.ArgumentParser(prog='radolan2map',
+                                     description="RADOLAN files to GeoTIFF / COG without QGIS")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('convert', parents=[common], help="every file into a GeoTIFF")
+    p.add_argument('patterns', nargs='+', help="files or glob patterns (quoted, '**' for subdirectories)")
+    p.add_argument('--begin', type=_datetime, help="only files from this timestamp on")
+    p.add_argument('--end', type=_datetime, help="only files up to this timestamp")
+    p.add_argument('--rx-in-mm', action='store_true', help="RX, WX, EX in mm instead of RVP6 units")
+
+    p = subparsers.add_parser('sum', parents=[common], help="sum of a product over a period")
+    p.add_argument('data_path', help="directory of the RADOLAN files")
+    p.add_argument('prod_id', help="product, e.g. RW")
+    p.add_argument('begin', type=_datetime, help="first timestamp, e.g. 2023-07-01T00:50")
+    p.add_argument('end', type=_datetime, help="last timestamp")
+    p.add_argument('--split', choices=SPLITS, default='none', help="one sum per day or month")
+    p.add_argument('--index-dir', help="PrefixSumIndex directory: sums by checkpoints")
+    p.add_argument('--profile', type=_profile, help="output profile, e.g. 'cog, ZSTD, 9'; default: [Output]")
+
+    p = subparsers.add_parser('watch', parents=[common], help="convert new files of a directory (see DirectoryWatcher)")
+    p.add_argument('watch_dir', help="directory of the incoming files")
+    p.add_argument('--rx-in-mm', action='store_true', help="RX, WX, EX in mm instead of RVP6 units")
+    p.add_argument('--settle', type=float, default=2.0, help="seconds without change (default: 2)")
+    p.add_argument('--poll', type=float, default=5.0, help="seconds between scans without inotify")
+    p.add_argument('--no-inotify', action='store_true', help="polling only, e.g. on network file systems")
+
+    return parser
+
+
+def main(argv=None):
+    """ :return: exit status """
+
+    parser = _create_parser()
+    args = parser.parse_args(argv)
+
+    config = Config(args.config)
+
+    data_root = Path(args.data_root) if args.data_root else config.data_root
+    if not data_root:
+        parser.error("no data root: --data-root or [Paths] data_root in config.ini")
+
+    prj_dest = f"EPSG:{args.epsg}" if args.epsg else DEFAULT_PRJ
+    shapefile = args.shapefile
+    if args.clip and not shapefile:
+        shapefile = config.default_border_shape
+        if not shapefile:
+            parser.error("no shape file for clipping")
+    workers = args.workers or config.workers
+
+    if args.command == 'convert':
+        l_files = find_files(args.patterns, args.begin, args.end)
+        if not l_files:
+            out("no files found", False)
+            return 1
+
+        out(f"convert {len(l_files)} files -> '{data_root}'")
+        l_results = convert_files(l_files, data_root, prj_dest, shapefile, args.rx_in_mm,
+                                  config.output_profiles, workers)
+
+        n_failed = 0
+        for fn, result in zip(l_files, l_results):
+            if isinstance(result, Exception):
+                out(f"'{fn}': {result}", False)
+                n_failed += 1
+            else:
+                print(f"  {result.tif_file}")
+
+        out(f"{len(l_files) - n_failed} converted, {n_failed} failed")
+        return 1 if n_failed else 0
+
+    if args.command == 'sum':
+        profile = args.profile or config.output_profile('precipitation')
+        l_periods = split_period(args.begin, args.end, args.split,
+                                 product_interval(args.data_path, args.prod_id))
+
+        l_results = sum_periods(args.data_path, args.prod_id, l_periods, data_root, prj_dest, shapefile,
+                                profile, workers, args.index_dir)
+
+        n_failed = 0
+        for (beg, end), result in zip(l_periods, l_results):
+            if isinstance(result, Exception):
+                out(f"{beg} - {end}: {result}", False)
+                n_failed += 1
+            else:
+                print(f"  {result}")
+
+        return 1 if n_failed else 0
+
+    # watch:
+    job = ConvertJob(None, str(data_root), '_clipped.tif' if shapefile else '.tif', PRJ_RADOLAN, PRJ_POLARA,
+                     prj_dest, shapefile, args.rx_in_mm, str(data_root / 'warp_cache'), config.output_profiles)
+    watcher = DirectoryWatcher(args.watch_dir, job, workers, args.settle, args.poll, not args.no_inotify)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+    watcher.run()
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
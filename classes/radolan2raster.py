@@ -0,0 +1,217 @@
+"""
+Converts RADOLAN data to a warped raster file (geotiff) without ESRI ASCII grid
+
+The data array (from NumpyRadolanReader or NumpyRadolanAdder) is put into a
+GDAL in-memory dataset with the geotransform of the ASCII grid, which is
+warped from there. So the text serialization and parsing of the ASCII grid
+is skipped. The result corresponds to converting the ASCII grid written by
+ASCIIGridWriter: the same grid origin, nodata value and data type Float32
+(GDAL reads the ASCII grid as Float32 because of the float nodata value).
+
+Created on 18.10.2026
+"""
+
+from pathlib import Path
+
+import numpy as np
+from osgeo import gdal
+from osgeo import osr
+from osgeo import gdal_array
+
+from .ASCIIGridWriter import lower_left_corner, cellsize, default_nodata_value
+from .OutputProfile   import default_profile, encode_integers
+
+gdal.UseExceptions()  # Enable exceptions
+
+
+OVERVIEW_LEVELS = [2, 4, 8, 16]    # the same levels as LayerLoader used to build with 'gdal:overviews'
+
+
+def geotransform(shape):
+    """
+    GDAL geotransform of a RADOLAN grid, the same as GDAL determines for
+    the ESRI ASCII grid written by ASCIIGridWriter.
+
+    :param shape: (nrows, ncols) of the data
+    :return: tuple (x0, cellsize, 0, y_top, 0, -cellsize)
+    """
+    nrows = shape[0]
+    x0, y0 = lower_left_corner(nrows)    # NotImplementedError
+    return (x0, cellsize, 0, y0 + nrows * cellsize, 0, -cellsize)
+
+
+def prepare_array(np_2Ddata, precision, nodata_value=None):
+    """
+    Float32 array with nodata value instead of NaN, as GDAL reads the ASCII grid
+
+    :param np_2Ddata: float array; not changed
+    :param precision: 1.0, 0.1, 0.01 - for 1.0 the values are truncated like in the ASCII grid
+    :param nodata_value: replaces NaN, default like ASCIIGridWriter
+    """
+
+    if nodata_value is None:
+        nodata_value = default_nodata_value
+
+    data = np.trunc(np_2Ddata) if precision == 1.0 else np_2Ddata    # '%d' in ASCII grid
+    return np.where(np.isnan(data), np.float32(nodata_value), data).astype(np.float32)
+
+
+def srs_wkt(prj):
+    """ WKT of a projection given as proj4 string or 'EPSG:xxxx' """
+    srs = osr.SpatialReference()
+    srs.SetFromUserInput(prj)
+    return srs.ExportToWkt()
+
+
+def array2mem_dataset(np_2Ddata, precision, prj_src, nodata_value=None):
+    """
+    Creates a GDAL in-memory dataset from a RADOLAN data array
+
+    :param np_2Ddata: float array, first row is the southern row (RADOLAN order); not changed
+    :param precision: 1.0, 0.1, 0.01 - for 1.0 the values are truncated like in the ASCII grid
+    :param prj_src: projection of the data, e.g. 'Model.projection_radolan'
+    :param nodata_value: replaces NaN, default like ASCIIGridWriter
+    :return: gdal.Dataset (driver 'MEM')
+    """
+
+    if nodata_value is None:
+        nodata_value = default_nodata_value
+
+    nrows, ncols = np_2Ddata.shape
+
+    data = prepare_array(np_2Ddata, precision, nodata_value)
+
+    ds = gdal.GetDriverByName('MEM').Create('', ncols, nrows, 1, gdal.GDT_Float32)
+    ds.SetGeoTransform(geotransform(np_2Ddata.shape))
+    ds.SetProjection(srs_wkt(prj_src))
+
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(nodata_value)
+    band.WriteArray(np.flipud(data))    # GDAL: first row is the northern row
+
+    return ds
+
+
+def output_driver(profile):
+    """ 'COG' or 'GTiff'; GTiff for a COG profile, if GDAL has no COG driver (< 3.1) """
+
+    if profile.is_cog and gdal.GetDriverByName('COG') is None:
+        return 'GTiff'
+    return profile.driver
+
+
+def warp_dataset(ds_in, tif_file, prj_src, prj_dest, shapefile=None, profile=None):
+    """
+    gdal.Warp of a dataset into a GeoTIFF file, optional clipped to a mask
+
+    :param ds_in: gdal.Dataset, e.g. from array2mem_dataset()
+    :param tif_file: output file
+    :param prj_src: source projection
+    :param prj_dest: destination projection, e.g. 'EPSG:3035'
+    :param shapefile: mask (cutline), optional
+    :param profile: OutputProfile, default: 'OutputProfile.default_profile'
+    """
+
+    profile = profile or default_profile
+    driver = output_driver(profile)
+    is_float = ds_in.GetRasterBand(1).DataType in (gdal.GDT_Float32, gdal.GDT_Float64)
+    creation_options = profile.creation_options(is_float, driver)
+
+    # with clipping:
+    if shapefile:
+        ds_out = gdal.Warp(str(tif_file), ds_in, format=driver,
+                           cutlineDSName=f'{shapefile}', cropToCutline=True,
+                           srcSRS=prj_src, dstSRS=prj_dest,
+                           creationOptions=creation_options)
+    # without clipping:
+    else:
+        ds_out = gdal.Warp(str(tif_file), ds_in, format=driver,
+                           srcSRS=prj_src, dstSRS=prj_dest,
+                           creationOptions=creation_options)
+
+    if driver != 'COG':    # COG: overviews built by the driver
+        build_overviews(ds_out)
+    ds_out = None    # close, write file
+
+
+def write_array(tif_file, data, geotransform, projection, nodata_value, profile=None, precision=None,
+                family='precipitation'):
+    """
+    Writes a (warped) array into a GeoTIFF file with the options of 'profile'
+
+    :param data: 2D array in GDAL order (first row north)
+    :param projection: WKT
+    :param profile: OutputProfile, default: 'OutputProfile.default_profile'
+    :param precision: 1.0, 0.1, 0.01 - needed for the integer storage of the profile
+    :param family: product family - integer type and offset of the integer storage
+    """
+
+    profile = profile or default_profile
+
+    scale = offset = None
+    if profile.integer_storage and precision:
+        encoded = encode_integers(data, precision, nodata_value, family)
+        if encoded:
+            data, scale, offset, nodata_value = encoded
+        else:
+            print(f"write_array: values of '{Path(tif_file).name}' not storable as integers, writing float")
+
+    driver = output_driver(profile)
+    creation_options = profile.creation_options(data.dtype.kind == 'f', driver)
+
+    nrows, ncols = data.shape
+    data_type = gdal_array.NumericTypeCodeToGDALTypeCode(data.dtype)
+
+    # the COG driver can only copy an existing dataset:
+    if driver == 'COG':
+        ds = gdal.GetDriverByName('MEM').Create('', ncols, nrows, 1, data_type)
+    else:
+        ds = gdal.GetDriverByName('GTiff').Create(str(tif_file), ncols, nrows, 1, data_type,
+                                                  options=creation_options)
+    ds.SetGeoTransform(geotransform)
+    ds.SetProjection(projection)
+
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(nodata_value)
+    if scale:    # physical value = stored value * scale + offset
+        band.SetScale(scale)
+        band.SetOffset(offset)
+    band.WriteArray(data)
+
+    if driver == 'COG':
+        gdal.GetDriverByName('COG').CreateCopy(str(tif_file), ds, options=creation_options)
+    else:
+        build_overviews(ds)    # internal, QGIS needs no pyramids building
+
+    ds = None    # close, write file
+
+
+def build_overviews(ds, resampling='NEAREST'):
+    """
+    Internal overviews (pyramids) of a GeoTIFF dataset opened for writing.
+    Built while the file is still open, so QGIS doesn't need to build
+    them afterwards.
+
+    :param ds: gdal.Dataset, e.g. just created or opened with gdal.GA_Update
+    :param resampling: 'NEAREST' like the former 'RESAMPLING': 0 of 'gdal:overviews'
+    """
+    ds.BuildOverviews(resampling, OVERVIEW_LEVELS)
+
+
+def radolan2raster(np_2Ddata, precision, tif_file: Path, prj_src, prj_dest, shapefile=None, nodata_value=None,
+                   profile=None) -> None:
+    """
+    Converts a RADOLAN data array to a warped raster file (geotiff)
+
+    :param np_2Ddata: float array with NaN as nodata
+    :param precision: 1.0, 0.1, 0.01
+    :param tif_file: output raster file
+    :param prj_src: source projection
+    :param prj_dest: destination projection
+    :param shapefile: mask (cutline), optional
+    :param nodata_value: e.g. -50.0 for dBZ products, default: -1.0
+    :param profile: OutputProfile, optional
+    """
+    ds_in = array2mem_dataset(np_2Ddata, precision, prj_src, nodata_value)
+    warp_dataset(ds_in, tif_file, prj_src, prj_dest, shapefile, profile)
+    ds_in = None    # release memory
@@ -0,0 +1,63 @@
+# conftest.py
+
+import sys
+from pathlib import Path
+from datetime import datetime
+
+import pytest
+
+# make 'classes' importable without installing the plugin into QGIS:
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+EXAMPLE_RW = Path(__file__).resolve().parent.parent / "example/sample_file/raa01-rw_10000-1708020250-dwd---bin.gz"
+
+
+def write_radolan_file(path, prod_id, binary, nrow, ncol, precision="E-01", interval=60, extra="",
+                       ddhhmm="020250"):
+    """ Writes a minimal RADOLAN composite file (header + ETX + binary part), August 2017 """
+    head = f"{prod_id}{ddhhmm}100000817"
+    body = f"VS 3SW   2.16.0PR {precision}INT{interval:4d}GP{nrow:4d}x{ncol:4d}{extra}"
+    # BY: length of the whole file (header + ETX + binary part)
+    size = len(head) + len("BY") + 7 + len(body) + 1 + len(binary)
+    header = f"{head}BY{size:7d}{body}"
+    Path(path).write_bytes(header.encode() + b'\x03' + binary)
+    return Path(path)
+
+
+@pytest.fixture
+def radolan_file(tmp_path):
+    """ Factory: radolan_file(name, prod_id, binary, nrow, ncol, ...) -> Path """
+    def _factory(name, *args, **kwargs):
+        return write_radolan_file(tmp_path / name, *args, **kwargs)
+    return _factory
+
+
+def write_rw_files(directory, l_dt, nodata=0.3, seed=23, nrow=900, ncol=900):
+    """
+    Writes RW files with random values, one per time step; pixel (0, 0) is nodata in all files
+
+    :param l_dt: datetimes in August 2017 or hours of 02.08.2017 (hh:50)
+    :param nodata: share of the pixels with nodata flag
+    :return: list of Path
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    files = []
+    for dt in l_dt:
+        if isinstance(dt, int):
+            dt = datetime(2017, 8, 2, dt, 50)
+        raw = rng.integers(0, 4096, size=nrow * ncol, dtype=np.uint16)
+        raw[rng.random(raw.size) < nodata] |= 0x2000    # nodata flag
+        raw[0] = 0x29C4    # nodata in all files
+        files.append(write_radolan_file(Path(directory) / f"raa01-rw_10000-{dt:%y%m%d%H%M}-dwd---bin", "RW",
+                                        raw.astype('<u2').tobytes(), nrow, ncol, ddhhmm=f"{dt:%d%H%M}"))
+    return files
+
+
+@pytest.fixture
+def rw_files(tmp_path):
+    """ Factory: rw_files(l_dt, ...) -> list of Path, see write_rw_files() """
+    def _factory(l_dt, **kwargs):
+        return write_rw_files(tmp_path, l_dt, **kwargs)
+    return _factory
@@ -0,0 +1,40 @@
+# test_ascii_grid_writer.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.ASCIIGridWriter import ASCIIGridWriter, _format_rows
+
+
+def _savetxt_reference(path, np_data, fmt, nodata_value=-1.0):
+    """ the former implementation of ASCIIGridWriter.write() without header """
+    np_data = np.copy(np_data)
+    np_data[np.isnan(np_data)] = nodata_value
+    np.savetxt(path, np.flipud(np_data), fmt=fmt, delimiter=' ', newline='\n', header='', comments='')
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("precision, fmt", [(1.0, '%d'), (0.1, '%.1f'), (0.01, '%.2f')])
+def test_write_same_as_savetxt(tmp_path, dtype, precision, fmt):
+    rng = np.random.default_rng(3)
+    data = (rng.integers(0, 40000, size=(900, 900)) * precision).astype(dtype)
+    data[rng.random(data.shape) < 0.3] = np.nan
+    data[0, :10] = [-0.0, -0.04, -12.35, 0.05, 0.15, 2.5, -2.5, 1e6, 0.125, -0.5]
+    
+    asc = tmp_path / "test.asc"
+    ASCIIGridWriter(data, precision, asc).write()
+    
+    *header, body = asc.read_bytes().split(b'\n', 6)
+    assert header[0] == b"ncols     900"
+    assert header[5] == b"nodata_value -1.0"
+    assert body == _savetxt_reference(tmp_path / "ref.asc", data, fmt)
+    
+    # data is not changed:
+    assert np.isnan(data).any()
+
+
+def test_format_rows_fallback():
+    data = np.array([[np.inf, 1e20, -2.25]])
+    assert _format_rows(data, '%.1f') == "inf 100000000000000000000.0 -2.2\n"
@@ -0,0 +1,121 @@
+# test_batch_warper.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+
+from classes.BatchWarper import BatchWarper, WarpGeometry, ClipMask
+from classes.OutputProfile import OutputProfile
+from classes.radolan2raster import radolan2raster
+from classes.def_projections import projs
+
+
+PRJ_RADOLAN = projs[0][1]
+
+
+@pytest.mark.parametrize("prj_dest", ["EPSG:3035", "EPSG:4326"])
+def test_same_as_gdal_warp(tmp_path, prj_dest):
+    rng = np.random.default_rng(11)
+    data = (rng.integers(0, 500, size=(900, 900)) * 0.1).astype(np.float32)
+    data[rng.random(data.shape) < 0.3] = np.nan
+    
+    radolan2raster(data, 0.1, tmp_path / "gdal.tif", PRJ_RADOLAN, prj_dest)
+    BatchWarper(prj_dest).warp(data, 0.1, tmp_path / "batch.tif", PRJ_RADOLAN)
+    
+    ds_gdal = gdal.Open(str(tmp_path / "gdal.tif"))
+    ds_batch = gdal.Open(str(tmp_path / "batch.tif"))
+    
+    assert ds_batch.GetGeoTransform() == pytest.approx(ds_gdal.GetGeoTransform())
+    assert ds_batch.GetRasterBand(1).GetNoDataValue() == ds_gdal.GetRasterBand(1).GetNoDataValue()
+    np.testing.assert_array_equal(ds_batch.ReadAsArray(), ds_gdal.ReadAsArray())
+
+
+def test_geometry_cached():
+    warper = BatchWarper("EPSG:3035")
+    assert warper.geometry((900, 900), PRJ_RADOLAN) is warper.geometry((900, 900), PRJ_RADOLAN)
+
+
+def test_geometry_on_disk(tmp_path):
+    warper = BatchWarper("EPSG:3857", cache_dir=tmp_path)
+    geometry = warper.geometry((900, 900), PRJ_RADOLAN)
+    
+    npz_file = warper._cache_file((900, 900), PRJ_RADOLAN)
+    assert npz_file.exists()
+    
+    loaded = WarpGeometry.load(npz_file, PRJ_RADOLAN, "EPSG:3857")
+    np.testing.assert_array_equal(loaded.index, geometry.index)
+    assert loaded.geotransform == geometry.geotransform
+    
+    # stale: computed for another projection
+    assert WarpGeometry.load(npz_file, projs[1][1], "EPSG:3857") is None
+
+
+def test_clip_mask(tmp_path):
+    # square around Kassel in WGS84 as GeoJSON
+    mask_file = tmp_path / "mask.geojson"
+    mask_file.write_text('{"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {},'
+                         ' "geometry": {"type": "Polygon", "coordinates":'
+                         ' [[[9, 51], [10, 51], [10, 52], [9, 52], [9, 51]]]}}]}')
+    
+    data = np.ones((900, 900), dtype=np.float32)
+    
+    full, gt_full, _ = BatchWarper("EPSG:4326").warp_array(data, 0.1, PRJ_RADOLAN)
+    warper = BatchWarper("EPSG:4326", cache_dir=tmp_path, mask_file=mask_file)
+    clipped, gt, _ = warper.warp_array(data, 0.1, PRJ_RADOLAN)
+    
+    assert clipped.size < full.size
+    assert 8.9 < gt[0] < 9.1 and 51.9 < gt[3] < 52.1
+    assert np.all(clipped == 1.0)    # the whole square is inside the grid
+    assert warper.clip_mask((900, 900), PRJ_RADOLAN) is warper.clip_mask((900, 900), PRJ_RADOLAN)
+    
+    # on disk, stale for another output grid:
+    npz_file = warper._cache_file((900, 900), PRJ_RADOLAN, prefix='mask', extra=str(mask_file))
+    mtime = mask_file.stat().st_mtime_ns
+    geometry = warper.geometry((900, 900), PRJ_RADOLAN)
+    assert ClipMask.load(npz_file, mask_file, mtime, geometry) is not None
+    other = WarpGeometry(geometry.index, (0.0,) + geometry.geotransform[1:], geometry.projection)
+    assert ClipMask.load(npz_file, mask_file, mtime, other) is None
+
+
+def test_internal_overviews(tmp_path):
+    data = np.ones((900, 900), dtype=np.float32)
+    BatchWarper("EPSG:3035", OutputProfile('gtiff')).warp(data, 0.1, tmp_path / "ovr.tif", PRJ_RADOLAN)
+    
+    band = gdal.Open(str(tmp_path / "ovr.tif")).GetRasterBand(1)
+    assert band.GetOverviewCount() == 4
+    assert not (tmp_path / "ovr.tif.ovr").exists()    # internal
+
+
+@pytest.mark.parametrize("profile", ["cog, DEFLATE, 6", "cog, ZSTD, 9", "gtiff, LERC_DEFLATE", "gtiff, LZW, , no"])
+def test_profiles_lossless(tmp_path, profile):
+    rng = np.random.default_rng(17)
+    data = (rng.integers(0, 500, size=(900, 900)) * 0.1).astype(np.float32)
+    
+    BatchWarper("EPSG:3035").warp(data, 0.1, tmp_path / "default.tif", PRJ_RADOLAN)
+    BatchWarper("EPSG:3035", OutputProfile.from_string(profile)).warp(data, 0.1, tmp_path / "p.tif", PRJ_RADOLAN)
+    
+    ds = gdal.Open(str(tmp_path / "p.tif"))
+    assert ds.GetRasterBand(1).GetBlockSize() == [256, 256]
+    assert ds.GetRasterBand(1).GetOverviewCount() > 0
+    np.testing.assert_array_equal(ds.ReadAsArray(), gdal.Open(str(tmp_path / "default.tif")).ReadAsArray())
+
+
+def test_integer_storage(tmp_path):
+    rng = np.random.default_rng(19)
+    data = (rng.integers(0, 4096, size=(900, 900)) * 0.1).astype(np.float32)
+    data[rng.random(data.shape) < 0.3] = np.nan
+    
+    BatchWarper("EPSG:3035").warp(data, 0.1, tmp_path / "float.tif", PRJ_RADOLAN)
+    profile = OutputProfile('cog', 'DEFLATE', 6, storage='integer')
+    BatchWarper("EPSG:3035", profile).warp(data, 0.1, tmp_path / "int.tif", PRJ_RADOLAN)
+    
+    band_f = gdal.Open(str(tmp_path / "float.tif")).GetRasterBand(1)
+    band_i = gdal.Open(str(tmp_path / "int.tif")).GetRasterBand(1)
+    assert band_i.DataType == gdal.GDT_UInt16
+    assert band_i.GetScale() == pytest.approx(0.1)
+    
+    f, i = band_f.ReadAsArray(), band_i.ReadAsArray()
+    np.testing.assert_array_equal(i == band_i.GetNoDataValue(), f == band_f.GetNoDataValue())
+    valid = f != band_f.GetNoDataValue()
+    np.testing.assert_allclose(i[valid] * band_i.GetScale(), f[valid], atol=1e-4)
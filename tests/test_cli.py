@@ -0,0 +1,62 @@
+# test_cli.py
+
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+
+from classes import cli
+
+
+def test_split_period():
+    beg, end = datetime(2017, 8, 1, 0, 50), datetime(2017, 8, 3, 12, 50)
+    assert cli.split_period(beg, end, 'day', 60) == [
+        (datetime(2017, 8, 1, 0, 50), datetime(2017, 8, 1, 23, 50)),
+        (datetime(2017, 8, 2, 0, 50), datetime(2017, 8, 2, 23, 50)),
+        (datetime(2017, 8, 3, 0, 50), end)]
+
+    l_months = cli.split_period(datetime(2017, 11, 1), datetime(2018, 1, 31, 23, 55), 'month', 5)
+    assert [end for _, end in l_months] == [datetime(2017, 11, 30, 23, 55), datetime(2017, 12, 31, 23, 55),
+                                            datetime(2018, 1, 31, 23, 55)]
+
+
+def test_find_files(rw_files, tmp_path):
+    rw_files(range(4))
+    (tmp_path / "readme.txt").write_text("-")
+
+    assert len(cli.find_files([tmp_path / "*"])) == 4
+    l_files = cli.find_files([tmp_path / "raa01-rw_*", tmp_path / "*---bin"],
+                             datetime(2017, 8, 2, 1, 50), datetime(2017, 8, 2, 2, 50))
+    assert [cli.file_timestamp(f).hour for f in l_files] == [1, 2]
+
+
+def test_product_interval(rw_files, tmp_path):
+    rw_files(range(2))
+    assert cli.product_interval(tmp_path, 'RW') == 60
+    with pytest.raises(FileNotFoundError):
+        cli.product_interval(tmp_path, 'YW')
+
+
+def test_convert_with_failed_file(rw_files, tmp_path):
+    files = rw_files(range(3))
+    files[1].write_bytes(files[1].read_bytes()[:1000])    # truncated
+
+    exit_status = cli.main(['convert', str(tmp_path / "raa01-*"), '--data-root', str(tmp_path / "out"),
+                            '--workers', '2'])
+
+    assert exit_status == 1
+    assert sorted(p.name for p in (tmp_path / "out" / "radolan").glob("*.tif")) == [
+        "RW_20170802-0050.tif", "RW_20170802-0250.tif"]
+
+
+def test_sum(rw_files, tmp_path):
+    rw_files(range(6))
+
+    exit_status = cli.main(['sum', str(tmp_path), 'RW', '2017-08-02T00:50', '2017-08-02T05:50',
+                            '--data-root', str(tmp_path / "out"), '--epsg', '3035'])
+    assert exit_status == 0
+
+    ds = gdal.Open(str(tmp_path / "out" / "sum" / "RW_201708020050-201708020550.tif"))
+    assert ds.RasterCount == 1
@@ -0,0 +1,100 @@
+# test_directory_watcher.py
+
+import gzip
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("osgeo.gdal")    # ParallelConverter
+
+from classes.DirectoryWatcher import DirectoryWatcher, is_radar_file, canonical_name
+from classes.ParallelConverter import ConvertJob
+from classes.NumpyRadolanReader import NumpyRadolanReader
+from conftest import write_radolan_file
+
+
+NROW, NCOL = 900, 900
+
+
+def _read_sum(job):
+    """ converter for the tests: reads the file like convert_file, but without GDAL """
+    nrr = NumpyRadolanReader(job.radolan_file)
+    nrr.read()
+    return float(np.nansum(nrr.data[nrr.data >= 0]))
+
+
+def _binary(value):
+    return np.full(NROW * NCOL, value, dtype='<u2').tobytes()
+
+
+def _watcher(tmp_path, use_inotify=False, **kwargs):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir(exist_ok=True)
+    job = ConvertJob(None, str(tmp_path / "data"), '.tif', None, None, 'EPSG:3035', None, False, None)
+    l_converted = []
+    watcher = DirectoryWatcher(incoming, job, settle=0.1, use_inotify=use_inotify, convert=_read_sum,
+                               callback=lambda fn, result: l_converted.append((fn.name, result)), **kwargs)
+    return watcher, incoming, l_converted
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("raa01-rw_10000-1708020250-dwd---bin", True),
+    ("raa01-rw_10000-1708020250-dwd---bin.gz", True),
+    ("WN2212242200_000.bz2", True),
+    ("HG2212101900_000", True),
+    ("raa01-rw_10000-1708020250-dwd---bin.gz.part", False),
+    (".raa01-rw_10000-1708020250-dwd---bin.gz", False),
+    ("WN2212242200_000.tar.bz2", False),
+    ("readme.txt", False),
+])
+def test_is_radar_file(name, expected):
+    assert is_radar_file(name) == expected
+
+
+def test_canonical_name():
+    assert canonical_name("raa01-rw_10000-1708020250-dwd---bin.gz") == "raa01-rw_10000-1708020250-dwd---bin"
+
+
+def test_partial_write_and_duplicates(tmp_path):
+    watcher, incoming, l_converted = _watcher(tmp_path)
+    name = "raa01-rw_10000-1708020250-dwd---bin"
+
+    # incomplete file: fails, not again until it has changed
+    full = write_radolan_file(tmp_path / name, "RW", _binary(10), NROW, NCOL).read_bytes()
+    (incoming / name).write_bytes(full[:len(full) // 2])
+    watcher.drain(timeout=10)
+    assert l_converted == []
+
+    (incoming / name).write_bytes(full)
+    watcher.drain(timeout=10)
+    assert l_converted == [(name, pytest.approx(NROW * NCOL * 1.0))]
+
+    # the same file and its compressed twin are skipped, also after a restart:
+    (incoming / (name + ".gz")).write_bytes(gzip.compress(full))
+    watcher.drain(timeout=10)
+    watcher.close()
+
+    watcher, incoming, l_converted = _watcher(tmp_path)
+    watcher.drain(timeout=10)
+    watcher.close()
+    assert l_converted == []
+    assert len(watcher.journal_file.read_text().splitlines()) == 1
+
+
+def test_inotify(tmp_path):
+    watcher, incoming, l_converted = _watcher(tmp_path, use_inotify=True)
+    if not watcher.uses_inotify:
+        pytest.skip("no inotify")
+
+    names = [f"raa01-rw_10000-17080{h}0250-dwd---bin" for h in (2, 3)]
+    for name in names:
+        write_radolan_file(incoming / name, "RW", _binary(1), NROW, NCOL)
+    (incoming / "readme.txt").write_text("-")
+
+    for _ in range(50):
+        watcher.step(0.1)
+        if len(l_converted) == len(names):
+            break
+    watcher.close()
+
+    assert sorted(name for name, _ in l_converted) == names
@@ -0,0 +1,116 @@
+# test_numpy_radolan_adder.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.NumpyRadolanAdder import NumpyRadolanAdder, index_radolan_files, summarize_timestamps
+from classes.NumpyRadolanReader import NumpyRadolanReader
+
+
+def test_sum_matches_nansum(rw_files, tmp_path):
+    files = rw_files((2, 3, 4))
+    
+    fields = []
+    for f in files:
+        nrr = NumpyRadolanReader(str(f))
+        nrr.read()
+        fields.append(nrr.data)
+    stack = np.dstack(fields)
+    
+    asc = tmp_path / "sum.asc"
+    adder = NumpyRadolanAdder(datetime(2017, 8, 2, 2, 50), datetime(2017, 8, 2, 4, 50),
+                              str(tmp_path), 'RW', str(asc))
+    adder.run()
+    
+    expected = np.nansum(stack.astype(np.float64), 2).astype(np.float32)
+    never_valid = np.all(np.isnan(stack), 2)
+    expected[never_valid] = np.nan
+    
+    np.testing.assert_array_equal(adder._sum_field, expected)
+    assert np.isnan(adder._sum_field[0, 0])
+    np.testing.assert_array_equal(adder.valid_count, np.count_nonzero(~np.isnan(stack), 2))
+    assert adder.valid_count.dtype == np.uint16
+    assert adder.interval_minutes == 3 * 60
+    assert asc.exists()
+    assert adder.sum_field is adder._sum_field
+    assert adder.precision == pytest.approx(0.1)
+
+
+def test_no_float32_drift(rw_files, tmp_path):
+    f = rw_files((2,))[0]
+    adder = NumpyRadolanAdder(None, None, str(tmp_path), 'RW', None)
+    adder._read_first_file_init(f)
+    
+    field = np.full(adder._sum_field.shape, 0.1, dtype=np.float32)
+    field[0, 0] = np.nan
+    for _ in range(200):    # e.g. 200 hours of 0.1 mm
+        adder._accumulate(field, 60)
+    adder._imprint_nodata()
+    
+    assert adder.sum_field.dtype == np.float32
+    assert np.isnan(adder.sum_field[0, 0])
+    assert np.all(adder.sum_field.ravel()[1:] == np.float32(20.0))
+
+
+def test_no_ascii_file(rw_files, tmp_path):
+    rw_files((2, 3, 4))
+    adder = NumpyRadolanAdder(datetime(2017, 8, 2, 2, 50), datetime(2017, 8, 2, 4, 50),
+                              str(tmp_path), 'RW', None)
+    adder.run()
+    
+    assert not list(tmp_path.glob("*.asc"))
+    assert np.nanmax(adder.sum_field) > 0
+
+
+def test_workers_bit_identical(rw_files, tmp_path):
+    rw_files((2, 3, 4))
+    dt_beg, dt_end = datetime(2017, 8, 2, 2, 50), datetime(2017, 8, 2, 4, 50)
+    
+    serial = NumpyRadolanAdder(dt_beg, dt_end, str(tmp_path), 'RW', str(tmp_path / "serial.asc"))
+    serial.run()
+    parallel = NumpyRadolanAdder(dt_beg, dt_end, str(tmp_path), 'RW', str(tmp_path / "parallel.asc"),
+                                 workers=3)
+    parallel.run()
+    
+    assert parallel.workers == 3
+    np.testing.assert_array_equal(parallel._sum_field, serial._sum_field)
+    np.testing.assert_array_equal(parallel.valid_count, serial.valid_count)
+    assert parallel.interval_minutes == serial.interval_minutes
+
+
+def test_index_radolan_files():
+    l_files = ["/data/raa01-rw_10000-1708020250-dwd---bin",
+               "/data/raa01-rw_10000-1708020350-dwd---bin.gz",
+               "/data/raa01-yw2017.002_10000-1006010650-dwd---bin.bz2",
+               "/data/raa01-rw_10000-1708020250-dwd---bin.gz",    # duplicate timestamp
+               "/data/readme.txt"]
+    d_files = index_radolan_files(l_files)
+    
+    assert d_files == {datetime(2017, 8, 2, 2, 50): "/data/raa01-rw_10000-1708020250-dwd---bin",
+                       datetime(2017, 8, 2, 3, 50): "/data/raa01-rw_10000-1708020350-dwd---bin.gz",
+                       datetime(2010, 6, 1, 6, 50): "/data/raa01-yw2017.002_10000-1006010650-dwd---bin.bz2"}
+
+
+def test_summarize_timestamps():
+    td = timedelta(minutes=5)
+    beg = datetime(2017, 8, 2, 2, 50)
+    l_dt = [beg, beg + td, beg + 2*td, beg + 5*td]
+    
+    assert summarize_timestamps(l_dt, td) == "1708020250-1708020300, 1708020315"
+    assert summarize_timestamps(l_dt, td, max_ranges=1) == "1708020250-1708020300, ... (1 more)"
+
+
+def test_cancel(rw_files, tmp_path):
+    rw_files((2, 3, 4))
+    adder = NumpyRadolanAdder(datetime(2017, 8, 2, 2, 50), datetime(2017, 8, 2, 4, 50),
+                              str(tmp_path), 'RW', str(tmp_path / "sum.asc"))
+    l_progress = []
+    adder.progress_callback = lambda done, total: l_progress.append((done, total)) or done < 2
+    adder.run()
+    
+    assert adder.canceled
+    assert l_progress == [(1, 3), (2, 3)]
+    assert not (tmp_path / "sum.asc").exists()
@@ -0,0 +1,173 @@
+# test_numpy_radolan_reader.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.NumpyRadolanReader import NumpyRadolanReader
+from conftest import EXAMPLE_RW
+
+
+def _rvp6_to_mm_per_pixel(x, a=256, b=1.42):
+    """ reference: former per pixel conversion """
+    dBZ = (x / 2) - 32.5
+    Z = 10.0 ** (dBZ / 10.0)
+    return ((Z / a) ** (1 / b)) / 12.0
+
+
+def test_rx_in_mm(radolan_file):
+    raw = np.arange(256, dtype=np.uint8).repeat(4)    # 1024 pixels, incl. 249 (clutter) and 250 (nodata)
+    rx = radolan_file("raa01-rx_10000-1708020250-dwd---bin", "RX", raw.tobytes(), 32, 32,
+                      precision="E+00", interval=5)
+
+    nrr = NumpyRadolanReader(rx)
+    nrr.rx_in_mm = True
+    nrr.read()
+    data = nrr.data.ravel()
+
+    assert nrr.precision == 0.01
+    assert np.all(np.isnan(data[raw == 250]))
+    valid = raw != 250
+    expected = np.array([_rvp6_to_mm_per_pixel(float(x)) for x in raw[valid]])
+    np.testing.assert_allclose(data[valid], expected, rtol=1e-6)
+    assert nrr.clutter.ravel()[raw == 249].all()
+
+
+def test_rx_in_mm_zr_parameters(radolan_file):
+    raw = np.array([0, 100, 200, 250], dtype=np.uint8)
+    rx = radolan_file("raa01-rx_10000-1708020250-dwd---bin", "RX", raw.tobytes(), 2, 2,
+                      precision="E+00", interval=5)
+
+    nrr = NumpyRadolanReader(rx)
+    nrr.rx_in_mm = True
+    nrr.zr_a = 200
+    nrr.zr_b = 1.6
+    nrr.read()
+
+    expected = [_rvp6_to_mm_per_pixel(float(x), 200, 1.6) for x in raw[:3]]
+    np.testing.assert_allclose(nrr.data.ravel()[:3], expected, rtol=1e-6)
+
+
+def _wn_to_dbz_per_pixel(raw, precision):
+    """ reference: former decoding (precision first, then per pixel loop) """
+    nodata = np.where(raw & 0x2000)[0]
+    arr = (raw & 0xFFF) * precision
+    arr[nodata] = np.nan
+    with np.nditer(arr, op_flags=['readwrite']) as it:
+        for x in it:
+            if x == np.nan:
+                continue
+            x[...] = (x / 2) - 32.5
+    return arr
+
+
+def test_wn_dbz_regression(radolan_file):
+    # every possible 12 bit value, once valid and once with nodata flag (bit 14):
+    values = np.arange(0x1000, dtype=np.uint16)
+    raw = np.concatenate((values, values | 0x2000))
+    wn = radolan_file("WN2212242200_000", "WN", raw.tobytes(), 128, 64,
+                      interval=5, extra="VV 000")
+
+    nrr = NumpyRadolanReader(wn)
+    nrr.read()
+
+    assert nrr.is_dbz
+    expected = _wn_to_dbz_per_pixel(raw, nrr.precision).reshape(128, 64).astype(np.float32)
+    np.testing.assert_array_equal(nrr.data, expected)
+
+
+def test_2byte_flags(radolan_file):
+    raw = np.array([10, 10 | 0x1000, 10 | 0x2000, 10 | 0x8000, 10 | 0x4000, 0x0FFF], dtype=np.uint16)
+
+    rw = radolan_file("raa01-rw_10000-1708020250-dwd---bin", "RW", raw.tobytes(), 2, 3)
+    nrr = NumpyRadolanReader(rw)
+    nrr.read()
+
+    assert nrr.data.dtype == np.float32
+    np.testing.assert_allclose(nrr.data.ravel(), [1.0, 1.0, np.nan, 1.0, 1.0, 409.5], rtol=1e-6)
+    assert nrr.has_interpolated_station_data and nrr.has_clutter
+    np.testing.assert_array_equal(nrr.station_flags.ravel(), [0, 1, 0, 0, 0, 0])
+    np.testing.assert_array_equal(nrr.clutter.ravel(), [0, 0, 0, 1, 0, 0])
+
+    rd = radolan_file("raa01-rd_10000-1708020250-dwd---bin", "RD", raw.tobytes(), 2, 3)
+    nrr = NumpyRadolanReader(rd)
+    nrr.read()
+    assert nrr.data.ravel()[4] == pytest.approx(-1.0)
+
+
+def test_example_rw():
+    nrr = NumpyRadolanReader(EXAMPLE_RW)
+    nrr.read()
+
+    assert nrr.prod_id == 'RW'
+    assert nrr.data.shape == (900, 900)
+    assert np.count_nonzero(np.isnan(nrr.data)) == 169844
+    assert np.nanmax(nrr.data) == pytest.approx(15.0)
+    assert np.count_nonzero(nrr.station_flags) == 17334
+    assert not nrr.has_clutter
+
+
+def test_read_header_only(capsys):
+    from classes.NumpyRadolanReader import read_header_only
+
+    meta = read_header_only(EXAMPLE_RW)
+    assert capsys.readouterr().out == ""    # quiet for scans of many files
+
+    assert meta['producttype'] == 'RW'
+    assert (meta['nrow'], meta['ncol']) == (900, 900)
+    assert meta['precision'] == pytest.approx(0.1)
+    assert meta['datasize'] == 900 * 900 * 2
+
+
+def test_long_header(radolan_file):
+    """ header longer than one block """
+    stations = ",".join(f"s{i:02d}" for i in range(400))
+    raw = np.arange(6, dtype=np.uint16)
+    rw = radolan_file("raa01-rw_10000-1708020250-dwd---bin", "RW", raw.tobytes(), 2, 3,
+                      extra=f"MS{len(stations):4d}<{stations}>")
+
+    nrr = NumpyRadolanReader(rw)
+    nrr.read()
+
+    assert len(nrr.header) > 1024
+    assert len(nrr.meta['radarlocations']) == 400
+    np.testing.assert_allclose(nrr.data.ravel(), raw * 0.1, rtol=1e-6)
+
+
+@pytest.mark.parametrize("prod_id, dtype", [("RW", np.uint16), ("RX", np.uint8), ("HG", np.uint32)])
+def test_use_mmap(radolan_file, prod_id, dtype):
+    raw = np.arange(12, dtype=dtype)
+    f = radolan_file(f"raa01-{prod_id.lower()}_10000-1708020250-dwd---bin", prod_id, raw.tobytes(), 3, 4,
+                     precision="E+00")
+
+    nrr_read = NumpyRadolanReader(f)
+    nrr_read.read()
+    nrr_mmap = NumpyRadolanReader(f)
+    nrr_mmap.use_mmap = True
+    nrr_mmap.read()
+
+    assert not isinstance(nrr_mmap.data, np.memmap)
+    np.testing.assert_array_equal(nrr_mmap.data, nrr_read.data)
+
+
+def test_use_mmap_truncated(radolan_file):
+    f = radolan_file("raa01-rw_10000-1708020250-dwd---bin", "RW", bytes(10), 2, 3)
+    f.write_bytes(f.read_bytes()[:-4])
+
+    nrr = NumpyRadolanReader(f)
+    nrr.use_mmap = True
+    with pytest.raises(IOError):
+        nrr.read()
+
+
+def test_dtype():
+    nrr32 = NumpyRadolanReader(EXAMPLE_RW)
+    nrr32.read()
+    nrr64 = NumpyRadolanReader(EXAMPLE_RW)
+    nrr64.dtype = np.float64
+    nrr64.read()
+
+    assert nrr32.data.dtype == np.float32
+    assert nrr64.data.dtype == np.float64
+    np.testing.assert_array_equal(np.isnan(nrr32.data), np.isnan(nrr64.data))
+    np.testing.assert_allclose(nrr32.data, nrr64.data, rtol=1e-6)
@@ -0,0 +1,84 @@
+# test_output_profile.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.OutputProfile import OutputProfile, product_family, default_profile, encode_integers
+
+
+def test_from_string():
+    profile = OutputProfile.from_string("gtiff, zstd, 9, no")
+    assert profile == OutputProfile('gtiff', 'ZSTD', 9, False)
+    assert OutputProfile.from_string("cog, DEFLATE") == OutputProfile('cog', 'DEFLATE')
+    assert OutputProfile.from_string("cog, DEFLATE, 6, , integer").integer_storage
+    
+    for s in ("cog", "tif, DEFLATE", "cog, JPEG", "cog, DEFLATE, high", "cog, DEFLATE, 6, maybe",
+              "cog, DEFLATE, 6, yes, double"):
+        with pytest.raises(ValueError):
+            OutputProfile.from_string(s)
+
+
+def test_creation_options():
+    cog = OutputProfile('cog', 'DEFLATE', 6).creation_options(is_float=True)
+    assert {'COMPRESS=DEFLATE', 'LEVEL=6', 'PREDICTOR=FLOATING_POINT', 'BLOCKSIZE=256'} <= set(cog)
+    
+    gtiff = OutputProfile('gtiff', 'ZSTD', 9).creation_options(is_float=False)
+    assert {'COMPRESS=ZSTD', 'ZSTD_LEVEL=9', 'PREDICTOR=2', 'TILED=YES'} <= set(gtiff)
+    
+    lerc = OutputProfile('gtiff', 'LERC_DEFLATE', 9).creation_options()
+    assert 'MAX_Z_ERROR=0' in lerc and 'ZLEVEL=9' in lerc
+    assert not any(option.startswith('PREDICTOR') for option in lerc)
+    
+    # COG profile without COG driver in GDAL:
+    assert 'TILED=YES' in default_profile.creation_options(driver='GTiff')
+
+
+def test_product_family():
+    assert product_family('RW') == 'precipitation'
+    assert product_family('HG') == 'class'
+    assert product_family('WN', is_dbz=True) == 'dbz'
+
+
+@pytest.mark.parametrize("family, precision, values, dtype", [
+    ('precipitation', 0.1, [0.0, 0.1, 409.5], np.uint16),       # RW
+    ('precipitation', 0.01, [0.0, 0.01, 655.34], np.uint16),
+    ('precipitation', 1.0, [0.0, 1.0, 18.0], np.uint16),        # type per family, not per maximum
+    ('class', 1.0, [0.0, 1.0, 18.0], np.uint8),                 # HG class codes
+    ('dbz', 0.1, [-32.5, -3.0, 0.05, 95.0], np.uint16),         # WN: raw * 0.05 - 32.5
+])
+def test_encode_integers(family, precision, values, dtype):
+    data = np.array(values + [-50.0 if family == 'dbz' else -1.0], dtype=np.float32)
+    nodata = data[-1]
+    
+    encoded, scale, offset, int_nodata = encode_integers(data, precision, nodata, family)
+    
+    assert encoded.dtype == dtype
+    assert encoded[-1] == int_nodata
+    np.testing.assert_allclose(encoded[:-1] * scale + offset, values, atol=1e-4)
+
+
+def test_encode_integers_wn_reader(radolan_file):
+    from classes.NumpyRadolanReader import NumpyRadolanReader
+    
+    # every possible 12 bit value, once valid and once with nodata flag:
+    values = np.arange(0x1000, dtype=np.uint16)
+    raw = np.concatenate((values, values | 0x2000))
+    nrr = NumpyRadolanReader(radolan_file("WN2212242200_000", "WN", raw.tobytes(), 128, 64,
+                                          interval=5, extra="VV 000"))
+    nrr.read()
+    assert nrr.is_dbz
+    
+    data = np.where(np.isnan(nrr.data), -50.0, nrr.data).astype(np.float32)
+    encoded, scale, offset, int_nodata = encode_integers(data, nrr.precision, -50.0, 'dbz')
+    
+    assert (scale, offset) == (pytest.approx(0.05), -32.5)
+    assert encoded.dtype == np.uint16
+    np.testing.assert_array_equal(encoded.ravel(), np.concatenate((values, np.full(0x1000, int_nodata))))
+
+
+def test_encode_integers_not_possible():
+    # not multiples of the precision (e.g. RVP6 units converted to mm):
+    assert encode_integers(np.array([0.123, 1.0], dtype=np.float32), 0.1, -1.0) is None
+    # too large for 16 bit (e.g. long sums):
+    assert encode_integers(np.array([7000.0, -1.0], dtype=np.float32), 0.1, -1.0) is None
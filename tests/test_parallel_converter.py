@@ -0,0 +1,26 @@
+# test_parallel_converter.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+
+from classes.ParallelConverter import ParallelConverter, ConvertJob
+from classes.def_projections import projs
+
+
+def _jobs(rw_files, tmp_path, data_root):
+    return [ConvertJob(str(f), str(data_root), '.tif', projs[0][1], projs[1][1], 'EPSG:3035',
+                       None, False, str(tmp_path / "cache")) for f in rw_files(range(4), nodata=0.0)]
+
+
+def test_processes_like_serial(rw_files, tmp_path):
+    serial = list(ParallelConverter(1).run(_jobs(rw_files, tmp_path, tmp_path / "serial")))
+    parallel = list(ParallelConverter(2).run(_jobs(rw_files, tmp_path, tmp_path / "parallel")))
+    
+    assert [r.tif_file.name for r in parallel] == [r.tif_file.name for r in serial]
+    assert len({r.tif_file.name for r in serial}) == 4
+    for r_s, r_p in zip(serial, parallel):
+        assert r_p.tif_file.parent == tmp_path / "parallel" / "radolan"
+        np.testing.assert_array_equal(gdal.Open(str(r_p.tif_file)).ReadAsArray(),
+                                      gdal.Open(str(r_s.tif_file)).ReadAsArray())
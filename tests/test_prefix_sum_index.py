@@ -0,0 +1,84 @@
+# test_prefix_sum_index.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.PrefixSumIndex import PrefixSumIndex
+from classes.NumpyRadolanAdder import NumpyRadolanAdder, glob_radolan_files, index_radolan_files
+
+
+def _adder_sum(data_path, dt_beg, dt_end):
+    adder = NumpyRadolanAdder(dt_beg, dt_end, str(data_path), 'RW', None)
+    adder.run()
+    return adder
+
+
+# over a day and a month boundary, with a gap of some hours:
+L_DT = [datetime(2017, 8, 31, 20, 50) + timedelta(hours=h) for h in range(30) if h not in (9, 10)]
+
+
+@pytest.mark.parametrize("beg, end", [
+    (L_DT[0], L_DT[-1]),                                           # checkpoints and edges
+    (datetime(2017, 8, 31, 22, 50), datetime(2017, 9, 1, 3, 50)),  # only edges
+    (datetime(2017, 9, 1, 0, 50), datetime(2017, 9, 2, 1, 50)),    # over the whole indexed range
+    (datetime(2017, 9, 1, 0, 0), datetime(2017, 9, 1, 23, 0)),     # between the time steps ('--split day')
+    (datetime(2017, 8, 31, 18, 0), datetime(2017, 9, 1, 2, 0)),    # from before the index
+])
+def test_sum_like_adder(rw_files, tmp_path, beg, end):
+    rw_files(L_DT)
+    
+    index = PrefixSumIndex(tmp_path / "index")
+    assert index.update(glob_radolan_files(tmp_path, 'RW')) == len(L_DT)
+    
+    result = index.sum(beg, end, index_radolan_files(glob_radolan_files(tmp_path, 'RW')))
+    adder = _adder_sum(tmp_path, beg, end)
+    
+    np.testing.assert_allclose(result.sum_field, adder.sum_field, rtol=1e-6)
+    np.testing.assert_array_equal(np.isnan(result.sum_field), np.isnan(adder.sum_field))
+    np.testing.assert_array_equal(result.valid_count, adder.valid_count)
+    assert result.interval_minutes == adder.interval_minutes
+
+
+def test_incremental_and_late_files(rw_files, tmp_path):
+    files = rw_files(L_DT)
+    l_files = [str(f) for f in files]
+    
+    # files arrive in three parts, the last part with a late file of the day before:
+    index = PrefixSumIndex(tmp_path / "index")
+    index.update(l_files[:10])
+    index = PrefixSumIndex(tmp_path / "index")    # state from disk
+    index.update(l_files[12:])
+    assert index.update(l_files) == 2             # the two missing ones, late
+    assert index.update(l_files) == 0
+    
+    beg, end = L_DT[0], L_DT[-1]
+    result = index.sum(beg, end, index_radolan_files(l_files))
+    adder = _adder_sum(tmp_path, beg, end)
+    
+    np.testing.assert_allclose(result.sum_field, adder.sum_field, rtol=1e-6)
+    np.testing.assert_array_equal(result.valid_count, adder.valid_count)
+
+
+def test_adder_with_index(rw_files, tmp_path):
+    rw_files(L_DT[:5])
+    beg, end = L_DT[0], L_DT[4]
+    
+    adder = NumpyRadolanAdder(beg, end, str(tmp_path), 'RW', None)
+    adder.prefix_index = PrefixSumIndex(tmp_path / "index")
+    adder.run()
+    
+    np.testing.assert_allclose(adder.sum_field, _adder_sum(tmp_path, beg, end).sum_field, rtol=1e-6)
+    assert adder.prefix_index.last == L_DT[4]
+
+
+def test_files_off_the_axis(rw_files, tmp_path, capsys):
+    files = rw_files(L_DT[:3]) + rw_files([datetime(2017, 8, 31, 21, 20), datetime(2017, 8, 31, 22, 20)], seed=3)
+    
+    index = PrefixSumIndex(tmp_path / "index")
+    assert index.update(files) == 3
+    
+    l_err = capsys.readouterr().err.splitlines()
+    assert len(l_err) == 1 and "2 files not on the time axis" in l_err[0]
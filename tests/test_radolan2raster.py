@@ -0,0 +1,32 @@
+# test_radolan2raster.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gdal = pytest.importorskip("osgeo.gdal")
+
+from classes.ASCIIGridWriter import ASCIIGridWriter
+from classes.radolan2raster import array2mem_dataset
+from classes.def_projections import projs
+
+
+PRJ_RADOLAN = projs[0][1]
+
+
+@pytest.mark.parametrize("precision", [1.0, 0.1])
+def test_mem_dataset_like_ascii_grid(tmp_path, precision):
+    rng = np.random.default_rng(5)
+    data = (rng.integers(0, 500, size=(900, 900)) * precision).astype(np.float32)
+    data[rng.random(data.shape) < 0.3] = np.nan
+    
+    asc = tmp_path / "test.asc"
+    ASCIIGridWriter(data, precision, asc).write()
+    ds_asc = gdal.Open(str(asc))
+    
+    ds_mem = array2mem_dataset(data, precision, PRJ_RADOLAN)
+    
+    assert ds_mem.GetGeoTransform() == pytest.approx(ds_asc.GetGeoTransform())
+    band_mem, band_asc = ds_mem.GetRasterBand(1), ds_asc.GetRasterBand(1)
+    assert band_mem.DataType == band_asc.DataType
+    assert band_mem.GetNoDataValue() == band_asc.GetNoDataValue()
+    np.testing.assert_allclose(band_mem.ReadAsArray(), band_asc.ReadAsArray(), rtol=1e-6)
@@ -0,0 +1,106 @@
+# test_radolan_cube.py
+
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.RadolanCube import RadolanCube
+from classes.NumpyRadolanAdder import NumpyRadolanAdder, glob_radolan_files
+from classes.NumpyRadolanReader import NumpyRadolanReader
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_like_reader(rw_files, tmp_path, compress):
+    files = rw_files((2, 3, 5))
+    cube = RadolanCube(tmp_path / "cube", tile=256, compress=compress)
+    assert cube.ingest(files) == 3
+    
+    for hour, f in zip((2, 3, 5), files):
+        nrr = NumpyRadolanReader(str(f))
+        nrr.read()
+        np.testing.assert_array_equal(cube.read(datetime(2017, 8, 2, hour, 50)), nrr.data)
+    
+    with pytest.raises(KeyError):
+        cube.read(datetime(2017, 8, 2, 4, 50))    # missing hour
+    
+    # opened again: same store, nothing new
+    cube = RadolanCube(tmp_path / "cube")
+    assert cube.ingest(files) == 0
+    assert cube.step == 60 and cube.tile == 256
+    assert cube.timestamps() == [datetime(2017, 8, 2, h, 50) for h in (2, 3, 5)]
+
+
+def test_series(rw_files, tmp_path):
+    files = rw_files((2, 3, 5))
+    cube = RadolanCube(tmp_path / "cube", tile=256)
+    cube.ingest(files)
+    
+    l_dt, values = cube.series(700, 300, datetime(2017, 8, 2, 2, 50), datetime(2017, 8, 2, 5, 50))
+    
+    assert len(l_dt) == 4
+    assert np.isnan(values[2])    # 04:50 missing
+    for hour, value in zip((2, 3, 5), values[[0, 1, 3]]):
+        np.testing.assert_array_equal(value, cube.read(datetime(2017, 8, 2, hour, 50))[700, 300])
+
+
+def test_sum_like_adder(rw_files, tmp_path):
+    rw_files((2, 3, 4, 5))
+    dt_beg, dt_end = datetime(2017, 8, 2, 2, 50), datetime(2017, 8, 2, 5, 50)
+    
+    adder = NumpyRadolanAdder(dt_beg, dt_end, str(tmp_path), 'RW', None)
+    adder.run()
+    
+    cube = RadolanCube(tmp_path / "cube")
+    cube.ingest(glob_radolan_files(tmp_path, 'RW'))
+    adder_cube = NumpyRadolanAdder(dt_beg, dt_end, str(tmp_path), 'RW', None)
+    adder_cube.cube = cube
+    adder_cube.run()
+    
+    np.testing.assert_allclose(adder_cube.sum_field, adder.sum_field, rtol=1e-6)
+    assert np.isnan(adder_cube.sum_field[0, 0])
+    np.testing.assert_array_equal(adder_cube.valid_count, adder.valid_count)
+    assert adder_cube.interval_minutes == adder.interval_minutes == 240
+
+
+def test_before_the_store(rw_files, tmp_path):
+    cube = RadolanCube(tmp_path / "cube", tile=256)
+    cube.ingest(rw_files((2, 3)))
+    dt_beg, dt_end = datetime(2017, 8, 2, 0, 50), datetime(2017, 8, 2, 3, 50)
+    
+    result = cube.sum(dt_beg, dt_end)
+    inside = cube.sum(datetime(2017, 8, 2, 2, 50), dt_end)
+    
+    assert result.missing == [datetime(2017, 8, 2, 0, 50), datetime(2017, 8, 2, 1, 50)]
+    assert result.interval_minutes == inside.interval_minutes == 120
+    np.testing.assert_array_equal(result.sum_field, inside.sum_field)
+    
+    l_dt, values = cube.series(700, 300, dt_beg, dt_end)
+    assert l_dt[0] == dt_beg and len(values) == 4
+    assert np.isnan(values[:2]).all()
+    np.testing.assert_array_equal(values[2:], cube.series(700, 300, datetime(2017, 8, 2, 2, 50), dt_end)[1])
+
+
+def test_backfill_older_files(rw_files, tmp_path, capsys):
+    later = [datetime(2017, 8, 3, 0, 50), datetime(2017, 8, 3, 1, 50)]
+    earlier = [datetime(2017, 8, 1, 22, 50), datetime(2017, 8, 1, 23, 50)]
+    
+    cube = RadolanCube(tmp_path / "cube", tile=256)
+    assert cube.ingest(rw_files(later)) == 2
+    
+    files = rw_files(earlier, seed=5) + rw_files([datetime(2017, 8, 2, 3, 20)], seed=6)    # off the axis
+    capsys.readouterr()
+    assert cube.ingest(files) == 2
+    assert "1 files not on the time axis" in capsys.readouterr().err
+    
+    cube = RadolanCube(tmp_path / "cube")
+    assert cube.timestamps() == earlier + later
+    for dt, f in zip(earlier, files):
+        nrr = NumpyRadolanReader(str(f))
+        nrr.read()
+        np.testing.assert_array_equal(cube.read(dt), nrr.data)
+    
+    result = cube.sum(earlier[0], later[-1])
+    assert result.interval_minutes == 4 * 60
+    assert len(result.missing) == 28 - 4    # 01.08. 22:50 ... 03.08. 01:50
@@ -0,0 +1,115 @@
+# test_rolling_accumulator.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from classes.RollingAccumulator import RollingAccumulator
+from classes.NumpyRadolanAdder import NumpyRadolanAdder
+
+
+WINDOWS = (1, 3, 6)    # hours, small for the test
+
+
+def _assert_like_adder(acc, hours, data_path):
+    dt_end = acc.last
+    adder = NumpyRadolanAdder(dt_end - timedelta(hours=hours - 1), dt_end, str(data_path), 'RW', None)
+    adder.run()
+
+    result = acc.window_sum(hours)
+    np.testing.assert_allclose(result.sum_field, adder.sum_field, rtol=1e-6)
+    np.testing.assert_array_equal(np.isnan(result.sum_field), np.isnan(adder.sum_field))
+    np.testing.assert_array_equal(result.valid_count, adder.valid_count)
+    assert result.interval_minutes == adder.interval_minutes
+
+
+# with a gap of two hours:
+L_DT = [datetime(2017, 8, 2, 2, 50) + timedelta(hours=h) for h in range(12) if h not in (7, 8)]
+
+
+def test_rolling_like_adder(rw_files, tmp_path):
+    l_files = rw_files(L_DT)
+
+    acc = RollingAccumulator(tmp_path / "rolling", WINDOWS)
+    for n, fn in enumerate(l_files):
+        assert acc.update(fn)
+        if n in (3, 6, len(l_files) - 1):    # window partly filled, before and after the gap
+            for hours in WINDOWS:
+                _assert_like_adder(acc, hours, tmp_path)
+
+    assert acc.last == L_DT[-1]
+    assert len(acc.window_sum(6).missing) == 2
+
+
+def test_restart_duplicate_and_late(rw_files, tmp_path):
+    l_files = rw_files(L_DT)
+
+    acc = RollingAccumulator(tmp_path / "rolling", WINDOWS)
+    acc.update_files(l_files[:5] + l_files[6:8])    # one missing
+
+    acc = RollingAccumulator(tmp_path / "rolling")    # state from disk
+    assert acc.windows == WINDOWS
+    assert not acc.update(l_files[7])                 # duplicate
+    assert acc.update(l_files[5])                     # late, but in the windows
+    assert acc.update_files(l_files) == len(l_files) - 8
+
+    for hours in WINDOWS:
+        _assert_like_adder(acc, hours, tmp_path)
+
+    adder = acc.adder(3)
+    np.testing.assert_array_equal(adder.sum_field, acc.window_sum(3).sum_field)
+
+
+def test_long_gap_resets(rw_files, tmp_path):
+    l_dt = L_DT[:3] + [L_DT[-1] + timedelta(hours=10)]
+    l_files = rw_files(l_dt)
+
+    acc = RollingAccumulator(tmp_path / "rolling", WINDOWS)
+    acc.update_files(l_files)
+
+    for hours in WINDOWS:
+        _assert_like_adder(acc, hours, tmp_path)
+    assert not acc.update(l_files[0])    # older than the longest window
+
+
+def test_interrupted_update(rw_files, tmp_path, monkeypatch):
+    l_files = rw_files(L_DT)
+
+    acc = RollingAccumulator(tmp_path / "rolling", WINDOWS)
+    acc.update_files([l_files[0], l_files[1], l_files[3]])
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    save_npz = RollingAccumulator._atomic_savez
+
+    def crash_at_commit(npz_file, **d_arrays):
+        if npz_file.name == 'sums.npz':
+            crash()
+        save_npz(npz_file, **d_arrays)
+
+    # before the commit: lost completely
+    with monkeypatch.context() as m:
+        m.setattr(RollingAccumulator, '_atomic_savez', staticmethod(crash_at_commit))
+        with pytest.raises(KeyboardInterrupt):
+            acc.update(l_files[2])    # late file
+
+    acc = RollingAccumulator(tmp_path / "rolling")
+    assert acc.update(l_files[2])
+
+    # after the commit, before the grid is in the ring: completed on the next start
+    with monkeypatch.context() as m:
+        m.setattr(RollingAccumulator, '_write_slot', crash)
+        with pytest.raises(KeyboardInterrupt):
+            acc.update(l_files[4])
+
+    acc = RollingAccumulator(tmp_path / "rolling")
+    assert not acc.update(l_files[4])
+    assert not (tmp_path / "rolling" / "pending.npz").exists()
+
+    acc.update_files(l_files)    # the grid of l_files[4] leaves the windows
+    for hours in WINDOWS:
+        _assert_like_adder(acc, hours, tmp_path)
+